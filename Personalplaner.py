@@ -1,50 +1,50 @@
 import streamlit as st
 import json
 import io
-import random
-import gspread
-from google.oauth2.service_account import Credentials
-import pandas as pd
-from io import BytesIO
-from collections import defaultdict
 import base64
-
-def add_bg_from_local(image_file):
-    with open(image_file, "rb") as file:
-        encoded = base64.b64encode(file.read()).decode()
-    page_bg_img = f"""
-    <style>
-    [data-testid="stAppViewContainer"] {{
-        background-image: url("data:image/jpg;base64,{encoded}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-        background-attachment: fixed;
-    }}
-    </style>
-    """
-    st.markdown(page_bg_img, unsafe_allow_html=True)
-
-# Bild einfügen
-add_bg_from_local("background.jpg")
-
-# ----- 🔐 Zugriffsschutz -----
-def login():
-    st.title("🔐 Zugriff geschützt")
-    password = st.text_input("Bitte Passwort eingeben:", type="password")
-    if password == "attractions_2025":
-        return True
-    elif password:
-        st.error("Falsches Passwort")
-        return False
-    return False
-
-if not login():
-    st.stop()
+import datetime
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from planer import NIEMAND_VERFUEGBAR, plane_personal, plane_personal_bereiche, plane_personal_beste, plane_personal_inkrementell, plane_personal_optimal
+from analyse import analysiere_machbarkeit, simuliere_ausfaelle
+from export import exportiere_bereichsplan_excel, exportiere_rotationsplan_excel
+from historie import PlanHistorie
+from katalog import lade_katalog
+from kompakt import entpacke_planung, entpacke_rotation, packe_planung, packe_rotation, paket_bytes
+from messung import aktiviere_log, erfasse, messe, statistik, zaehle, zuruecksetzen
+from mitarbeiter import parse_mitarbeiter
+from mitarbeiter_editor import (
+    baue_filterindex,
+    filtere,
+    hat_deltas,
+    neuer_editor,
+    pruefe_deltas,
+    seite,
+    uebernehme_editor,
+    unbekannte_einweisungen,
+    wende_deltas_an,
+)
+from planungscache import MAX_BYTES, PlanungsCache, planungsschluessel
+from rotation import plane_rotation, zeitfenster
+from mitarbeiter_speicher import (
+    MITARBEITER_SHEET_URL,
+    GoogleSheetSpeicher,
+    SnapshotSpeicher,
+    SqliteSpeicher,
+    roster_version,
+)
+
+# Dauer des ganzen Skriptlaufs (Stufe "app.lauf", siehe Ende der Datei)
+lauf_start = time.perf_counter()
+
+# Hintergrundbilder in ./static: "voll" (Original) oder "klein" (verkleinert, für Tablets mit schwachem WLAN)
+HINTERGRUENDE = {"voll": "background.jpg", "klein": "background_klein.jpg"}
 
 #Tab Schriftgröße und Position
-st.markdown("""
-    <style>
+TAB_CSS = """
     /* Tab-Container */
     .stTabs [data-baseweb="tab-list"] {
         font-size: 50px;              /* Schriftgröße der Tabs */
@@ -66,429 +66,257 @@ st.markdown("""
         background-color: #d3e5ff !important;
         color: black;
     }
-    </style>
-""", unsafe_allow_html=True)
+"""
+
+@st.cache_resource
+def seiten_css(variante):
+    # Einmal pro Prozess und Variante: Hintergrund + Tab-CSS als ein kleiner Style-Block
+    bild = HINTERGRUENDE.get(variante)
+    if bild is None:
+        hintergrund = ""   # "aus": kein Hintergrundbild
+    else:
+        if st.get_option("server.enableStaticServing"):
+            # Bild als statische Datei referenzieren: der Browser lädt es einmal und cacht es
+            url = f"app/static/{bild}"
+        else:
+            # Ohne Static Serving (.streamlit/config.toml) als Data-URI, aber nur einmal kodiert
+            with open(f"static/{bild}", "rb") as file:
+                url = f"data:image/jpg;base64,{base64.b64encode(file.read()).decode()}"
+        hintergrund = f"""
+    [data-testid="stAppViewContainer"] {{
+        background-image: url("{url}");
+        background-size: cover;
+        background-position: center;
+        background-repeat: no-repeat;
+        background-attachment: fixed;
+    }}
+"""
+    return f"<style>{hintergrund}{TAB_CSS}</style>"
+
+def einstellungen(abschnitt):
+    # Optionaler Abschnitt aus secrets.toml; ohne secrets.toml (z.B. lokal vor dem Login) leer
+    try:
+        return st.secrets.get(abschnitt, {})
+    except FileNotFoundError:   # StreamlitSecretNotFoundError
+        return {}
+
+# Variante über ?hintergrund=klein|voll|aus (z.B. als Lesezeichen auf den Tablets), sonst aus secrets
+hintergrund_variante = st.query_params.get("hintergrund") or einstellungen("darstellung").get("hintergrund", "voll")
+if hintergrund_variante not in HINTERGRUENDE and hintergrund_variante != "aus":
+    hintergrund_variante = "voll"
+st.markdown(seiten_css(hintergrund_variante), unsafe_allow_html=True)
+
+# ----- 🔐 Zugriffsschutz -----
+def login():
+    st.title("🔐 Zugriff geschützt")
+    password = st.text_input("Bitte Passwort eingeben:", type="password")
+    if password == "attractions_2025":
+        return True
+    elif password:
+        st.error("Falsches Passwort")
+        return False
+    return False
+
+if not login():
+    st.stop()
 
 # ----- Google Sheets Setup -----
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+# Drive-Metadaten nur lesend, um Änderungen am Sheet günstig zu erkennen (lastUpdateTime)
+SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive.metadata.readonly"]
+
+# Wie oft (Sekunden) der prozessweite Mitarbeiter-Cache gegen das Sheet geprüft wird
+ROSTER_PRUEFINTERVALL = 30
 
 @st.cache_resource(ttl=600)
 def get_gspread_client():
+    # Google-Bibliotheken erst laden, wenn das Sheet wirklich gebraucht wird (nicht bei speicher.art = "lokal")
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     service_account_info = json.loads(st.secrets["gpc"]["key"])
 
     creds = Credentials.from_service_account_info(service_account_info, scopes=SCOPES)
     client = gspread.authorize(creds)
     return client
 
-def load_mitarbeiter_df():
-    if "df_mitarbeiter" not in st.session_state:
-        client = get_gspread_client()
-        sheet = client.open_by_url("https://docs.google.com/spreadsheets/d/119O3dcaEVqGx0fuWju-6mH9WPjyqZkPiunwO7GMKBiQ/edit")
-        worksheet = sheet.worksheet("mitarbeiter_liste")
-        data = worksheet.get_all_records()
-        df = pd.DataFrame(data)
-        df["Trainer"] = (
-            df["Trainer"]
-            .fillna("")                                                # NaN -> ""
-            .apply(lambda x: [t.strip() for t in str(x).split(",") if t.strip()])
-        )
-        st.session_state.df_mitarbeiter = df
-
-    return st.session_state.df_mitarbeiter
+@st.cache_resource
+def get_mitarbeiter_speicher():
+    # Backend über secrets wählbar: "google" (Standard, mit lokalem Snapshot) oder "lokal" (nur SQLite, offline)
+    speicher = einstellungen("speicher")
+    snapshot = SqliteSpeicher(speicher.get("snapshot_pfad", "mitarbeiter_snapshot.sqlite"))
+    if speicher.get("art", "google") == "lokal":
+        return snapshot
+    return SnapshotSpeicher(GoogleSheetSpeicher(get_gspread_client), snapshot)
+
+@st.cache_resource
+def messlog_einrichten():
+    # JSON-Log der Messungen optional über secrets: [messung] log = "messung.jsonl" (oder "stderr")
+    ziel = einstellungen("messung").get("log")
+    if ziel:
+        aktiviere_log(None if ziel == "stderr" else ziel)
+    return ziel
+
+@st.cache_resource
+def get_plan_historie():
+    # Abgeschlossene Planungen lokal in SQLite (Pfad über secrets: [historie] pfad = "...")
+    return PlanHistorie(einstellungen("historie").get("pfad", "plan_historie.sqlite"))
+
+@st.cache_resource
+def planungs_cache():
+    # Prozessweit, Größe über secrets: [planung] cache_mb = 64
+    return PlanungsCache(max_bytes=int(einstellungen("planung").get("cache_mb", MAX_BYTES / 2**20) * 2**20))
+
+@st.cache_resource
+def mitarbeiter_cache():
+    # Prozessweit, von allen Sitzungen geteilt
+    return {"lock": threading.Lock(), "df": None, "mitarbeiter": None, "version": None, "geaendert": None, "geprueft": 0.0}
+
+def _setze_stand(cache, df, geaendert):
+    # Tabelle und daraus einmal geparste Mitarbeiter-Objekte gemeinsam ablegen
+    cache["df"] = df
+    cache["mitarbeiter"] = parse_mitarbeiter(df)
+    cache["version"] = roster_version(df)
+    cache["geaendert"] = geaendert
+    cache["geprueft"] = time.monotonic()
 
-def save_mitarbeiter_df(df: pd.DataFrame):
-    df_to_save = df.copy()
-    df_to_save["Trainer"] = df_to_save["Trainer"].apply(lambda lst: ", ".join(lst))
-    client = get_gspread_client()
-    sheet = client.open_by_url("https://docs.google.com/spreadsheets/d/119O3dcaEVqGx0fuWju-6mH9WPjyqZkPiunwO7GMKBiQ/edit")
-    worksheet = sheet.worksheet("mitarbeiter_liste")
-    worksheet.clear()
-    worksheet.update([df.columns.values.tolist()] + df.values.tolist())
-
-#Excel Export
-def exportiere_bereichsplan_excel(planung, df_mitarbeiter, anwesend, fahrgeschaefte):
-    # Mapping von Name zu Fahrgeschäften
-    zuweisung_map = defaultdict(list)
-    for fg, pos_dict in planung.items():
-        for name in pos_dict.values():
-            base_name = name.split(" (")[0]
-            zuweisung_map[base_name].append(fg)
-
-    # Mapping Fahrgeschäft -> Bereich (für temporäre Gruppierung)
-    fg_to_bereich = {fg["Name"]: fg.get("Bereich", "Unbekannt") for fg in fahrgeschaefte}
-
-    verplante_namen = set(zuweisung_map.keys())
-
-    daten = []
-    for _, row in df_mitarbeiter.iterrows():
-        name = row["Name"]
-        if " " in name:
-            vorname, nachname = name.split(" ", 1)
+def load_mitarbeiter_df():
+    cache = mitarbeiter_cache()
+    with cache["lock"]:
+        if cache["df"] is None:
+            # Kaltstart ohne Abfrage der Quelle: der Snapshot bringt seinen Stand mit, abgeglichen wird im Hintergrund
+            zaehle("roster.cache_fehlgriff")
+            with messe("roster.laden"):
+                _setze_stand(cache, *get_mitarbeiter_speicher().laden())
+        elif time.monotonic() - cache["geprueft"] > ROSTER_PRUEFINTERVALL:
+            speicher = get_mitarbeiter_speicher()
+            with messe("roster.stand"):
+                geaendert = speicher.stand()
+            if geaendert is None or geaendert != cache["geaendert"]:
+                zaehle("roster.cache_fehlgriff")
+                with messe("roster.laden"):
+                    _setze_stand(cache, *speicher.laden(geaendert))
+            else:
+                zaehle("roster.cache_treffer")
+            cache["geprueft"] = time.monotonic()
         else:
-            vorname, nachname = name, ""
-
-        bereich = row.get("Bereich", "Unbekannt")  # Falls mal nicht da
-        if name in verplante_namen:
-            fgs = zuweisung_map.get(name, [])
-            for fg in fgs:
-                daten.append({
-                    "Nachname": nachname,
-                    "Vorname": vorname,
-                    "Fahrgeschäft": fg,
-                    "Bereich_temp": fg_to_bereich.get(fg, "Unbekannt"),
-                    "Geplant von": "",
-                    "Geplant bis": "",
-                    "Beginn": "",
-                    "Ende": "",
-                    "Bemerkungen": "",
-                    "Unterschrift": ""
-                })
-        elif name in anwesend:
-            # Übrige Mitarbeiter ohne Zuweisung
-            daten.append({
-                "Nachname": nachname,
-                "Vorname": vorname,
-                "Fahrgeschäft": "Zusatz",
-                "Bereich_temp": bereich,
-                "Geplant von": "",
-                "Geplant bis": "",
-                "Beginn": "",
-                "Ende": "",
-                "Bemerkungen": "",
-                "Unterschrift": ""
-            })
-
-    df = pd.DataFrame(daten)
-    # Sortieren nach Bereich und Nachname
-    df = df.sort_values(by=["Bereich_temp", "Nachname", "Vorname"])
-
-    excel_buffer = BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine="xlsxwriter") as writer:
-        workbook = writer.book
-
-        for bereich, group_df in df.groupby("Bereich_temp"):
-            sheetname = bereich[:31]
-            # Bereich-Spalte vor dem Export entfernen
-            export_df = group_df.drop(columns=["Bereich_temp"])
-
-            #Tabelle startet erst ab Zeile 3(Excel Zeile 3 = Index 2)
-            export_df.to_excel(writer, sheet_name=sheetname, startrow=2, index=False)
-
-            worksheet = writer.sheets[sheetname]
-
-            # === 1. Überschrift in Zeile 1 ===
-            ueberschrift = f"Anwesenheitsliste {bereich}      Datum: "
-            title_format = workbook.add_format({
-                "bold": True,
-                "font_size": 16,
-                "align": "left",
-                "valign": "vcenter"
-            })
-            worksheet.merge_range('A1:E1', ueberschrift, title_format)  # Bereich A1–E1 anpassen je nach Breite
-
-            # Header formatieren: fett, hellblauer Hintergrund
-            header_format = workbook.add_format({
-                "bold": True,
-                "bg_color": "#DDEBF7",
-                "border": 1,
-                "font_size": 14,
-                "align": "center",
-                "valign": "vcenter"
-            })
-            for col_num, value in enumerate(export_df.columns):
-                worksheet.write(2, col_num, value, header_format)
-
-            #Alle anderen Zellen
-            cell_format = workbook.add_format({
-                "border": 1,
-                "font_size": 14,
-                "align": "center",
-                "valign": "vcenter"
-            })
-            for row_num, row in enumerate(export_df.values, start=3):
-                for col_num, cell_value in enumerate(row):
-                    worksheet.write(row_num, col_num, cell_value, cell_format)
-
-            # Spaltenbreiten individuell anpassen
-            for col_num, col_name in enumerate(export_df.columns):
-                if "Beginn" in col_name or "Ende" in col_name:
-                    worksheet.set_column(col_num, col_num, 13)  # schmalere Uhrzeit-Spalten
-                elif col_name == "Fahrgeschäft":
-                    worksheet.set_column(col_num, col_num, 15)  # breitere Fahrgeschäft-Spalte
-                elif col_name == "Bemerkungen":
-                    worksheet.set_column(col_num, col_num, 18)  # breitere Bemerkungen
-                elif col_name == "Unterschrift":
-                    worksheet.set_column(col_num, col_num, 20)  #breitere Unterschrift
-                else:
-                    worksheet.set_column(col_num, col_num, 13)  # Standardbreite
-
-            # Hier z.B. alle Zeilen 1 bis len(group_df)+1 auf 30 Punkte Höhe
-            for row_num in range(1, len(group_df) + 3):  # +1 Header, +1 da Excel 1-basiert
-                worksheet.set_row(row_num, 30)  # 30 ist Beispielhöhe in Punkten
-                # Optionale: Seitenlayout auf Querformat und Seitenränder (für Druck)
+            zaehle("roster.cache_treffer")
 
-            worksheet.set_landscape()
-            worksheet.set_margins(left=0.5, right=0.5, top=0.75, bottom=0.75)
+        # Sitzung hält nur eine Referenz auf den geteilten Stand
+        st.session_state.df_mitarbeiter = cache["df"]
+        st.session_state.mitarbeiter = cache["mitarbeiter"]
+        st.session_state.roster_version = cache["version"]
+        st.session_state.roster_geaendert = cache["geaendert"]
 
-    excel_buffer.seek(0)
-    return excel_buffer
-
-# ----- Fahrgeschäfte lokal laden -----
-with open("fahrgeschaefte.json", "r", encoding="utf-8") as f:
-    fahrgeschaefte_raw = json.load(f)
-    fahrgeschaefte = fahrgeschaefte_raw["fahrgeschaefte"]
-
-# Bereiche vorbereiten (wird für die spätere Sortierung und Anzeige benötigt)
-bereiche = {}
-for fg in fahrgeschaefte:
-    bereich = fg.get("Bereich", "Unbekannt")
-    bereiche.setdefault(bereich, []).append(fg["Name"])
-
-# Planung
-def plane_personal(mitarbeiter_df, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs):
-    import random
-
-    # Nur anwesende Mitarbeiter berücksichtigen
-    aktive_mitarbeiter = mitarbeiter_df[mitarbeiter_df["Name"].isin(anwesend)].to_dict(orient="records")
-    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
-
-    #Trainerliste in Set wandeln
-    trainerpflicht_fgs = set(trainerpflicht_fgs)
-
-    # Zufällige Reihenfolge der Fahrgeschäfte (Fairness zwischen Bereichen)
-    random.shuffle(offene_fgs)
-
-    planung = {}
-    verplante = []
-    fehlende_trainer = []
-
-    # ✅ Vorab-Zuweisungen einplanen
-    for name, zuweisung in manuelle_zuweisungen.items():
-        fg_name = zuweisung["Fahrgeschäft"]
-        pos_name = zuweisung["Position"]
-
-        if fg_name not in planung:
-            planung[fg_name] = {}
-
-        planung[fg_name][pos_name] = name
-        verplante.append(name)
-
-    # Aktive Mitarbeiter aktualisieren (manuell zugewiesene rausnehmen)
-    aktive_mitarbeiter = [m for m in aktive_mitarbeiter if m["Name"] not in verplante]
-
-    # 🔍 Alle Positionen sammeln und nach Anzahl verfügbarer Kandidaten sortieren
-    alle_positionen = []
-    for fg in offene_fgs:
-        fg_name = fg["Name"]
-        for p in fg["Positionen"]:
-            pos_name = p["Name"]
-            einweisung_erforderlich = p["Einweisung_erforderlich"]
-
-            # ⛔ Position bereits manuell belegt
-            if fg_name in planung and pos_name in planung[fg_name]:
-                continue
-
-            verfuegbar = [m for m in aktive_mitarbeiter if m["Name"] not in verplante]
-            if einweisung_erforderlich:
-                anzahl_kandidaten = sum(
-                    1 for m in verfuegbar if fg_name in m["Einweisungen"] or fg_name in m.get("Sekundaer_Einweisungen", [])
-                )
-            else:
-                anzahl_kandidaten = len(verfuegbar)
-
-            alle_positionen.append({
-                "fg_name": fg_name,
-                "pos_name": pos_name,
-                "einweisung_erforderlich": einweisung_erforderlich,
-                "anzahl_kandidaten": anzahl_kandidaten
-            })
-
-    # 🥇 Kritischste Positionen zuerst (wenigste Kandidaten zuerst)
-    alle_positionen.sort(key=lambda x: x["anzahl_kandidaten"])
-
-    # 🔁 Haupt-Planung
-    for pos in alle_positionen:
-        fg_name = pos["fg_name"]
-        pos_name = pos["pos_name"]
-        einweisung_erforderlich = pos["einweisung_erforderlich"]
-
-        if fg_name not in planung:
-            planung[fg_name] = {}
-
-        verfuegbar = [m for m in aktive_mitarbeiter if m["Name"] not in verplante]
-        kandidaten = []
-        einweisungs_typ = ""
-
-        kandidaten_prim = [m for m in verfuegbar if fg_name in m["Einweisungen"]]
-        kandidaten_sek = [m for m in verfuegbar if fg_name in m.get("Sekundaer_Einweisungen", [])]
-
-        if kandidaten_prim:
-            kandidaten = kandidaten_prim
-            einweisungs_typ = "primär"
-        elif kandidaten_sek:
-            kandidaten = kandidaten_sek
-            einweisungs_typ = "sekundär"
-        elif not einweisung_erforderlich:
-            kandidaten = verfuegbar
-            einweisungs_typ = "optional"
-        else:
-            kandidaten = []
-            einweisungs_typ = "keine"
-        if kandidaten:
-            if fg_name in trainerpflicht_fgs:
-                trainer_kandidaten = [
-                    m for m in kandidaten
-                    if (
-                        isinstance(m.get("Trainer", ""), str)
-                        and fg_name in [t.strip() for t in m["Trainer"].split(",")]
-                        and (
-                            fg_name in m.get("Einweisungen", [])
-                            or fg_name in m.get("Sekundaer_Einweisungen", [])
-                        )
-                    )
-                ]
-                if trainer_kandidaten:
-                    kandidaten = trainer_kandidaten
+    return st.session_state.df_mitarbeiter
 
-            kandidaten.sort(key=lambda m: len(m["Einweisungen"]))
-            gewaehlter = kandidaten[0]
-            name = gewaehlter["Name"]
+@st.cache_resource
+def speicher_warteschlange():
+    # Ein Hintergrund-Thread für alle Sitzungen, Speichervorgänge laufen nacheinander
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="mitarbeiter-speichern")
 
-            if einweisungs_typ == "sekundär" and fg_name in gewaehlter.get("Sekundaer_Einweisungen", []) and fg_name not in gewaehlter.get("Einweisungen", []):
-                name += " (anderer Bereich)"
+def _schreibe_mitarbeiter(speicher, cache, df, basis_df, basis_geaendert):
+    with messe("roster.speichern"):
+        ergebnis = speicher.speichern(df, basis_df, basis_geaendert)
 
-            planung[fg_name][pos_name] = name
-            verplante.append(gewaehlter["Name"])
-            aktive_mitarbeiter = [m for m in aktive_mitarbeiter if m["Name"] != gewaehlter["Name"]]
+    with cache["lock"]:
+        if ergebnis["status"] == "gespeichert":
+            # Geteilten Cache direkt aktualisieren, damit alle Sitzungen den neuen Stand sehen
+            _setze_stand(cache, df.reset_index(drop=True), ergebnis["stand"])
         else:
-            planung[fg_name][pos_name] = "⚠️❌ NIEMAND VERFÜGBAR ❌⚠️"
-
-    # 🔁 Tauschlogik: Unbesetzte Positionen verbessern (mit Limit)
-    max_versuche = 50
-    versuch = 0
-    verbessert = True
-
-    while verbessert and versuch < max_versuche:
-        verbessert = False
-        versuch += 1
-
-        for fg in offene_fgs:
-            fg_name = fg["Name"]
-            for p in fg["Positionen"]:
-                pos_name = p["Name"]
-                if planung.get(fg_name, {}).get(pos_name) != "⚠️❌ NIEMAND VERFÜGBAR ❌⚠️":
-                    continue
-
-                for fg_quelle in offene_fgs:
-                    quelle_name = fg_quelle["Name"]
-                    for pos_q in fg_quelle["Positionen"]:
-                        aktueller_mitarbeiter = planung.get(quelle_name, {}).get(pos_q["Name"], "")
-                        if aktueller_mitarbeiter.startswith("⚠️❌") or " (anderer Bereich)" in aktueller_mitarbeiter:
-                            continue
-                        name_q = aktueller_mitarbeiter.split(" (")[0]
-                        if name_q in manuelle_zuweisungen:  # ⛔ nicht tauschen
-                            continue
-
-                        mitarbeiter_daten = mitarbeiter_df[mitarbeiter_df["Name"] == name_q].to_dict(orient="records")
-                        if not mitarbeiter_daten:
-                            continue
-
-                        mitarbeiter_daten = mitarbeiter_daten[0]
-
-                        geeignet = (
-                            not p["Einweisung_erforderlich"]
-                            or fg_name in mitarbeiter_daten.get("Einweisungen", [])
-                            or fg_name in mitarbeiter_daten.get("Sekundaer_Einweisungen", [])
-                        )
-
-                        if geeignet:
-                            planung[fg_name][pos_name] = aktueller_mitarbeiter
-                            planung[quelle_name][pos_q["Name"]] = "⚠️❌ NIEMAND VERFÜGBAR ❌⚠️"
-                            verbessert = True
-                            break
-                    if verbessert:
-                        break
-                if verbessert:
-                    break
-
-        # ------------------  NACHKONTROLLE  ------------------
-    fehlende_trainer = []
-    for fg in trainerpflicht_fgs:
-        hat_trainer = False
-        for name in planung.get(fg, {}).values():
-            base_name = name.split(" (")[0]
-            row = mitarbeiter_df[mitarbeiter_df["Name"] == base_name]
-            if not row.empty and fg in (row.iloc[0].get("Trainer") or []):
-                hat_trainer = True
-                break
-        if not hat_trainer:
-            fehlende_trainer.append(fg)
-    return planung, list(verplante), fehlende_trainer
+            cache["geprueft"] = 0.0   # nächster Aufruf lädt den fremden Stand
+    return ergebnis
 
-# ----- UI -----
-st.title("LEGOLAND Personalplaner")
+def save_mitarbeiter_df(df, basis_df, basis_geaendert=None):
+    # Speichern im Hintergrund einreihen, Rückgabe ist ein Future mit dem Ergebnis-Dict
+    return speicher_warteschlange().submit(
+        _schreibe_mitarbeiter, get_mitarbeiter_speicher(), mitarbeiter_cache(), df.copy(), basis_df, basis_geaendert
+    )
 
-tab = st.tabs(["Personalplanung", "Mitarbeiter bearbeiten"])
+@st.cache_resource(max_entries=4, show_spinner=False)
+def editor_filterindex(version, katalog_namen, _mitarbeiter, _katalog):
+    # Einmal je Mitarbeiterstand und Katalog für alle Sitzungen: Filterindex und unbekannte Einweisungen
+    with messe("editor.index"):
+        index = baue_filterindex(_mitarbeiter)
+        return index, *unbekannte_einweisungen(index, _katalog)
 
-with tab[0]:
-    st.header("1️⃣ Personalplanung")
+def editor_uebernehmen(seite_df):
+    # on_change des Editors: Positionen der angezeigten Seite in Deltas je Zeile umrechnen
+    uebernehme_editor(st.session_state.editor, seite_df, st.session_state.editor_seite)
 
-    # Mitarbeiter laden
-    if "df_mitarbeiter" in st.session_state:
-        df_mitarbeiter = st.session_state.df_mitarbeiter
-    else:
-        df_mitarbeiter = load_mitarbeiter_df()
+@st.cache_data(max_entries=32, show_spinner=False)
+def excel_datei(schluessel, _planung, _mitarbeiter, _anwesend, _katalog):
+    # Nur der Schlüssel (Hash aus Planung, Anwesenheit, Mitarbeiterstand, Katalogversion) bestimmt den Cache-Eintrag
+    zaehle("export.cache_fehlgriff")
+    return exportiere_bereichsplan_excel(_planung, _mitarbeiter, _anwesend, _katalog["fahrgeschaefte"]).getvalue()
 
-    # Mitarbeiter nach Bereich gruppieren und alphabetisch sortieren
-    mitarbeiter_gruppiert = {}
-    for _, row in df_mitarbeiter.iterrows():
-        bereich = row["Bereich"]
-        name = row["Name"]
-        mitarbeiter_gruppiert.setdefault(bereich, []).append(name)
+messlog_einrichten()
 
-    for bereich in mitarbeiter_gruppiert:
-        mitarbeiter_gruppiert[bereich].sort()
+# ----- Fahrgeschäfte lokal laden (einmal pro Prozess, neu bei Dateiänderung) -----
+katalog = lade_katalog()
+fahrgeschaefte = katalog["fahrgeschaefte"]
 
-    # Auswahl anwesender Mitarbeiter
+# Bereiche vorbereiten (wird für die spätere Sortierung und Anzeige benötigt)
+bereiche = katalog["bereiche"]
+
+def _alle_anwesend(schluessel, namen):
+    st.session_state[schluessel] = list(namen)
+
+def anwesenheit_bereich(bereich, namen):
+    schluessel = f"anwesend_{bereich}"
+    auswahl = st.session_state.get(schluessel, [])
+    if any(name not in namen for name in auswahl):
+        # Nach Änderung der Mitarbeiterliste nicht mehr vorhandene Namen verwerfen
+        st.session_state[schluessel] = [name for name in auswahl if name in namen]
+
+    col_auswahl, col_alle = st.columns([5, 1], vertical_alignment="bottom")
+    with col_auswahl:
+        auswahl = st.multiselect(f"{bereich} ({len(namen)})", namen, key=schluessel, placeholder="Anwesende wählen …")
+    with col_alle:
+        st.button("Alle", key=f"alle_{bereich}", on_click=_alle_anwesend, args=(schluessel, namen))
+    st.caption(f"{len(auswahl)} von {len(namen)} anwesend")
+
+def anwesende(mitarbeiter_gruppiert):
+    # Anwesende aus den Auswahlfeldern aller Bereiche (Sitzungszustand)
+    return [
+        name
+        for bereich, namen in mitarbeiter_gruppiert.items()
+        for name in st.session_state.get(f"anwesend_{bereich}", [])
+        if name in namen
+    ]
+
+@st.fragment
+def planungseingaben(mitarbeiter, mitarbeiter_gruppiert):
+    # Anwesenheit, geschlossene Fahrgeschäfte, Vorab-Zuweisungen, Trainerpflicht und Machbarkeit in einem
+    # Fragment: ein Klick läuft nur hier neu (nicht Plananzeige, Export, Rotation und Editor), und die
+    # Machbarkeit sieht trotzdem jede Änderung. Der Rest der Seite liest die Eingaben aus dem Sitzungszustand.
+
+    # Auswahl anwesender Mitarbeiter: eine Mehrfachauswahl je Bereich statt einer Checkbox je Person
     st.subheader("Wer ist heute anwesend?")
-    anwesend = []
     for bereich, namen in mitarbeiter_gruppiert.items():
-        st.markdown(f"### {bereich}")
-        for name in namen:
-            if st.checkbox(name, key=f"{bereich}_{name}"):
-                anwesend.append(name)
-        st.write("---")
-
-    if anwesend:
-        st.session_state.anwesende_mitarbeiter = df_mitarbeiter[df_mitarbeiter["Name"].isin(anwesend)].to_dict(orient="records")
+        anwesenheit_bereich(bereich, namen)
+    anwesend = anwesende(mitarbeiter_gruppiert)
 
     # Fahrgeschäfte geschlossen
     st.subheader("Welche Fahrgeschäfte bleiben geschlossen?")
-    alle_fgs = [fg["Name"] for fg in fahrgeschaefte]
-    geschlossene = st.multiselect("Geschlossene Fahrgeschäfte wählen:", alle_fgs)
+    geschlossene = st.multiselect("Geschlossene Fahrgeschäfte wählen:", katalog["namen"], key="geschlossene")
+    geschlossen = set(geschlossene)
 
     # 📌 Manuelle Vorab-Zuweisung (schnelle Version)
     st.subheader("📌 Feste Positionen vorab zuweisen (übersichtlich)")
 
-    if "anwesende_mitarbeiter" in st.session_state and st.session_state.anwesende_mitarbeiter:
-        mitarbeiter_namen = sorted([m["Name"] for m in st.session_state.anwesende_mitarbeiter])
+    if anwesend:
+        mitarbeiter_namen = sorted(anwesend)
 
         name = st.selectbox("Mitarbeiter wählen:", ["-- auswählen --"] + mitarbeiter_namen, key="vorab_mitarbeiter")
 
         if name != "-- auswählen --":
-            # Mitarbeitenden-Datensatz laden
-            mitarbeiter = next(m for m in st.session_state.anwesende_mitarbeiter if m["Name"] == name)
-
             # Fahrgeschäfte, die offen sind (nicht geschlossen)
-            moegliche_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
-
-            fg_namen = [fg["Name"] for fg in moegliche_fgs]
+            fg_namen = [fg_name for fg_name in katalog["namen"] if fg_name not in geschlossen]
 
             fg_name = st.selectbox("Fahrgeschäft wählen:", ["-- auswählen --"] + fg_namen, key="vorab_fg")
 
             if fg_name != "-- auswählen --":
-                fg_data = next(fg for fg in fahrgeschaefte if fg["Name"] == fg_name)
-                pos_namen = [pos["Name"] for pos in fg_data["Positionen"]]
+                pos_namen = [pos_name for pos_name, _ in katalog["positionen"][fg_name]]
 
                 pos_name = st.selectbox("Position wählen:", pos_namen, key="vorab_pos")
 
@@ -520,7 +348,7 @@ with tab[0]:
     # 🧑‍🏫 Fahrgeschäfte mit Trainerpflicht auswählen
     st.subheader("🧑‍🏫 Welches Fahrgeschäft braucht einen Trainer?")
 
-    alle_fg_namen = [fg["Name"] for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    alle_fg_namen = [fg_name for fg_name in katalog["namen"] if fg_name not in geschlossen]
 
     trainerpflicht_fgs = st.multiselect(
         "Wähle Fahrgeschäfte, bei denen mindestens ein Trainer eingeplant werden soll:",
@@ -528,8 +356,177 @@ with tab[0]:
         key="trainerpflicht_fgs"
     )
 
+    # 🔎 Machbarkeit: Untergrenze der Lücken und Engpässe, läuft mit jeder Änderung im Fragment neu
+    if anwesend:
+        machbarkeit = analysiere_machbarkeit(
+            mitarbeiter,
+            fahrgeschaefte,
+            anwesend,
+            geschlossene,
+            st.session_state.get("manuelle_zuweisungen", {}),
+            trainerpflicht_fgs
+        )
+        luecken = machbarkeit["min_unbesetzt"]
+        with st.expander(
+            f"🔎 Machbarkeit: {'mindestens ' + str(luecken) + ' Positionen bleiben unbesetzt' if luecken else 'alle Positionen besetzbar'}",
+            expanded=bool(luecken or machbarkeit["ohne_trainer"])
+        ):
+            col_pos, col_personal, col_luecken = st.columns(3)
+            col_pos.metric("Positionen", machbarkeit["positionen"])
+            col_personal.metric("Verfügbares Personal", machbarkeit["personal"])
+            col_luecken.metric("Mindestens unbesetzt", luecken)
+
+            for engpass in machbarkeit["engpaesse"]:
+                fgs = engpass["fahrgeschaefte"]
+                st.markdown(
+                    f"- ⛔ **{engpass['fehlend']} fehlen**: {', '.join(fgs[:8])}{' …' if len(fgs) > 8 else ''} "
+                    f"({engpass['positionen']} Positionen mit Einweisung, {engpass['eingewiesene']} eingewiesene Anwesende)"
+                )
+            if machbarkeit["nachholen"]:
+                st.markdown("📞 **Nachholen** (jede Person schließt eine Lücke):")
+                for vorschlag in machbarkeit["nachholen"]:
+                    fgs = vorschlag["fahrgeschaefte"]
+                    st.markdown(f"- {vorschlag['name']}" + (f" ({', '.join(fgs[:5])})" if fgs else ""))
+            for fg in machbarkeit["ohne_trainer"]:
+                trainer = machbarkeit["trainer_nachholen"][fg]
+                st.markdown(
+                    f"- 🧑‍🏫 **{fg}**: kein Trainer verfügbar"
+                    + (f" – nachholen: {', '.join(trainer[:5])}" if trainer else "")
+                )
+
+def planzeilen(planung, fg_namen, uebrige):
+    # Plan eines Bereichs als Tabellenzeilen: je Position eine Zeile, danach die zusätzlichen Mitarbeitenden
+    zeilen = [
+        {"Fahrgeschäft": fg_name, "Position": pos, "Mitarbeiter": name, "Einweisungen": ""}
+        for fg_name in fg_namen if fg_name in planung
+        for pos, name in planung[fg_name].items()
+    ]
+    for m in sorted(uebrige, key=lambda x: x.name):
+        # Einweisungen sammeln (primär + sekundär)
+        einw = sorted(m.einweisungen) + sorted(m.sekundaer_einweisungen - m.einweisungen)
+        zeilen.append({"Fahrgeschäft": "👥 Zusätzlich", "Position": "", "Mitarbeiter": m.name, "Einweisungen": ", ".join(einw)})
+    return zeilen
+
+# ----- UI -----
+st.title("LEGOLAND Personalplaner")
+
+tab = st.tabs(["Personalplanung", "Mitarbeiter bearbeiten"])
+
+with tab[0]:
+    st.header("1️⃣ Personalplanung")
+
+    # Mitarbeiter laden
+    load_mitarbeiter_df()
+    mitarbeiter = st.session_state.mitarbeiter
+
+    # Mitarbeiter nach Bereich gruppieren und alphabetisch sortieren
+    mitarbeiter_gruppiert = {}
+    for m in mitarbeiter:
+        mitarbeiter_gruppiert.setdefault(m.bereich, []).append(m.name)
+
+    for bereich in mitarbeiter_gruppiert:
+        mitarbeiter_gruppiert[bereich].sort()
+
+    # Eingaben (Anwesenheit bis Machbarkeit) als Fragment, danach aus dem Sitzungszustand
+    planungseingaben(mitarbeiter, mitarbeiter_gruppiert)
+    anwesend = anwesende(mitarbeiter_gruppiert)
+    geschlossene = st.session_state.get("geschlossene", [])
+    trainerpflicht_fgs = st.session_state.get("trainerpflicht_fgs", [])
+
+    # 🧪 Robustheit: welche Ausfälle (einzeln oder zu zweit) kosten Positionen oder Trainer?
+    if anwesend:
+        with st.expander("🧪 Robustheit: Ausfälle simulieren"):
+            paare = st.checkbox("Auch Ausfälle von zwei Personen gleichzeitig", key="robustheit_paare")
+            eingaben = (
+                tuple(sorted(anwesend)),
+                tuple(sorted(geschlossene)),
+                json.dumps(st.session_state.get("manuelle_zuweisungen", {}), sort_keys=True),
+                tuple(trainerpflicht_fgs),
+                paare,
+                st.session_state.get("roster_version"),
+            )
+            if st.button("🧪 Simulieren", key="robustheit_btn"):
+                ergebnis = simuliere_ausfaelle(
+                    mitarbeiter,
+                    fahrgeschaefte,
+                    anwesend,
+                    geschlossene,
+                    st.session_state.get("manuelle_zuweisungen", {}),
+                    trainerpflicht_fgs,
+                    paare=paare
+                )
+                # In der Sitzung nur behalten, was angezeigt wird
+                st.session_state.robustheit = (eingaben, {
+                    "szenarien": ergebnis["szenarien"],
+                    "einzeln": [e for e in ergebnis["einzeln"] if e["verlust"] or e["trainer"] or e["umsetzungen"]][:30],
+                    "paare": ergebnis["paare"][:30],
+                })
+            robustheit = st.session_state.get("robustheit")
+            if robustheit and robustheit[0] == eingaben:
+                ergebnis = robustheit[1]
+                kritisch = ergebnis["einzeln"]
+                st.caption(f"{ergebnis['szenarien']} Ausfall-Szenarien bewertet (wie eine optimale Neuplanung).")
+                # Einsatz laut aktuellem Plan (nicht die interne Zuordnung der Simulation)
+                eingeteilt = {}
+                if "plan" in st.session_state:
+                    for fg_name, pos_dict in entpacke_planung(st.session_state.plan)[0].items():
+                        for name in pos_dict.values():
+                            eingeteilt[name.split(" (")[0]] = fg_name
+                st.dataframe(
+                    [
+                        {
+                            "Name": e["name"],
+                            **({"Im aktuellen Plan": eingeteilt.get(e["name"], "–")} if "plan" in st.session_state else {}),
+                            "Verlorene Positionen": e["verlust"],
+                            "Umsetzungen": e["umsetzungen"],
+                            "Trainer fehlt dann": ", ".join(e["trainer"]),
+                        }
+                        for e in kritisch
+                    ],
+                    hide_index=True,
+                )
+                if ergebnis["paare"]:
+                    st.markdown("👥 **Paare, die zusammen mehr kosten als einzeln:**")
+                    st.dataframe(
+                        [
+                            {"Namen": " + ".join(p["namen"]), "Verlorene Positionen": p["verlust"], "Davon zusätzlich": p["zusaetzlich"]}
+                            for p in ergebnis["paare"]
+                        ],
+                        hide_index=True,
+                    )
+
+    # ⚙️ Planungsmodus
+    planungsmodus = st.radio(
+        "Planungsmodus:",
+        ["Schnell (Greedy)", "Nach Bereichen (parallel)", "Beste von N (parallel)", "Optimal (maximale Besetzung)"],
+        horizontal=True,
+        key="planungsmodus"
+    )
+    if planungsmodus.startswith("Beste"):
+        col_versuche, col_budget = st.columns(2)
+        with col_versuche:
+            versuche = st.number_input("Anzahl Versuche:", min_value=1, max_value=1000, value=32, key="beste_versuche")
+        with col_budget:
+            budget_s = st.slider("Zeitbudget (Sekunden):", 1, 10, 3, key="beste_budget")
+
+    # 🎲 Fester Seed: gleiche Eingaben ergeben dieselbe Planung (auch in anderen Sitzungen)
+    seed = st.number_input(
+        "🎲 Seed:", min_value=0, max_value=999_999, value=0, key="planung_seed",
+        help="Anderer Seed = andere, gleichwertige Reihenfolge der Fahrgeschäfte. Ohne Wirkung bei „Optimal“."
+    )
+
+    # ⚖️ Fairness: bei gleich geeigneten Kandidaten zuerst, wer das Fahrgeschäft zuletzt seltener hatte
+    fair = st.checkbox("⚖️ Fair verteilen (abgeschlossene Planungen der letzten 30 Tage berücksichtigen)", key="fairness")
+
     #Planung erstellen
-    if st.button("📋 Planung erstellen"):
+    col_neu, col_aktualisieren = st.columns(2)
+    with col_neu:
+        neu_planen = st.button("📋 Planung erstellen")
+    with col_aktualisieren:
+        # 🔄 Nur Änderungen einarbeiten, der Rest der Planung bleibt stabil
+        aktualisieren = "plan" in st.session_state and st.button("🔄 Planung aktualisieren")
+
+    if neu_planen or aktualisieren:
         if not anwesend:
             st.warning("Bitte mindestens eine Person auswählen!")
         else:
@@ -542,18 +539,119 @@ with tab[0]:
                     manuelle_zuweisungen[name] = {"Fahrgeschäft": fg, "Position": pos}
 
             # Planung durchführen, inklusive manueller Zuweisungen
-            planung, verplante, fehlende_trainer  = plane_personal(
-                df_mitarbeiter,
-                fahrgeschaefte,
-                anwesend,
-                geschlossene,
-                st.session_state.get("manuelle_zuweisungen", {}),
-                st.session_state.get("trainerpflicht_fgs", [])
-            )
-            #Planung für Excel-Export speichern
-            st.session_state.planung = planung
-            st.session_state.verplante = verplante
-            st.session_state.fehlende_trainer = fehlende_trainer
+            planung_start = time.perf_counter()
+            historie = None
+            if fair:
+                heute = datetime.date.today()
+                historie = get_plan_historie().einsaetze(
+                    seit=(heute - datetime.timedelta(days=30)).isoformat(), bis=(heute - datetime.timedelta(days=1)).isoformat()
+                )
+            # Anwesende kanonisch (sortiert), damit die Reihenfolge der Auswahl das Ergebnis nicht ändert
+            anwesend_sortiert = sorted(set(anwesend))
+            aus_cache = False
+            if aktualisieren:
+                planung, verplante, fehlende_trainer = plane_personal_inkrementell(
+                    entpacke_planung(st.session_state.plan)[0],
+                    mitarbeiter,
+                    fahrgeschaefte,
+                    anwesend_sortiert,
+                    geschlossene,
+                    st.session_state.get("manuelle_zuweisungen", {}),
+                    st.session_state.get("trainerpflicht_fgs", []),
+                    historie=historie
+                )
+                plan, info = packe_planung(planung, fehlende_trainer, katalog, mitarbeiter, modus="Aktualisieren"), {}
+            else:
+                # 🗃️ Gleiche Eingaben und gleicher Seed: Ergebnis aus dem prozessweiten Cache
+                optionen = {"modus": planungsmodus, "historie": historie}
+                if planungsmodus.startswith("Beste"):
+                    optionen["versuche"] = int(versuche)
+                schluessel = planungsschluessel(
+                    st.session_state.get("roster_version"),
+                    katalog["version"],
+                    anwesend_sortiert,
+                    geschlossene,
+                    st.session_state.get("manuelle_zuweisungen", {}),
+                    st.session_state.get("trainerpflicht_fgs", []),
+                    None if planungsmodus.startswith("Optimal") else seed,
+                    **optionen
+                )
+                cache = planungs_cache()
+                treffer = cache.hole(schluessel)
+                aus_cache = treffer is not None
+                if aus_cache:
+                    plan, info = treffer
+                    planung, verplante, fehlende_trainer = entpacke_planung(plan)
+                else:
+                    info = {}
+                    if planungsmodus.startswith("Beste"):
+                        planung, verplante, fehlende_trainer, info = plane_personal_beste(
+                            mitarbeiter,
+                            fahrgeschaefte,
+                            anwesend_sortiert,
+                            geschlossene,
+                            st.session_state.get("manuelle_zuweisungen", {}),
+                            st.session_state.get("trainerpflicht_fgs", []),
+                            versuche=int(versuche),
+                            budget_s=budget_s,
+                            start_seed=seed,
+                            historie=historie,
+                        )
+                    elif planungsmodus.startswith("Nach Bereichen"):
+                        planung, verplante, fehlende_trainer, info = plane_personal_bereiche(
+                            mitarbeiter,
+                            fahrgeschaefte,
+                            anwesend_sortiert,
+                            geschlossene,
+                            st.session_state.get("manuelle_zuweisungen", {}),
+                            st.session_state.get("trainerpflicht_fgs", []),
+                            seed=seed,
+                            historie=historie
+                        )
+                    elif planungsmodus.startswith("Optimal"):
+                        planung, verplante, fehlende_trainer = plane_personal_optimal(
+                            mitarbeiter,
+                            fahrgeschaefte,
+                            anwesend_sortiert,
+                            geschlossene,
+                            st.session_state.get("manuelle_zuweisungen", {}),
+                            st.session_state.get("trainerpflicht_fgs", []),
+                            historie=historie
+                        )
+                    else:
+                        planung, verplante, fehlende_trainer = plane_personal(
+                            mitarbeiter,
+                            fahrgeschaefte,
+                            anwesend_sortiert,
+                            geschlossene,
+                            st.session_state.get("manuelle_zuweisungen", {}),
+                            st.session_state.get("trainerpflicht_fgs", []),
+                            seed=seed,
+                            historie=historie
+                        )
+                    plan = packe_planung(planung, fehlende_trainer, katalog, mitarbeiter, modus=planungsmodus)
+                    # "Beste von N" ist nur reproduzierbar, wenn alle Versuche ins Zeitbudget gepasst haben
+                    if not planungsmodus.startswith("Beste") or info["versuche"] == int(versuche):
+                        cache.lege_ab(schluessel, (plan, info), paket_bytes(plan))
+            erfasse("app.planung", time.perf_counter() - planung_start,
+                    modus=plan["modus"], anwesend=len(anwesend), cache=aus_cache)
+
+            if aus_cache:
+                st.caption("🗃️ Gleiche Eingaben wie eine frühere Planung: Ergebnis aus dem Cache übernommen.")
+            if "versuche" in info:
+                st.caption(
+                    f"🎲 Beste von {info['versuche']} Versuchen: Seed {info['seed']}, "
+                    f"{info['wertung'][0]} unbesetzte Positionen"
+                )
+            elif "geliehen" in info:
+                st.caption(
+                    f"🧩 Bereiche in {info['zeit_bereiche_s'] * 1000:.0f} ms geplant, "
+                    f"{info['geliehen']} Lücken aus anderen Bereichen gefüllt ({info['zeit_ausgleich_s'] * 1000:.0f} ms)"
+                )
+
+            # Planung kompakt speichern (IDs statt Namen), Namen erst bei Anzeige und Export.
+            # Bei einem Cache-Treffer teilen sich die Sitzungen dasselbe (unveränderliche) Paket.
+            st.session_state.plan = plan
 
             if fehlende_trainer:
                 st.warning("⚠️ Achtung: In folgenden Fahrgeschäften wurde kein Trainer eingeplant")
@@ -561,70 +659,210 @@ with tab[0]:
                     st.markdown(f"- **{fg}**")
 
     # Wiederherstellung nach Re-Run oder Anzeige
-    if "planung" in st.session_state:
-        planung = st.session_state.planung
-        verplante = st.session_state.verplante
-        fehlende_trainer = st.session_state.fehlende_trainer
-        df_mitarbeiter = st.session_state.df_mitarbeiter
-
+    if "plan" in st.session_state:
+        planung, verplante, fehlende_trainer = entpacke_planung(st.session_state.plan)
         # Berechne übrige Mitarbeiter: anwesend aber nicht verplant
-        uebrig = [m for m in df_mitarbeiter.to_dict(orient="records") if m["Name"] not in verplante and m["Name"] in anwesend]
+        verplant_set = set(verplante)
+        anwesend_set = set(anwesend)
+        uebrig = [m for m in mitarbeiter if m.name not in verplant_set and m.name in anwesend_set]
 
         st.subheader("📋 Schichtplan nach Bereichen:")
-        bereiche = {}
-        for fg in fahrgeschaefte:
-            bereich = fg.get("Bereich", "Unbekannt")
-            bereiche.setdefault(bereich, []).append(fg["Name"])
-
         for bereich in sorted(bereiche):
-            st.markdown(f"### 🏰 Bereich: {bereich}")
-            for fg_name in bereiche[bereich]:
-                if fg_name in planung:
-                    st.markdown(f"**🎢 {fg_name}**")
-                    for pos, name in planung[fg_name].items():
-                        st.write(f"- {pos}: {name}")
-
-            # Übrige Mitarbeiter im Bereich anzeigen
-            uebrige_im_bereich = [m for m in uebrig if m.get("Bereich") == bereich]
-            if uebrige_im_bereich:
-                st.markdown("👥 **Zusätzliche Mitarbeitende:**")
-                for m in sorted(uebrige_im_bereich, key=lambda x: x["Name"]):
-                    # Einweisungen sammeln (primär + sekundär)
-                    einw_primary = m.get("Einweisungen", [])
-                    if isinstance(einw_primary, str):
-                        einw_primary = [e.strip() for e in einw_primary.split(",") if e.strip()]
-                    einw_secondary = m.get("Sekundaer_Einweisungen", [])
-                    if isinstance(einw_secondary, str):
-                        einw_secondary = [e.strip() for e in einw_secondary.split(",") if e.strip()]
-                    einw = einw_primary + einw_secondary
-
-                    st.write(f"- {m['Name']} ({', '.join(einw)})")
-                st.markdown("---")
-
-    if "planung" in st.session_state:
-        excel_file = exportiere_bereichsplan_excel(st.session_state.planung, st.session_state.df_mitarbeiter, anwesend, fahrgeschaefte)
+            # Je Bereich ein einziges Tabellen-Element statt einer Zeile je Position
+            zeilen = planzeilen(planung, bereiche[bereich], [m for m in uebrig if m.bereich == bereich])
+            if zeilen:
+                st.markdown(f"### 🏰 Bereich: {bereich}")
+                st.dataframe(zeilen, hide_index=True)
+
+    if "plan" in st.session_state:
+        # Excel erst beim Klick erzeugen (läuft in eigenem Thread), Ergebnis über Hash der Eingaben cachen
+        plan = st.session_state.plan
+        schluessel = hashlib.sha256(json.dumps(
+            [planung, sorted(anwesend), st.session_state.get("roster_version"), plan["katalog"]["version"]],
+            sort_keys=True, ensure_ascii=False
+        ).encode()).hexdigest()
+
+        def excel_abrufen():
+            zaehle("export.abrufe")   # Cache-Treffer = Abrufe - Fehlgriffe
+            return excel_datei(schluessel, entpacke_planung(plan)[0], plan["mitarbeiter"], anwesend, plan["katalog"])
+
         st.download_button(
             label="📥 Personalplan als Excel herunterladen",
-            data=excel_file,
+            data=excel_abrufen,
             file_name="Personalplan.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
         )
 
+        # ✅ Abschließen: Planung des Tages in der Historie speichern (Grundlage für "Fair verteilen")
+        col_datum, col_abschluss = st.columns([2, 1], vertical_alignment="bottom")
+        with col_datum:
+            plan_datum = st.date_input("Datum der Planung:", value=datetime.date.today(), key="plan_datum")
+        with col_abschluss:
+            if st.button("✅ Planung abschließen", key="plan_abschliessen"):
+                # Modus, mit dem der Plan entstanden ist – nicht die aktuelle Auswahl
+                get_plan_historie().speichern(plan_datum.isoformat(), planung, modus=plan.get("modus"))
+                st.success(f"✅ Planung vom {plan_datum:%d.%m.%Y} gespeichert.")
+
+    # ⏱️ Rotation: Tag in Zeitfenster teilen, Pausen und Wechsel auf Pult/CCTV einplanen
+    if anwesend:
+        with st.expander("⏱️ Rotation in Zeitfenstern"):
+            col_beginn, col_ende, col_takt, col_folge, col_belastend = st.columns(5)
+            beginn = col_beginn.time_input("Beginn", value=datetime.time(9, 0), step=1800, key="rotation_beginn")
+            ende = col_ende.time_input("Ende", value=datetime.time(18, 0), step=1800, key="rotation_ende")
+            takt = col_takt.selectbox("Takt (Minuten)", [30, 60, 90, 120], index=1, key="rotation_takt")
+            max_folge = col_folge.number_input("Max. am Stück (0 = ohne Pause)", 0, 24, 4, key="rotation_max_folge")
+            max_belastend = col_belastend.number_input("Max. Pult/CCTV am Stück (0 = beliebig)", 0, 24, 2, key="rotation_max_belastend")
+            eingaben = (
+                tuple(sorted(anwesend)),
+                tuple(sorted(geschlossene)),
+                json.dumps(st.session_state.get("manuelle_zuweisungen", {}), sort_keys=True),
+                tuple(trainerpflicht_fgs),
+                beginn.strftime("%H:%M"), ende.strftime("%H:%M"), takt, max_folge, max_belastend,
+                st.session_state.get("roster_version"),
+            )
+            if st.button("⏱️ Rotationsplan erstellen", key="rotation_btn"):
+                st.session_state.rotation = (eingaben, packe_rotation(plane_rotation(
+                    mitarbeiter,
+                    fahrgeschaefte,
+                    anwesend,
+                    geschlossene,
+                    st.session_state.get("manuelle_zuweisungen", {}),
+                    trainerpflicht_fgs,
+                    zeitfenster(beginn.strftime("%H:%M"), ende.strftime("%H:%M"), takt),
+                    max_folge=max_folge or None,
+                    max_folge_belastend=max_belastend or None,
+                ), katalog, mitarbeiter))
+            rotation = st.session_state.get("rotation")
+            if rotation and rotation[0] == eingaben:
+                rotation_paket = rotation[1]
+                rotation = (rotation[0], entpacke_rotation(rotation_paket))
+                # Eine Tabelle: je Mitarbeiter eine Zeile, je Zeitfenster eine Spalte
+                zeilen = {}
+                for fenster in rotation[1]:
+                    spalte = f"{fenster['von']}–{fenster['bis']}"
+                    for fg_name, pos_dict in fenster["planung"].items():
+                        for pos, name in pos_dict.items():
+                            if name != NIEMAND_VERFUEGBAR:
+                                zeilen.setdefault(name.split(" (")[0], {})[spalte] = f"{fg_name} – {pos}"
+                    for name in fenster["pause"]:
+                        zeilen.setdefault(name, {})[spalte] = "☕ Pause"
+                unbesetzt = [
+                    sum(1 for pos in fenster["planung"].values() for name in pos.values() if name == NIEMAND_VERFUEGBAR)
+                    for fenster in rotation[1]
+                ]
+                st.caption(f"{len(rotation[1])} Zeitfenster, unbesetzte Positionen je Zeitfenster: {', '.join(map(str, unbesetzt))}")
+                st.dataframe(
+                    [{"Name": name, **einsaetze} for name, einsaetze in sorted(zeilen.items())],
+                    hide_index=True,
+                )
+                st.download_button(
+                    label="📥 Rotationsplan als Excel herunterladen",
+                    data=lambda: exportiere_rotationsplan_excel(
+                        entpacke_rotation(rotation_paket), rotation_paket["mitarbeiter"], anwesend, fahrgeschaefte
+                    ).getvalue(),
+                    file_name="Rotationsplan.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    on_click="ignore",
+                    key="rotation_download",
+                )
+
 with tab[1]:
     st.header("2️⃣ Mitarbeiter bearbeiten")
 
-    if "df_mitarbeiter" in st.session_state:
-        df_mitarbeiter = st.session_state.df_mitarbeiter
-    else:
-        df_mitarbeiter = load_mitarbeiter_df()
+    # Ergebnis eines laufenden Speichervorgangs anzeigen
+    auftrag = st.session_state.get("speicher_auftrag")
+    if auftrag is not None and auftrag.done():
+        del st.session_state.speicher_auftrag
+        st.session_state.pop("editor", None)   # Deltas sind gespeichert bzw. beziehen sich auf einen veralteten Stand
+        try:
+            ergebnis = auftrag.result()
+        except Exception as e:
+            st.error(f"❌ Speichern fehlgeschlagen: {e}")
+        else:
+            if ergebnis["status"] == "konflikt":
+                st.error("❌ Das Google Sheet wurde inzwischen geändert. Änderungen wurden nicht gespeichert, bitte erneut bearbeiten.")
+            else:
+                st.success(f"✅ Änderungen wurden gespeichert ({ergebnis['zellen']} Zellen, {ergebnis['neu']} neu, {ergebnis['geloescht']} gelöscht).")
+    elif auftrag is not None:
+        st.info("💾 Speichern läuft …")
+
+    df_mitarbeiter = load_mitarbeiter_df()
+
+    # Offene Änderungen beziehen sich auf den Stand beim ersten Bearbeiten, ohne Änderungen immer der aktuelle
+    editor = st.session_state.get("editor")
+    if editor is None or (editor["basis"] is not df_mitarbeiter and not hat_deltas(editor)):
+        editor = st.session_state.editor = neuer_editor(
+            df_mitarbeiter, st.session_state.mitarbeiter,
+            st.session_state.get("roster_geaendert"), st.session_state.get("roster_version")
+        )
+    filterindex, unbekannt, fehlerhaft = editor_filterindex(
+        editor["version"], tuple(katalog["namen"]), editor["mitarbeiter"], katalog
+    )
 
-    edited_df = st.data_editor(df_mitarbeiter, num_rows="dynamic")
+    # 🔎 Filter laufen auf dem Server, an den Editor geht nur eine Seite
+    col_bereich, col_einweisung, col_suche = st.columns(3)
+    filter_bereich = col_bereich.selectbox("Bereich", ["Alle"] + sorted(filterindex["bereich"]), key="editor_bereich")
+    filter_einweisung = col_einweisung.selectbox("Einweisung", ["Alle"] + katalog["namen"], key="editor_einweisung")
+    filter_suche = col_suche.text_input("Name enthält", key="editor_suche")
+    nur_unbekannt = False
+    if unbekannt:
+        st.warning(
+            f"⚠️ {len(unbekannt)} Einweisungen in der Liste sind keine Fahrgeschäfte im Katalog: "
+            + ", ".join(sorted(unbekannt)[:10]) + (" …" if len(unbekannt) > 10 else "")
+        )
+        nur_unbekannt = st.checkbox("Nur Mitarbeiter mit unbekannten Einweisungen", key="editor_unbekannt")
+
+    positionen = filtere(
+        filterindex,
+        bereich=None if filter_bereich == "Alle" else filter_bereich,
+        einweisung=None if filter_einweisung == "Alle" else filter_einweisung,
+        suche=filter_suche.strip(),
+        auswahl=fehlerhaft if nur_unbekannt else None,
+    )
+    labels = [label for label in editor["basis"].index[positionen] if label not in editor["geloescht"]]
+
+    col_groesse, col_seite, col_info = st.columns([1, 1, 2], vertical_alignment="bottom")
+    seitengroesse = col_groesse.selectbox("Zeilen je Seite", [25, 50, 100, 250], index=1, key="editor_seitengroesse")
+    seiten = max(1, -(-len(labels) // seitengroesse))
+    if st.session_state.get("editor_seitennummer", 1) > seiten:
+        st.session_state.editor_seitennummer = seiten   # Filter ergibt weniger Seiten als zuvor
+    seitennummer = col_seite.number_input(f"Seite (von {seiten})", min_value=1, max_value=seiten, key="editor_seitennummer")
+    col_info.caption(f"{len(labels)} von {filterindex['anzahl']} Mitarbeitern")
+
+    seite_df = seite(editor, labels[(seitennummer - 1) * seitengroesse:seitennummer * seitengroesse])
+    st.data_editor(
+        seite_df.reset_index(drop=True),   # Labels bleiben in seite_df für den Callback
+        num_rows="dynamic",
+        hide_index=True,
+        key="editor_seite",
+        on_change=editor_uebernehmen,
+        args=(seite_df,),
+        column_config={"Trainer": st.column_config.TextColumn("Trainer", help="Kommagetrennte Fahrgeschäfte")},
+    )
+
+    # ✅ Sofortige Prüfung der geänderten Zeilen gegen den Katalog
+    probleme = pruefe_deltas(editor, katalog, filterindex)
+    if hat_deltas(editor):
+        st.caption(
+            f"✏️ Offene Änderungen: {len(editor['geaendert'])} geändert, {len(editor['neu'])} neu, "
+            f"{len(editor['geloescht'])} gelöscht"
+        )
+        if st.button("↩️ Änderungen verwerfen", key="editor_verwerfen"):
+            del st.session_state.editor
+            st.rerun()
+    if probleme:
+        st.error("❌ Bitte vor dem Speichern korrigieren:")
+        st.dataframe(
+            [{"Mitarbeiter": p["name"], "Spalte": p["spalte"], "Problem": p["problem"]} for p in probleme],
+            hide_index=True,
+        )
 
     # Statusvariable zur Steuerung der Passwortabfrage
     if "passwort_abfrage_aktiv" not in st.session_state:
         st.session_state.passwort_abfrage_aktiv = False
 
-    if st.button("💾 Änderungen speichern"):
+    if st.button("💾 Änderungen speichern", disabled=bool(probleme) or not hat_deltas(editor)):
         st.session_state.passwort_abfrage_aktiv = True
 
     if st.session_state.passwort_abfrage_aktiv:
@@ -632,9 +870,10 @@ with tab[1]:
 
         if eingabe_passwort:
             if eingabe_passwort == "Supervisor2025":
-                save_mitarbeiter_df(edited_df)
-                st.session_state.df_mitarbeiter = edited_df
-                st.success("✅ Änderungen wurden gespeichert.")
+                st.session_state.speicher_auftrag = save_mitarbeiter_df(
+                    wende_deltas_an(editor), editor["basis"], editor["stand"]
+                )
+                st.info("💾 Änderungen werden im Hintergrund gespeichert …")
                 st.session_state.passwort_abfrage_aktiv = False  # Passwortabfrage deaktivieren
             else:
                 st.error("❌ Passwort ist nicht korrekt. Änderungen wurden nicht gespeichert.")
@@ -643,8 +882,8 @@ with tab[1]:
 
     # Button
     st.markdown(
-        """
-        <a href="https://docs.google.com/spreadsheets/d/119O3dcaEVqGx0fuWju-6mH9WPjyqZkPiunwO7GMKBiQ/edit" target="_blank">
+        f"""
+        <a href="{MITARBEITER_SHEET_URL}" target="_blank">
             <button style='font-size:16px;padding:10px 20px;border:none;border-radius:5px;background-color:#1f77b4;color:white;cursor:pointer;'>
                 Google Sheets öffnen
             </button>
@@ -653,3 +892,38 @@ with tab[1]:
         unsafe_allow_html=True
     )
 
+    # 📈 Laufzeiten je Stufe über alle Sitzungen dieses Prozesses (nur mit Admin-Passwort)
+    with st.expander("📈 Leistung (Admin)"):
+        if st.text_input("🔐 Admin-Passwort:", type="password", key="leistung_passwort") == "Supervisor2025":
+            messwerte = statistik()
+            st.dataframe(
+                [{"Stufe": stufe, **werte} for stufe, werte in messwerte["stufen"].items()],
+                hide_index=True,
+            )
+            st.dataframe(
+                [{"Zähler": name, "Anzahl": anzahl} for name, anzahl in messwerte["zaehler"].items()],
+                hide_index=True,
+            )
+
+            # 🗃️ Planungscache (prozessweit)
+            messwerte["planungscache"] = cache_werte = planungs_cache().statistik()
+            col_quote, col_eintraege, col_belegt = st.columns(3)
+            col_quote.metric(
+                "Trefferquote Planungscache",
+                "–" if cache_werte["trefferquote"] is None else f"{cache_werte['trefferquote']:.0%}",
+                help=f"{cache_werte['treffer']} Treffer, {cache_werte['fehlgriffe']} Fehlgriffe",
+            )
+            col_eintraege.metric("Einträge", cache_werte["eintraege"], help=f"{cache_werte['verdraengt']} verdrängt")
+            col_belegt.metric("Belegt", f"{cache_werte['bytes'] / 2**20:.1f} / {cache_werte['max_bytes'] / 2**20:.0f} MiB")
+            st.download_button(
+                "📥 Messwerte als JSON",
+                data=json.dumps(messwerte, indent=2, ensure_ascii=False),
+                file_name="messwerte.json",
+                mime="application/json",
+                on_click="ignore",
+            )
+            if st.button("🧹 Messwerte zurücksetzen", key="leistung_zuruecksetzen"):
+                zuruecksetzen()
+                st.rerun()
+
+erfasse("app.lauf", time.perf_counter() - lauf_start)
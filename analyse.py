@@ -0,0 +1,351 @@
+"""Machbarkeits- und Engpassanalyse vor der Planung (ohne Streamlit nutzbar).
+
+Die Fahrgeschäfte werden als Knoten mit Bedarf (Anzahl Positionen mit Einweisungspflicht)
+behandelt, die Mitarbeiter als Knoten mit Kapazität 1. Eine maximale Zuordnung darüber
+liefert die Anzahl Positionen, die keine Planung besetzen kann; die Fahrgeschäfte, die von
+den Lücken aus über Tauschketten erreichbar sind, bilden die Engpässe (Hall-Verletzung:
+mehr Positionen als eingewiesenes Personal).
+"""
+from collections import deque
+
+import numpy as np
+
+from messung import gemessen
+from mitarbeiter import als_mitarbeiter
+from planer import baue_qualifikationsindex
+
+
+def _max_zuordnung(bedarf, geeignet, frei, anzahl_einweisungen):
+    """Maximale Zuordnung Mitarbeiter -> Fahrgeschäft mit Bedarf je Fahrgeschäft.
+
+    Rückgabe: (zugeordnet, besetzt) – je Mitarbeiter die Spalte (-1 = frei), je Spalte die Anzahl.
+    """
+    zugeordnet = np.full(geeignet.shape[0], -1, dtype=int)
+    besetzt = np.zeros(len(bedarf), dtype=int)
+    verfuegbar = frei.copy()
+
+    # Greedy-Start: knappste Fahrgeschäfte zuerst, Mitarbeiter mit wenigen Einweisungen zuerst
+    for j in np.argsort((geeignet & frei[:, None]).sum(axis=0), kind="stable"):
+        kandidaten = np.flatnonzero(verfuegbar & geeignet[:, j])
+        gewaehlt = kandidaten[np.argsort(anzahl_einweisungen[kandidaten], kind="stable")[:bedarf[j]]]
+        zugeordnet[gewaehlt] = j
+        verfuegbar[gewaehlt] = False
+        besetzt[j] = len(gewaehlt)
+
+    _augmentiere(bedarf, geeignet, zugeordnet, besetzt, verfuegbar)
+    return zugeordnet, besetzt
+
+
+def _augmentiere(bedarf, geeignet, zugeordnet, besetzt, verfuegbar):
+    # Augmentierende Pfade (wie planer._repariere_luecken, aber auf Ebene der Fahrgeschäfte), ändert die Arrays direkt
+    sackgasse = set()
+    for start in range(len(bedarf)):
+        while besetzt[start] < bedarf[start] and start not in sackgasse:
+            vorgaenger = {start: None}
+            warteschlange = deque([start])
+            ende = None
+            while warteschlange:
+                k = warteschlange.popleft()
+                freie_kandidaten = np.flatnonzero(verfuegbar & geeignet[:, k])
+                if freie_kandidaten.size:
+                    ende = (k, freie_kandidaten[0])
+                    break
+                for i in np.flatnonzero((zugeordnet >= 0) & geeignet[:, k]):
+                    q = zugeordnet[i]
+                    if q not in vorgaenger and q not in sackgasse:
+                        vorgaenger[q] = (k, i)
+                        warteschlange.append(q)
+            if ende is None:
+                sackgasse.update(vorgaenger)
+                break
+            sackgasse.clear()
+            k, i = ende
+            verfuegbar[i] = False
+            besetzt[start] += 1
+            zugeordnet[i] = k
+            while vorgaenger[k] is not None:
+                ziel, i = vorgaenger[k]
+                zugeordnet[i] = ziel
+                k = ziel
+
+
+def _erreichbar(starts, geeignet, zugeordnet):
+    # Fahrgeschäfte, die von den Lücken aus über Tauschketten erreichbar sind, je Zusammenhangskomponente
+    besucht = set()
+    gruppen = []
+    for start in starts:
+        if start in besucht:
+            continue
+        gruppe = {start}
+        warteschlange = deque([start])
+        while warteschlange:
+            k = warteschlange.popleft()
+            for i in np.flatnonzero((zugeordnet >= 0) & geeignet[:, k]):
+                q = zugeordnet[i]
+                if q not in gruppe and q not in besucht:
+                    gruppe.add(q)
+                    warteschlange.append(q)
+        besucht |= gruppe
+        gruppen.append(sorted(gruppe))
+    return gruppen
+
+
+def _modell(index, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen):
+    # Bedarf je offenem Fahrgeschäft (Positionen mit Einweisungspflicht), Positionen ohne Pflicht, Personalmasken
+    anwesend = set(anwesend)
+
+    # Vorab-Zuweisungen belegen Mitarbeiter und Positionen bereits
+    vorab = {(z["Fahrgeschäft"], z["Position"]) for z in manuelle_zuweisungen.values()}
+    frei = np.array([n in anwesend and n not in manuelle_zuweisungen for n in index["namen"]], dtype=bool)
+    abwesend = np.array([n not in anwesend and n not in manuelle_zuweisungen for n in index["namen"]], dtype=bool)
+
+    offene = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    spalten = np.array([index["fg_index"][fg["Name"]] for fg in offene], dtype=int)
+    bedarf = np.array([
+        sum(1 for p in fg["Positionen"] if p["Einweisung_erforderlich"] and (fg["Name"], p["Name"]) not in vorab)
+        for fg in offene
+    ], dtype=int)
+    optional = sum(
+        1 for fg in offene for p in fg["Positionen"] if not p["Einweisung_erforderlich"] and (fg["Name"], p["Name"]) not in vorab
+    )
+    geeignet = index["eingewiesen"][:, spalten]
+    return offene, bedarf, optional, geeignet, frei, abwesend
+
+
+def _trainermodell(index, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs):
+    # Trainerpflicht-Fahrgeschäfte, Trainer-Matrix und ob ein vorab eingeplanter Trainer sie schon abdeckt
+    trainer_fgs = [fg for fg in dict.fromkeys(trainerpflicht_fgs) if fg not in geschlossene and fg in index["fg_index"]]
+    trainer = index["trainer"][:, [index["fg_index"][fg] for fg in trainer_fgs]]
+    gedeckt = np.array([
+        any(
+            z["Fahrgeschäft"] == fg and name in index["name_index"] and index["trainer"][index["name_index"][name], index["fg_index"][fg]]
+            for name, z in manuelle_zuweisungen.items()
+        )
+        for fg in trainer_fgs
+    ], dtype=bool)
+    return trainer_fgs, trainer, gedeckt
+
+
+@gemessen("analyse.machbarkeit")
+def analysiere_machbarkeit(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                           index=None, max_vorschlaege=10):
+    """Untergrenze der unbesetzten Positionen, Engpässe und Vorschläge, wen man nachholen sollte.
+
+    Gleiche Eingaben wie plane_personal; index: vorhandener Qualifikationsindex (spart den Aufbau).
+    Rückgabe: {"positionen", "personal", "max_besetzbar", "min_unbesetzt",
+               "engpaesse": [{"fahrgeschaefte", "positionen", "eingewiesene", "fehlend"}],
+               "nachholen": [{"name", "fahrgeschaefte"}],    # jede Person schließt eine Lücke, in dieser Reihenfolge
+               "ohne_trainer": [fg], "trainer_nachholen": {fg: [namen]}}
+    """
+    if index is None:
+        index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte)
+    geschlossene = set(geschlossene)
+    offene, bedarf, optional, geeignet, frei, abwesend = _modell(index, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen)
+
+    zugeordnet, besetzt = _max_zuordnung(bedarf, geeignet, frei, index["anzahl_einweisungen"])
+
+    # Positionen ohne Einweisungspflicht nimmt jeder, der nach den Pflichtpositionen übrig ist
+    personal = int(frei.sum())
+    zuordenbar = int(besetzt.sum())
+    max_besetzbar = min(zuordenbar + optional, personal)
+    min_unbesetzt = int(bedarf.sum()) + optional - max_besetzbar
+
+    luecken = [j for j in range(len(offene)) if besetzt[j] < bedarf[j]]
+    engpaesse = []
+    for gruppe in _erreichbar(luecken, geeignet, zugeordnet):
+        eingewiesene = np.flatnonzero(frei & geeignet[:, gruppe].any(axis=1))
+        engpaesse.append({
+            "fahrgeschaefte": [offene[j]["Name"] for j in gruppe],
+            "positionen": int(bedarf[gruppe].sum()),
+            "eingewiesene": len(eingewiesene),
+            "fehlend": int((bedarf[gruppe] - besetzt[gruppe]).sum()),
+        })
+    engpaesse.sort(key=lambda e: -e["fehlend"])
+
+    # 📞 Nachholen: jeweils die abwesende Person, die die meisten Engpass-Fahrgeschäfte abdeckt
+    nachholen = []
+    zusaetzlich = np.zeros_like(frei)
+    verfuegbar = frei & (zugeordnet < 0)
+    for _ in range(min(min_unbesetzt, max_vorschlaege)):
+        luecken = [j for j in range(len(offene)) if besetzt[j] < bedarf[j]]
+        erreichbar = sorted({j for gruppe in _erreichbar(luecken, geeignet, zugeordnet) for j in gruppe})
+        kandidaten = abwesend & ~zusaetzlich
+        abdeckung = geeignet[:, erreichbar].sum(axis=1) * kandidaten
+        if abdeckung.any():
+            i = int(np.argmax(abdeckung))
+        elif kandidaten.any() and personal + zusaetzlich.sum() < zuordenbar + optional:
+            # Nur Positionen ohne Einweisungspflicht zu füllen: jede Person hilft, die vielseitigste zuerst
+            i = int(np.argmax(np.where(kandidaten, index["anzahl_einweisungen"], -1)))
+        else:
+            break
+        zusaetzlich[i] = True
+        if erreichbar:
+            # Nur die neue Person einarbeiten statt die Zuordnung neu zu berechnen
+            verfuegbar[i] = True
+            _augmentiere(bedarf, geeignet, zugeordnet, besetzt, verfuegbar)
+            zuordenbar = int(besetzt.sum())
+        nachholen.append({
+            "name": index["namen"][i],
+            "fahrgeschaefte": [offene[j]["Name"] for j in erreichbar if geeignet[i, j]],
+        })
+
+    # 🧑‍🏫 Trainerpflicht: jedes Fahrgeschäft braucht einen eigenen anwesenden Trainer
+    trainer_fgs, trainer, gedeckt = _trainermodell(index, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs)
+    _, trainer_besetzt = _max_zuordnung((~gedeckt).astype(int), trainer, frei, index["anzahl_einweisungen"])
+    ohne_trainer = [fg for k, fg in enumerate(trainer_fgs) if not gedeckt[k] and trainer_besetzt[k] == 0]
+    trainer_nachholen = {
+        fg: [index["namen"][i] for i in np.flatnonzero(abwesend & index["trainer"][:, index["fg_index"][fg]])]
+        for fg in ohne_trainer
+    }
+
+    return {
+        "positionen": int(bedarf.sum()) + optional,
+        "personal": personal,
+        "max_besetzbar": max_besetzbar,
+        "min_unbesetzt": min_unbesetzt,
+        "engpaesse": engpaesse,
+        "nachholen": nachholen,
+        "ohne_trainer": ohne_trainer,
+        "trainer_nachholen": trainer_nachholen,
+    }
+
+
+# Robustheit: welche Ausfälle kosten Positionen?
+def _vorab_spalten(index, offene, manuelle_zuweisungen, zugeordnet, besetzt, bedarf):
+    # Vorab Eingeteilte mit ihrer Position in die Zuordnung aufnehmen (Bedarf +1, schon besetzt), ändert die Arrays direkt
+    fest = np.zeros(len(zugeordnet), dtype=bool)
+    vorab_fg = [None] * len(zugeordnet)
+    offen = {fg["Name"]: j for j, fg in enumerate(offene)}
+    # Wie im Planer: bei doppelt vergebener Position gilt die letzte Zuweisung
+    inhaber = {(z["Fahrgeschäft"], z["Position"]): name for name, z in manuelle_zuweisungen.items()}
+    for name, z in manuelle_zuweisungen.items():
+        i = index["name_index"].get(name)
+        if i is None:
+            continue
+        fest[i] = True
+        vorab_fg[i] = z["Fahrgeschäft"]
+        if z["Fahrgeschäft"] not in offen or inhaber[(z["Fahrgeschäft"], z["Position"])] != name:
+            continue
+        j = offen[z["Fahrgeschäft"]]
+        pflicht = [p["Einweisung_erforderlich"] for p in offene[j]["Positionen"] if p["Name"] == z["Position"]]
+        if not pflicht:
+            continue
+        # Positionen ohne Einweisungspflicht stehen in der letzten Spalte
+        spalte = j if pflicht[0] else len(bedarf) - 1
+        zugeordnet[i] = spalte
+        besetzt[spalte] += 1
+        bedarf[spalte] += 1
+    return fest, vorab_fg
+
+
+def _ersetzbarkeit(geeignet, zugeordnet, verfuegbar):
+    """Je Mitarbeiter die Anzahl Umsetzungen, um seinen Platz nach einem Ausfall neu zu besetzen (-1 = nicht möglich).
+
+    Breitensuche von allen freien Mitarbeitern aus, ebenenweise vektorisiert: wer für ein
+    Fahrgeschäft eingewiesen ist, kann jeden dort Eingeteilten ersetzen, der dann wiederum frei wird.
+    """
+    abstand = np.full(len(zugeordnet), -1, dtype=int)
+    abstand[verfuegbar] = 0
+    if not geeignet.shape[1]:
+        return abstand
+    zugewiesen = zugeordnet >= 0
+    gesehen = np.zeros(geeignet.shape[1], dtype=bool)
+    front = verfuegbar
+    ebene = 0
+    while front.any():
+        ebene += 1
+        neue_fgs = geeignet[front].any(axis=0) & ~gesehen
+        gesehen |= neue_fgs
+        front = zugewiesen & (abstand < 0) & neue_fgs[np.maximum(zugeordnet, 0)]
+        abstand[front] = ebene
+    return abstand
+
+
+@gemessen("analyse.robustheit")
+def simuliere_ausfaelle(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                        paare=False, index=None, max_paare=50):
+    """Was-wäre-wenn für jeden Ausfall eines Anwesenden (optional jedes Paars), bewertet wie eine optimale Neuplanung.
+
+    Statt je Szenario neu zu planen, wird einmal maximal zugeordnet: ein Ausfall kostet genau dann
+    eine Position, wenn der Mitarbeiter von keinem freien Mitarbeiter über eine Tauschkette
+    ersetzt werden kann (eine Breitensuche für alle Einzelausfälle, eine je Person für die Paare).
+    Vorab Eingeteilte fallen mit aus, werden aber nie umgesetzt; ihre Position muss nachbesetzt werden.
+    Trainerpflicht wird getrennt davon mit einem Trainer je Fahrgeschäft bewertet.
+    Rückgabe: {"szenarien",
+               "einzeln": [{"name", "fahrgeschaeft", "vorab", "verlust", "umsetzungen", "trainer"}],   # kritischste zuerst
+               "paare": [{"namen", "verlust", "zusaetzlich"}]}   # nur Paare, die zusammen mehr kosten als einzeln
+    """
+    if index is None:
+        index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte)
+    geschlossene = set(geschlossene)
+    offene, bedarf, optional, geeignet, frei, _ = _modell(index, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen)
+    anzahl_einweisungen = index["anzahl_einweisungen"]
+
+    # Positionen ohne Einweisungspflicht als zusätzliche Spalte, für die jeder geeignet ist
+    bedarf = np.append(bedarf, optional)
+    geeignet = np.hstack([geeignet, np.ones((len(frei), 1), dtype=bool)])
+    spaltennamen = [fg["Name"] for fg in offene] + ["(ohne Einweisung)"]
+
+    zugeordnet, besetzt = _max_zuordnung(bedarf, geeignet, frei, anzahl_einweisungen)
+
+    # 📌 Vorab Eingeteilte sitzen fest auf ihrer Position: nicht umsetzbar, ihr Ausfall reißt dort eine Lücke
+    fest, vorab_fg = _vorab_spalten(index, offene, manuelle_zuweisungen, zugeordnet, besetzt, bedarf)
+    geeignet[fest] = False
+    verfuegbar = frei & (zugeordnet < 0)
+    abstand = _ersetzbarkeit(geeignet, zugeordnet, verfuegbar)
+    verlust = ((zugeordnet >= 0) & (abstand < 0)).astype(int)
+
+    # Trainer: vorab Eingeteilte können nur auf ihrem eigenen Fahrgeschäft Trainer sein
+    trainer_fgs, trainer, _ = _trainermodell(index, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs)
+    trainer = trainer & ~fest[:, None]
+    for i in np.flatnonzero(fest):
+        if vorab_fg[i] in trainer_fgs:
+            k = trainer_fgs.index(vorab_fg[i])
+            trainer[i, k] = index["trainer"][i, index["fg_index"][vorab_fg[i]]]
+    personal = frei | fest
+    trainer_zugeordnet, _ = _max_zuordnung(np.ones(len(trainer_fgs), dtype=int), trainer, personal, anzahl_einweisungen)
+    trainer_abstand = _ersetzbarkeit(trainer, trainer_zugeordnet, personal & (trainer_zugeordnet < 0))
+
+    anwesende = np.flatnonzero(personal)
+    einzeln = [
+        {
+            "name": index["namen"][i],
+            "fahrgeschaeft": vorab_fg[i] or (spaltennamen[zugeordnet[i]] if zugeordnet[i] >= 0 else None),
+            "vorab": bool(fest[i]),
+            "verlust": int(verlust[i]),
+            "umsetzungen": int(max(abstand[i], 0)),
+            "trainer": [trainer_fgs[trainer_zugeordnet[i]]] if trainer_zugeordnet[i] >= 0 and trainer_abstand[i] < 0 else [],
+        }
+        for i in anwesende
+    ]
+    einzeln.sort(key=lambda e: (-e["verlust"], -len(e["trainer"]), -e["umsetzungen"], e["name"]))
+
+    paar_liste = []
+    if paare:
+        for a in anwesende:
+            # Ausfall von a einarbeiten, danach Ersetzbarkeit aller anderen neu bestimmen
+            zug = zugeordnet.copy()
+            bes = besetzt.copy()
+            verf = verfuegbar.copy()
+            verf[a] = False
+            if zug[a] >= 0:
+                bes[zug[a]] -= 1
+                zug[a] = -1
+                _augmentiere(bedarf, geeignet, zug, bes, verf)
+            # Alle Partner b > a auf einmal: Verlust zusammen gegen die Summe der Einzelverluste
+            zusammen = verlust[a] + ((zug >= 0) & (_ersetzbarkeit(geeignet, zug, verf) < 0)).astype(int)
+            zusaetzlich = zusammen - verlust[a] - verlust
+            for b in anwesende[(anwesende > a) & (zusaetzlich[anwesende] > 0)]:
+                paar_liste.append({
+                    "namen": (index["namen"][a], index["namen"][b]),
+                    "verlust": int(zusammen[b]),
+                    "zusaetzlich": int(zusaetzlich[b]),
+                })
+        paar_liste.sort(key=lambda p: (-p["verlust"], -p["zusaetzlich"], p["namen"]))
+
+    anzahl = len(anwesende)
+    return {
+        "szenarien": anzahl + (anzahl * (anzahl - 1) // 2 if paare else 0),
+        "einzeln": einzeln,
+        "paare": paar_liste[:max_paare],
+    }
@@ -0,0 +1,260 @@
+"""Synthetischer Park-Benchmark für Planung, Tauschlogik und Excel-Export.
+
+Läuft ohne Streamlit-Sitzung und ohne Google-Zugangsdaten, z.B.:
+
+    python benchmark.py --faktoren 1 10 100 --dichte 0.5 --json bench.json
+
+Je Parkgröße werden Laufzeiten (Median) und Besetzungsquote ausgegeben, damit
+Performance-Änderungen keine Qualitätsverluste verstecken.
+"""
+import argparse
+import copy
+import json
+import random
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+import planer
+import rotation
+from export import exportiere_bereichsplan_excel
+from katalog import kompiliere_katalog, lade_katalog
+from kompakt import packe_planung
+from mitarbeiter import parse_mitarbeiter
+from mitarbeiter_speicher import SqliteSpeicher
+
+
+def erzeuge_fahrgeschaefte(vorlage, faktor):
+    # Katalog faktor-fach kopieren, jede Kopie bildet eigene Bereiche
+    fahrgeschaefte = []
+    for k in range(faktor):
+        suffix = f"_{k}" if k else ""
+        for fg in vorlage:
+            fahrgeschaefte.append({
+                **fg,
+                "Name": fg["Name"] + suffix,
+                "Bereich": fg.get("Bereich", "Unbekannt") + suffix,
+                "Positionen": [dict(p) for p in fg["Positionen"]],
+            })
+    return fahrgeschaefte
+
+
+def erzeuge_mitarbeiter(fahrgeschaefte, personal_pro_position=1.2, dichte=0.5, sek_dichte=0.05, trainer_anteil=0.2, seed=0):
+    """Synthetische Mitarbeiterliste im Format von load_mitarbeiter_df.
+
+    dichte: Anteil der Fahrgeschäfte im eigenen Bereich mit primärer Einweisung,
+    sek_dichte: Anteil der Fahrgeschäfte anderer Bereiche mit sekundärer Einweisung.
+    """
+    rng = random.Random(seed)
+    fgs_je_bereich = {}
+    for fg in fahrgeschaefte:
+        fgs_je_bereich.setdefault(fg.get("Bereich", "Unbekannt"), []).append(fg["Name"])
+    bereichsnamen = sorted(fgs_je_bereich)
+    alle_fgs = [fg["Name"] for fg in fahrgeschaefte]
+
+    anzahl = round(sum(len(fg["Positionen"]) for fg in fahrgeschaefte) * personal_pro_position)
+    zeilen = []
+    for n in range(anzahl):
+        bereich = rng.choice(bereichsnamen)
+        eigene = [fg for fg in fgs_je_bereich[bereich] if rng.random() < dichte]
+        sekundaer = [fg for fg in rng.sample(alle_fgs, round(sek_dichte * len(alle_fgs))) if fg not in fgs_je_bereich[bereich]]
+        zeilen.append({
+            "Name": f"Mitarbeiter{n} Test",
+            "Bereich": bereich,
+            "Einweisungen": ", ".join(eigene),
+            "Sekundaer_Einweisungen": ", ".join(sekundaer),
+            "Trainer": [fg for fg in eigene if rng.random() < trainer_anteil],
+        })
+    return pd.DataFrame(zeilen)
+
+
+def besetzungsquote(planung, fahrgeschaefte, geschlossene=()):
+    gesamt = sum(len(fg["Positionen"]) for fg in fahrgeschaefte if fg["Name"] not in geschlossene)
+    leer = sum(1 for pos in planung.values() for name in pos.values() if name == planer.NIEMAND_VERFUEGBAR)
+    besetzt = sum(len(pos) for pos in planung.values()) - leer
+    return besetzt / gesamt if gesamt else 1.0
+
+
+def _leere_positionen(planung):
+    return sum(1 for pos in planung.values() for name in pos.values() if name == planer.NIEMAND_VERFUEGBAR)
+
+
+def rotationsluecken(ergebnis, df, fahrgeschaefte, anwesend, trainerpflicht, max_folge):
+    """Je Zeitfenster: unbesetzte Positionen über dem, was wirklich fehlt.
+
+    Bei gleichmäßig verteilten Pausen ruht je Zeitfenster höchstens etwa jeder max_folge-te Anwesende.
+    Wirklich fehlt, was dasselbe Zeitfenster für sich geplant ohne diese Pausierenden nicht
+    besetzen kann; wer darüber hinaus in Pause ist, zählt als verfügbar. Mehr Lücken heißen:
+    die Pausen ballen sich.
+    """
+    anteil = -(-len(anwesend) // max_folge)
+    luecken = []
+    for fenster in ergebnis:
+        pause = set(fenster["pause"][:anteil])
+        referenz, = rotation.plane_rotation(df, fahrgeschaefte, [n for n in anwesend if n not in pause], [], {}, trainerpflicht,
+                                            [(fenster["von"], fenster["bis"])])
+        luecken.append(max(0, _leere_positionen(fenster["planung"]) - _leere_positionen(referenz["planung"])))
+    return luecken
+
+
+def _stoppe(funktion):
+    start = time.perf_counter()
+    ergebnis = funktion()
+    return time.perf_counter() - start, ergebnis
+
+
+def sitzungsspeicher(planung, verplante, fehlende_trainer, katalog, mitarbeiter, sitzungen=20):
+    """Bytes je zusätzlicher Sitzung für eine gespeicherte Planung: als Dict mit Namen und als kompaktes Paket."""
+    ergebnis = {}
+    for form, ablegen in (
+        ("namen", lambda: copy.deepcopy((planung, verplante, fehlende_trainer))),
+        ("ids", lambda: packe_planung(planung, fehlende_trainer, katalog, mitarbeiter)),
+    ):
+        tracemalloc.start()
+        vorher = tracemalloc.get_traced_memory()[0]
+        abgelegt = [ablegen() for _ in range(sitzungen)]
+        ergebnis[form] = (tracemalloc.get_traced_memory()[0] - vorher) // len(abgelegt)
+        tracemalloc.stop()
+    return ergebnis
+
+
+def miss_park(vorlage, faktor, args):
+    fahrgeschaefte = erzeuge_fahrgeschaefte(vorlage, faktor)
+    df = erzeuge_mitarbeiter(fahrgeschaefte, args.personal_pro_position, args.dichte, args.sek_dichte, args.trainer_anteil, seed=args.seed)
+    rng = random.Random(args.seed)
+    anwesend = [n for n in df["Name"] if rng.random() < args.anwesenheit]
+    trainerpflicht = [fg["Name"] for fg in fahrgeschaefte if rng.random() < args.trainerpflicht]
+
+    zeiten = {}
+    rotation_luecken = None
+    def messen(phase, funktion):
+        dauer, ergebnis = _stoppe(funktion)
+        zeiten.setdefault(phase, []).append(dauer)
+        return ergebnis
+
+    # Kaltstart der Mitarbeiterliste aus dem lokalen Snapshot (ohne Netzwerk)
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        snapshot = SqliteSpeicher(os.path.join(verzeichnis, "mitarbeiter.sqlite"))
+        snapshot.ersetzen(df)
+        for _ in range(args.wiederholungen):
+            messen("roster_laden", snapshot.laden)
+
+    for w in range(args.wiederholungen):
+        random.seed(args.seed + w)
+        offene_fgs = list(fahrgeschaefte)
+        random.shuffle(offene_fgs)
+
+        # Phasen einzeln: Index, Greedy-Besetzung, Tauschlogik, Nachkontrolle
+        index = messen("index", lambda: planer.baue_qualifikationsindex(parse_mitarbeiter(df), fahrgeschaefte))
+        planung, verplante, frei = planer._vorab_einplanen(index, anwesend, {})
+        messen("greedy", lambda: planer._besetze_positionen(planung, verplante, frei, index, offene_fgs, set(trainerpflicht)))
+        quote_greedy = besetzungsquote(planung, fahrgeschaefte)
+        messen("reparatur", lambda: planer._repariere_luecken(planung, verplante, frei, index, offene_fgs, {}))
+        messen("nachkontrolle", lambda: planer._pruefe_trainer(planung, index, trainerpflicht))
+
+        # Gesamter Lauf wie in der App
+        random.seed(args.seed + w)
+        planung, verplante, fehlende_trainer = messen(
+            "plane_personal", lambda: planer.plane_personal(df, fahrgeschaefte, anwesend, [], {}, trainerpflicht)
+        )
+        planung_bereiche, _, _, info_bereiche = messen(
+            "plane_personal_bereiche",
+            lambda: planer.plane_personal_bereiche(df, fahrgeschaefte, anwesend, [], {}, trainerpflicht, seed=args.seed + w)
+        )
+        zeiten.setdefault("bereiche_phase1", []).append(info_bereiche["zeit_bereiche_s"])
+        zeiten.setdefault("bereiche_phase2", []).append(info_bereiche["zeit_ausgleich_s"])
+
+        messen("excel", lambda: exportiere_bereichsplan_excel(planung, df, anwesend, fahrgeschaefte))
+
+        if w == 0 and args.max_folge:
+            # Pausen müssen über die Zeitfenster verteilt sein, nicht in einem gebündelt
+            ergebnis_rotation = messen(
+                "rotation",
+                lambda: rotation.plane_rotation(df, fahrgeschaefte, anwesend, [], {}, trainerpflicht,
+                                                rotation.zeitfenster(), max_folge=args.max_folge)
+            )
+            rotation_luecken = rotationsluecken(ergebnis_rotation, df, fahrgeschaefte, anwesend, trainerpflicht, args.max_folge)
+
+        if w == 0:
+            # Katalog und Mitarbeiter sind prozessweit geteilt, je Sitzung zählt nur die abgelegte Planung
+            sitzung_bytes = sitzungsspeicher(planung, verplante, fehlende_trainer, kompiliere_katalog(fahrgeschaefte), parse_mitarbeiter(df))
+
+        if args.beste_von:
+            messen(
+                "plane_personal_beste",
+                lambda: planer.plane_personal_beste(df, fahrgeschaefte, anwesend, [], {}, trainerpflicht,
+                                                    versuche=args.beste_von, budget_s=args.budget, start_seed=args.seed)
+            )
+
+        ergebnis_optimal = None
+        if faktor <= args.optimal_bis:
+            ergebnis_optimal = messen(
+                "plane_personal_optimal",
+                lambda: planer.plane_personal_optimal(df, fahrgeschaefte, anwesend, [], {}, trainerpflicht)
+            )
+
+    return {
+        "faktor": faktor,
+        "fahrgeschaefte": len(fahrgeschaefte),
+        "positionen": sum(len(fg["Positionen"]) for fg in fahrgeschaefte),
+        "mitarbeiter": len(df),
+        "anwesend": len(anwesend),
+        "zeiten_ms": {phase: round(statistics.median(d) * 1000, 2) for phase, d in zeiten.items()},
+        "quote_greedy": round(quote_greedy, 4),
+        "quote": round(besetzungsquote(planung, fahrgeschaefte), 4),
+        "quote_bereiche": round(besetzungsquote(planung_bereiche, fahrgeschaefte), 4),
+        "geliehen": info_bereiche["geliehen"],
+        "quote_optimal": round(besetzungsquote(ergebnis_optimal[0], fahrgeschaefte), 4) if ergebnis_optimal else None,
+        "fehlende_trainer": len(fehlende_trainer),
+        "sitzung_bytes": sitzung_bytes,
+        "rotation_luecken": rotation_luecken,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark für plane_personal und exportiere_bereichsplan_excel")
+    parser.add_argument("--faktoren", type=int, nargs="+", default=[1, 10, 100], help="Parkgröße als Vielfaches des Katalogs")
+    parser.add_argument("--dichte", type=float, default=0.5, help="Anteil primärer Einweisungen im eigenen Bereich")
+    parser.add_argument("--sek-dichte", type=float, default=0.02, help="Anteil sekundärer Einweisungen in fremden Bereichen")
+    parser.add_argument("--trainer-anteil", type=float, default=0.2)
+    parser.add_argument("--trainerpflicht", type=float, default=0.1, help="Anteil der Fahrgeschäfte mit Trainerpflicht")
+    parser.add_argument("--personal-pro-position", type=float, default=1.2)
+    parser.add_argument("--anwesenheit", type=float, default=0.85)
+    parser.add_argument("--wiederholungen", type=int, default=3)
+    parser.add_argument("--optimal-bis", type=int, default=10, help="Optimalen Planer nur bis zu diesem Faktor messen")
+    parser.add_argument("--beste-von", type=int, default=0, help="Zusätzlich plane_personal_beste mit so vielen Seeds messen (0 = aus)")
+    parser.add_argument("--budget", type=float, default=2.0, help="Zeitbudget in Sekunden für plane_personal_beste")
+    parser.add_argument("--max-folge", type=int, default=4, help="Rotation mit so vielen Zeitfenstern am Stück messen (0 = aus)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--katalog", default="fahrgeschaefte.json")
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON speichern")
+    args = parser.parse_args(argv)
+
+    vorlage = lade_katalog(args.katalog)["fahrgeschaefte"]
+    ergebnisse = []
+    for faktor in args.faktoren:
+        ergebnis = miss_park(vorlage, faktor, args)
+        ergebnisse.append(ergebnis)
+        zeiten = "  ".join(f"{phase}={ms}ms" for phase, ms in ergebnis["zeiten_ms"].items())
+        print(
+            f"{faktor:>4}x  {ergebnis['positionen']:>6} Positionen  {ergebnis['anwesend']:>6} anwesend  "
+            f"Quote {ergebnis['quote_greedy']:.3f} -> {ergebnis['quote']:.3f}"
+            + f" (Bereiche {ergebnis['quote_bereiche']:.3f}, {ergebnis['geliehen']} geliehen)"
+            + (f" (optimal {ergebnis['quote_optimal']:.3f})" if ergebnis["quote_optimal"] is not None else "")
+            + f"  Sitzung {ergebnis['sitzung_bytes']['namen'] / 1024:.1f} -> {ergebnis['sitzung_bytes']['ids'] / 1024:.1f} KiB"
+            + (f"  Rotation +{max(ergebnis['rotation_luecken'])} Lücken" if ergebnis["rotation_luecken"] is not None else "")
+            + f"  {zeiten}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(ergebnisse, f, indent=2, ensure_ascii=False)
+    return ergebnisse
+
+
+if __name__ == "__main__":
+    main()
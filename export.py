@@ -0,0 +1,187 @@
+"""Excel-Export des Personalplans (ohne Streamlit nutzbar, xlsxwriter wird erst beim Export geladen)."""
+from io import BytesIO
+from collections import defaultdict
+from itertools import groupby
+
+from messung import gemessen
+from mitarbeiter import als_mitarbeiter
+
+# Spalten der Anwesenheitsliste und ihre Breiten
+SPALTEN = ["Nachname", "Vorname", "Fahrgeschäft", "Geplant von", "Geplant bis", "Beginn", "Ende", "Bemerkungen", "Unterschrift"]
+SPALTENBREITEN = {"Fahrgeschäft": 15, "Bemerkungen": 18, "Unterschrift": 20}   # Standard 13 (auch Uhrzeiten)
+LEERE_SPALTEN = [""] * (len(SPALTEN) - 3)
+
+# In Excel-Blattnamen verboten; Namen höchstens 31 Zeichen, ohne Rücksicht auf Groß-/Kleinschreibung eindeutig
+VERBOTENE_ZEICHEN = str.maketrans({zeichen: "_" for zeichen in "[]:*?/\\"})
+MAX_BLATTNAME = 31
+
+def _bereichszeilen(planung, mitarbeiter, anwesend, fg_to_bereich):
+    # Mapping von Name zu Fahrgeschäften
+    zuweisung_map = defaultdict(list)
+    for fg, pos_dict in planung.items():
+        for name in pos_dict.values():
+            base_name = name.split(" (")[0]
+            zuweisung_map[base_name].append(fg)
+
+    anwesend = set(anwesend)
+
+    # Zeilen als (Bereich, Nachname, Vorname, Fahrgeschäft) – ohne iterrows()
+    daten = []
+    for m in mitarbeiter:
+        name, bereich = m.name, m.bereich
+        if " " in name:
+            vorname, nachname = name.split(" ", 1)
+        else:
+            vorname, nachname = name, ""
+
+        if name in zuweisung_map:
+            for fg in zuweisung_map[name]:
+                daten.append((fg_to_bereich.get(fg, "Unbekannt"), nachname, vorname, fg))
+        elif name in anwesend:
+            # Übrige Mitarbeiter ohne Zuweisung
+            daten.append((bereich, nachname, vorname, "Zusatz"))
+
+    # Sortieren nach Bereich und Nachname
+    daten.sort(key=lambda zeile: (zeile[0], zeile[1], zeile[2]))
+    return daten
+
+
+def _formate(workbook):
+    # Formate einmal je Arbeitsmappe anlegen und für alle Blätter teilen
+    title_format = workbook.add_format({
+        "bold": True,
+        "font_size": 16,
+        "align": "left",
+        "valign": "vcenter"
+    })
+    header_format = workbook.add_format({
+        "bold": True,
+        "bg_color": "#DDEBF7",
+        "border": 1,
+        "font_size": 14,
+        "align": "center",
+        "valign": "vcenter"
+    })
+    cell_format = workbook.add_format({
+        "border": 1,
+        "font_size": 14,
+        "align": "center",
+        "valign": "vcenter"
+    })
+    return title_format, header_format, cell_format
+
+
+def _blattname(name, vergeben):
+    # Verbotene Zeichen ersetzen, kürzen und bei Gleichheit nach dem Kürzen durchnummerieren
+    name = name.translate(VERBOTENE_ZEICHEN).strip("'") or "Blatt"
+    kandidat = name[:MAX_BLATTNAME]
+    nummer = 1
+    while kandidat.casefold() in vergeben:
+        nummer += 1
+        zusatz = f" ({nummer})"
+        kandidat = name[:MAX_BLATTNAME - len(zusatz)] + zusatz
+    vergeben.add(kandidat.casefold())
+    return kandidat
+
+
+def _schreibe_bereichsblaetter(workbook, formate, daten, datum="", blattpraefix=""):
+    title_format, header_format, cell_format = formate
+    vergeben = {worksheet.get_name().casefold() for worksheet in workbook.worksheets()}
+    for bereich, zeilen in groupby(daten, key=lambda zeile: zeile[0]):
+        worksheet = workbook.add_worksheet(_blattname(blattpraefix + bereich, vergeben))
+
+        # Spaltenbreiten und Druck-Layout (Querformat, Seitenränder)
+        for col_num, col_name in enumerate(SPALTEN):
+            worksheet.set_column(col_num, col_num, SPALTENBREITEN.get(col_name, 13))
+        worksheet.set_landscape()
+        worksheet.set_margins(left=0.5, right=0.5, top=0.75, bottom=0.75)
+
+        # Zeilen streng von oben nach unten schreiben (Voraussetzung für constant_memory)
+        # === 1. Überschrift in Zeile 1 ===
+        worksheet.merge_range("A1:E1", f"Anwesenheitsliste {bereich}      Datum: {datum}", title_format)
+        worksheet.set_row(1, 30)
+        worksheet.write_string(1, 0, "")   # leere Zeile anlegen, sonst verwirft constant_memory die Höhe
+
+        #Tabelle startet erst ab Zeile 3(Excel Zeile 3 = Index 2)
+        worksheet.set_row(2, 30)
+        worksheet.write_row(2, 0, SPALTEN, header_format)
+
+        # Zeilen mit Zeitplan tragen zusätzlich "Geplant von" und "Geplant bis"
+        for row_num, (_, nachname, vorname, fg, *zeiten) in enumerate(zeilen, start=3):
+            worksheet.set_row(row_num, 30)
+            worksheet.write_row(row_num, 0, [nachname, vorname, fg, *zeiten] + LEERE_SPALTEN[len(zeiten):], cell_format)
+
+
+#Excel Export
+@gemessen("export.bereichsplan")
+def exportiere_bereichsplan_excel(planung, mitarbeiter, anwesend, fahrgeschaefte):
+    # Mapping Fahrgeschäft -> Bereich (für temporäre Gruppierung)
+    fg_to_bereich = {fg["Name"]: fg.get("Bereich", "Unbekannt") for fg in fahrgeschaefte}
+    daten = _bereichszeilen(planung, als_mitarbeiter(mitarbeiter), anwesend, fg_to_bereich)
+
+    import xlsxwriter
+
+    excel_buffer = BytesIO()
+    # constant_memory: Zeilen werden direkt auf die Platte geschrieben, Speicher bleibt flach
+    workbook = xlsxwriter.Workbook(excel_buffer, {"constant_memory": True})
+    _schreibe_bereichsblaetter(workbook, _formate(workbook), daten)
+    workbook.close()
+    excel_buffer.seek(0)
+    return excel_buffer
+
+
+@gemessen("export.mehrtagesplan")
+def exportiere_mehrtagesplan_excel(tagesplaene, mitarbeiter, fahrgeschaefte):
+    """Eine Arbeitsmappe für mehrere Tage: je Tag und Bereich ein Blatt ("<Datum> <Bereich>").
+
+    tagesplaene: Liste von {"datum", "planung", "anwesend"} (z.B. Ergebnis von planer.plane_tage)
+    """
+    import xlsxwriter
+
+    mitarbeiter = als_mitarbeiter(mitarbeiter)
+    fg_to_bereich = {fg["Name"]: fg.get("Bereich", "Unbekannt") for fg in fahrgeschaefte}
+
+    excel_buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(excel_buffer, {"constant_memory": True})
+    formate = _formate(workbook)
+    for tag in tagesplaene:
+        daten = _bereichszeilen(tag["planung"], mitarbeiter, tag["anwesend"], fg_to_bereich)
+        _schreibe_bereichsblaetter(workbook, formate, daten, datum=tag["datum"], blattpraefix=f"{tag['datum']} ")
+    workbook.close()
+    excel_buffer.seek(0)
+    return excel_buffer
+
+
+@gemessen("export.rotationsplan")
+def exportiere_rotationsplan_excel(rotation, mitarbeiter, anwesend, fahrgeschaefte, datum=""):
+    """Bereichsplan mit ausgefüllten Spalten "Geplant von" / "Geplant bis": eine Zeile je Einsatz.
+
+    rotation: Ergebnis von rotation.plane_rotation
+    """
+    from rotation import schichten_je_mitarbeiter
+
+    fg_to_bereich = {fg["Name"]: fg.get("Bereich", "Unbekannt") for fg in fahrgeschaefte}
+    schichten = schichten_je_mitarbeiter(rotation)
+    anwesend = set(anwesend)
+
+    daten = []
+    for m in als_mitarbeiter(mitarbeiter):
+        vorname, _, nachname = m.name.partition(" ")
+        if m.name in schichten:
+            for einsatz in schichten[m.name]:
+                fg = einsatz["Fahrgeschäft"]
+                daten.append((fg_to_bereich.get(fg, "Unbekannt"), nachname, vorname, fg, einsatz["von"], einsatz["bis"]))
+        elif m.name in anwesend:
+            daten.append((m.bereich, nachname, vorname, "Zusatz"))
+
+    # Sortieren nach Bereich, Nachname und Beginn
+    daten.sort(key=lambda zeile: (zeile[0], zeile[1], zeile[2], zeile[4:]))
+
+    import xlsxwriter
+
+    excel_buffer = BytesIO()
+    workbook = xlsxwriter.Workbook(excel_buffer, {"constant_memory": True})
+    _schreibe_bereichsblaetter(workbook, _formate(workbook), daten, datum=datum)
+    workbook.close()
+    excel_buffer.seek(0)
+    return excel_buffer
@@ -0,0 +1,110 @@
+"""Planhistorie: abgeschlossene Planungen in SQLite (nur anhängen), mit Indizes für Fairness-Abfragen.
+
+    historie = PlanHistorie("plan_historie.sqlite")
+    historie.speichern("2026-07-01", planung, modus="Optimal")
+    zaehlung = historie.einsaetze(seit="2026-06-01")   # {Name: {Fahrgeschäft: Anzahl}}
+    plane_personal(..., historie=zaehlung)
+
+Wird ein Tag mehrmals abgeschlossen, gilt in den Abfragen die zuletzt gespeicherte Planung.
+"""
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+
+from messung import messe
+from planer import NIEMAND_VERFUEGBAR
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plaene (
+    id INTEGER PRIMARY KEY,
+    datum TEXT NOT NULL,
+    gespeichert TEXT NOT NULL,
+    modus TEXT
+);
+CREATE TABLE IF NOT EXISTS einsaetze (
+    plan_id INTEGER NOT NULL REFERENCES plaene(id),
+    datum TEXT NOT NULL,
+    mitarbeiter TEXT NOT NULL,
+    fahrgeschaeft TEXT NOT NULL,
+    position TEXT NOT NULL,
+    bereichsfremd INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plaene_datum ON plaene (datum, id);
+-- (datum, plan_id, mitarbeiter, fahrgeschaeft) deckt die Fairness-Abfrage ohne Tabellenzugriff ab
+CREATE INDEX IF NOT EXISTS einsaetze_datum ON einsaetze (datum, plan_id, mitarbeiter, fahrgeschaeft);
+CREATE INDEX IF NOT EXISTS einsaetze_mitarbeiter ON einsaetze (mitarbeiter, datum);
+CREATE INDEX IF NOT EXISTS einsaetze_fahrgeschaeft ON einsaetze (fahrgeschaeft, datum);
+CREATE INDEX IF NOT EXISTS einsaetze_position ON einsaetze (position, datum);
+"""
+
+# Nur die jeweils letzte Planung eines Tages zählt
+_GUELTIG = "SELECT MAX(id) FROM plaene WHERE datum BETWEEN ? AND ? GROUP BY datum"
+
+
+class PlanHistorie:
+    """Abgeschlossene Planungen je Tag, Zeilen werden nie geändert oder gelöscht."""
+
+    def __init__(self, pfad):
+        self._pfad = pfad
+        with closing(self._verbindung()) as con, con:
+            con.executescript(_SCHEMA)
+
+    def _verbindung(self):
+        return sqlite3.connect(self._pfad)
+
+    def speichern(self, datum, planung, modus=None):
+        """Planung eines Tages (datum als "JJJJ-MM-TT") anhängen, Rückgabe: Plan-ID."""
+        zeilen = [
+            (name.split(" (")[0], fg_name, pos_name, int(name.endswith(" (anderer Bereich)")))
+            for fg_name, pos_dict in planung.items()
+            for pos_name, name in pos_dict.items()
+            if name != NIEMAND_VERFUEGBAR
+        ]
+        with messe("historie.speichern"), closing(self._verbindung()) as con, con:
+            plan_id = con.execute(
+                "INSERT INTO plaene (datum, gespeichert, modus) VALUES (?, ?, ?)",
+                (datum, datetime.now(timezone.utc).isoformat(), modus),
+            ).lastrowid
+            con.executemany(
+                "INSERT INTO einsaetze VALUES (?, ?, ?, ?, ?, ?)",
+                [(plan_id, datum, *zeile) for zeile in zeilen],
+            )
+        return plan_id
+
+    def einsaetze(self, seit="0000-00-00", bis="9999-99-99"):
+        """Einsätze je Mitarbeiter und Fahrgeschäft zwischen seit und bis (einschließlich).
+
+        Rückgabe: {Name: {Fahrgeschäft: Anzahl}}, direkt als historie für die Planer nutzbar.
+        """
+        with messe("historie.einsaetze"), closing(self._verbindung()) as con:
+            zeilen = con.execute(
+                f"""SELECT mitarbeiter, fahrgeschaeft, COUNT(*) FROM einsaetze
+                    WHERE datum BETWEEN ? AND ? AND plan_id IN ({_GUELTIG})
+                    GROUP BY mitarbeiter, fahrgeschaeft""",
+                (seit, bis, seit, bis),
+            ).fetchall()
+        zaehlung = {}
+        for name, fg_name, anzahl in zeilen:
+            zaehlung.setdefault(name, {})[fg_name] = anzahl
+        return zaehlung
+
+    def auswertung(self, seit="0000-00-00", bis="9999-99-99", gruppe="position"):
+        """Saisonauswertung: [{"mitarbeiter", gruppe, "anzahl", "bereichsfremd"}], gruppe "fahrgeschaeft" oder "position"."""
+        if gruppe not in ("fahrgeschaeft", "position"):
+            raise ValueError(f"Unbekannte Gruppe {gruppe!r}")
+        with closing(self._verbindung()) as con:
+            zeilen = con.execute(
+                f"""SELECT mitarbeiter, {gruppe}, COUNT(*), SUM(bereichsfremd) FROM einsaetze
+                    WHERE datum BETWEEN ? AND ? AND plan_id IN ({_GUELTIG})
+                    GROUP BY mitarbeiter, {gruppe} ORDER BY mitarbeiter, {gruppe}""",
+                (seit, bis, seit, bis),
+            ).fetchall()
+        return [
+            {"mitarbeiter": name, gruppe: wert, "anzahl": anzahl, "bereichsfremd": fremd}
+            for name, wert, anzahl, fremd in zeilen
+        ]
+
+    def plaene(self):
+        """Alle gespeicherten Planungen als [(id, datum, gespeichert, modus)], neueste zuerst."""
+        with closing(self._verbindung()) as con:
+            return con.execute("SELECT id, datum, gespeichert, modus FROM plaene ORDER BY id DESC").fetchall()
@@ -0,0 +1,59 @@
+"""Fahrgeschäfte-Katalog: einmal pro Prozess geladen und indiziert, neu geladen bei Dateiänderung."""
+import hashlib
+import json
+import os
+import threading
+
+from messung import messe, zaehle
+
+KATALOG_PFAD = "fahrgeschaefte.json"
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def kompiliere_katalog(fahrgeschaefte):
+    """Indizes über die Fahrgeschäfte-Liste (gleiches Schema wie fahrgeschaefte.json)."""
+    nach_name = {}
+    bereiche = {}
+    positionen = {}
+    positionen_je_bereich = {}
+    for fg in fahrgeschaefte:
+        bereich = fg.get("Bereich", "Unbekannt")
+        nach_name[fg["Name"]] = fg
+        bereiche.setdefault(bereich, []).append(fg["Name"])
+        positionen[fg["Name"]] = [(p["Name"], p["Einweisung_erforderlich"]) for p in fg["Positionen"]]
+        positionen_je_bereich[bereich] = positionen_je_bereich.get(bereich, 0) + len(fg["Positionen"])
+
+    # Alle Positionen in fester Reihenfolge, eine Planung lässt sich so als Array je Raster-Index ablegen
+    raster = [(fg["Name"], p["Name"]) for fg in fahrgeschaefte for p in fg["Positionen"]]
+
+    return {
+        "fahrgeschaefte": fahrgeschaefte,
+        "namen": [fg["Name"] for fg in fahrgeschaefte],
+        "nach_name": nach_name,                          # Name -> Fahrgeschäft
+        "bereiche": bereiche,                            # Bereich -> Namen (Reihenfolge der Datei)
+        "positionen": positionen,                        # Name -> [(Position, Einweisung_erforderlich)]
+        "positionen_je_bereich": positionen_je_bereich,  # Bereich -> Anzahl Positionen
+        "raster": raster,                                # [(Fahrgeschäft, Position)]
+        "raster_index": {fp: k for k, fp in enumerate(raster)},
+        # Fingerabdruck des Inhalts (Schlüssel für Caches, wie roster_version)
+        "version": hashlib.sha256(json.dumps(fahrgeschaefte, sort_keys=True, ensure_ascii=False).encode()).hexdigest(),
+    }
+
+
+def lade_katalog(pfad=KATALOG_PFAD):
+    """Kompilierten Katalog liefern; die Datei wird nur bei geänderter mtime neu gelesen."""
+    mtime = os.stat(pfad).st_mtime_ns
+    with _lock:
+        eintrag = _cache.get(pfad)
+        if eintrag is None or eintrag[0] != mtime:
+            zaehle("katalog.cache_fehlgriff")
+            with messe("katalog.laden"):
+                with open(pfad, "r", encoding="utf-8") as f:
+                    fahrgeschaefte = json.load(f)["fahrgeschaefte"]
+                eintrag = (mtime, kompiliere_katalog(fahrgeschaefte))
+            _cache[pfad] = eintrag
+        else:
+            zaehle("katalog.cache_treffer")
+    return eintrag[1]
@@ -0,0 +1,133 @@
+"""Kompakte Planungen für den Sitzungszustand: IDs statt verschachtelter Dicts mit Namen.
+
+Eine Planung wird zu einem int32-Array über das Positions-Raster des Katalogs (Index in die
+geteilte Mitarbeiterliste je Position) und einem bool-Array für "anderer Bereich". Katalog und
+Mitarbeiterliste werden nur referenziert, Namen entstehen erst beim Anzeigen oder Exportieren.
+
+    paket = packe_planung(planung, fehlende_trainer, katalog, mitarbeiter)
+    planung, verplante, fehlende_trainer = entpacke_planung(paket)
+"""
+import sys
+
+import numpy as np
+
+from planer import NIEMAND_VERFUEGBAR
+
+# Werte im ID-Array neben Mitarbeiter-Indizes
+NICHT_GEPLANT = -2   # Position kommt in der Planung nicht vor (z.B. Fahrgeschäft geschlossen)
+NIEMAND = -1         # NIEMAND_VERFUEGBAR
+
+_FREMD = " (anderer Bereich)"
+
+
+def _name_index(mitarbeiter):
+    return {m.name: i for i, m in enumerate(mitarbeiter)}
+
+
+def _packe(planung, raster_index, name_index):
+    ids = np.full(len(raster_index), NICHT_GEPLANT, dtype=np.int32)
+    fremd = np.zeros(len(raster_index), dtype=bool)
+    sonstige = {}   # was sich nicht abbilden lässt (unbekannte Person oder Position), bleibt als Name
+    for fg_name, pos_dict in planung.items():
+        for pos_name, name in pos_dict.items():
+            k = raster_index.get((fg_name, pos_name))
+            ist_fremd = name.endswith(_FREMD)
+            basis = name[:-len(_FREMD)] if ist_fremd else name
+            i = NIEMAND if name == NIEMAND_VERFUEGBAR else name_index.get(basis)
+            if k is None or i is None:
+                sonstige[(fg_name, pos_name)] = name
+                continue
+            ids[k] = i
+            fremd[k] = ist_fremd
+    return ids, fremd, sonstige or None
+
+
+def _entpacke(ids, fremd, sonstige, raster, mitarbeiter):
+    planung = {}
+    for k in np.flatnonzero(ids != NICHT_GEPLANT):
+        fg_name, pos_name = raster[k]
+        i = ids[k]
+        name = NIEMAND_VERFUEGBAR if i == NIEMAND else mitarbeiter[i].name + (_FREMD if fremd[k] else "")
+        planung.setdefault(fg_name, {})[pos_name] = name
+    for (fg_name, pos_name), name in (sonstige or {}).items():
+        planung.setdefault(fg_name, {})[pos_name] = name
+    return planung
+
+
+def _verplante(planung):
+    return [
+        name[:-len(_FREMD)] if name.endswith(_FREMD) else name
+        for pos_dict in planung.values() for name in pos_dict.values() if name != NIEMAND_VERFUEGBAR
+    ]
+
+
+def _fg_ids(fg_namen, katalog):
+    return np.array([katalog["namen"].index(fg_name) for fg_name in fg_namen], dtype=np.int32)
+
+
+def packe_planung(planung, fehlende_trainer, katalog, mitarbeiter, modus=None):
+    """Planung (wie von plane_personal) als kompaktes Paket; mitarbeiter ist die geteilte Liste der Planung.
+
+    modus: wie die Planung entstanden ist (für die Historie), wird unverändert mitgeführt
+    """
+    ids, fremd, sonstige = _packe(planung, katalog["raster_index"], _name_index(mitarbeiter))
+    return {
+        "katalog": katalog,
+        "mitarbeiter": mitarbeiter,
+        "modus": modus,
+        "ids": ids,
+        "fremd": fremd,
+        "sonstige": sonstige,
+        "fehlende_trainer": _fg_ids(fehlende_trainer, katalog),
+    }
+
+
+def paket_bytes(paket):
+    """Geschätzter Speicher eines Pakets ohne die nur referenzierten Objekte (Katalog, Mitarbeiterliste)."""
+    groesse = sys.getsizeof(paket)
+    for schluessel, wert in paket.items():
+        if schluessel in ("katalog", "mitarbeiter"):
+            continue
+        for teil in wert if isinstance(wert, list) else [wert]:
+            groesse += teil.nbytes if isinstance(teil, np.ndarray) else sys.getsizeof(teil)
+    return groesse
+
+
+def entpacke_planung(paket):
+    """Rückgabe wie plane_personal: (planung, verplante, fehlende_trainer)."""
+    katalog = paket["katalog"]
+    planung = _entpacke(paket["ids"], paket["fremd"], paket["sonstige"], katalog["raster"], paket["mitarbeiter"])
+    return planung, _verplante(planung), [katalog["namen"][j] for j in paket["fehlende_trainer"]]
+
+
+def packe_rotation(rotation, katalog, mitarbeiter):
+    """Ergebnis von plane_rotation als Paket: je Zeitfenster eine Zeile in den ID-Arrays."""
+    name_index = _name_index(mitarbeiter)
+    gepackt = [_packe(fenster["planung"], katalog["raster_index"], name_index) for fenster in rotation]
+    return {
+        "katalog": katalog,
+        "mitarbeiter": mitarbeiter,
+        "zeitfenster": [(fenster["von"], fenster["bis"]) for fenster in rotation],
+        "ids": np.array([ids for ids, _, _ in gepackt], dtype=np.int32).reshape(len(rotation), len(katalog["raster"])),
+        "fremd": np.array([fremd for _, fremd, _ in gepackt], dtype=bool).reshape(len(rotation), len(katalog["raster"])),
+        "sonstige": [sonstige for _, _, sonstige in gepackt],
+        "fehlende_trainer": [_fg_ids(fenster["fehlende_trainer"], katalog) for fenster in rotation],
+        "pause": [np.array([name_index[name] for name in fenster["pause"]], dtype=np.int32) for fenster in rotation],
+    }
+
+
+def entpacke_rotation(paket):
+    """Rückgabe wie plane_rotation: je Zeitfenster {"von", "bis", "planung", "verplante", "fehlende_trainer", "pause"}."""
+    katalog, mitarbeiter = paket["katalog"], paket["mitarbeiter"]
+    rotation = []
+    for s, (von, bis) in enumerate(paket["zeitfenster"]):
+        planung = _entpacke(paket["ids"][s], paket["fremd"][s], paket["sonstige"][s], katalog["raster"], mitarbeiter)
+        rotation.append({
+            "von": von,
+            "bis": bis,
+            "planung": planung,
+            "verplante": _verplante(planung),
+            "fehlende_trainer": [katalog["namen"][j] for j in paket["fehlende_trainer"][s]],
+            "pause": [mitarbeiter[i].name for i in paket["pause"][s]],
+        })
+    return rotation
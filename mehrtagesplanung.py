@@ -0,0 +1,108 @@
+"""Mehrtagesplanung: Woche oder Saison aus einer JSON- oder CSV-Datei planen und als eine Excel-Datei exportieren.
+
+    python mehrtagesplanung.py woche.json --mitarbeiter mitarbeiter_snapshot.sqlite --ausgabe woche.xlsx
+
+JSON: {"tage": [{"datum": "2026-07-01", "anwesend": [...], "geschlossene": [...],
+                 "trainerpflicht": [...], "manuelle_zuweisungen": {Name: {"Fahrgeschäft", "Position"}}}]}
+
+CSV (eine Zeile je Eintrag, Spalten Datum;Typ;Name;Fahrgeschäft;Position), Typ ist einer von
+anwesend (Name), geschlossen (Fahrgeschäft), trainerpflicht (Fahrgeschäft) oder
+zuweisung (Name, Fahrgeschäft, Position). Vorab zugewiesene Mitarbeiter gelten als anwesend.
+"""
+import argparse
+import csv
+import json
+from datetime import date
+
+from export import exportiere_mehrtagesplan_excel
+from katalog import lade_katalog
+from mitarbeiter import parse_mitarbeiter
+from mitarbeiter_speicher import SqliteSpeicher
+from planer import NIEMAND_VERFUEGBAR, plane_tage
+
+
+def _neuer_tag(datum):
+    return {"datum": datum, "anwesend": [], "geschlossene": [], "trainerpflicht": [], "manuelle_zuweisungen": {}}
+
+
+def _tage_aus_csv(f):
+    tage = {}
+    for zeile in csv.DictReader(f, delimiter=";"):
+        tag = tage.setdefault(zeile["Datum"].strip(), _neuer_tag(zeile["Datum"].strip()))
+        typ = zeile["Typ"].strip().lower()
+        name = (zeile.get("Name") or "").strip()
+        fg = (zeile.get("Fahrgeschäft") or "").strip()
+        if typ == "anwesend":
+            tag["anwesend"].append(name)
+        elif typ == "geschlossen":
+            tag["geschlossene"].append(fg)
+        elif typ == "trainerpflicht":
+            tag["trainerpflicht"].append(fg)
+        elif typ == "zuweisung":
+            tag["manuelle_zuweisungen"][name] = {"Fahrgeschäft": fg, "Position": (zeile.get("Position") or "").strip()}
+        else:
+            raise ValueError(f"Unbekannter Typ {zeile['Typ']!r} am {tag['datum']}")
+    return list(tage.values())
+
+
+def lade_tage(pfad):
+    """Tagesdaten aus .json oder .csv (Format siehe Modulbeschreibung), Reihenfolge der Datei.
+
+    Ein Datum, das nicht JJJJ-MM-TT ist, ergibt einen ValueError.
+    """
+    with open(pfad, "r", encoding="utf-8", newline="") as f:
+        if pfad.lower().endswith(".csv"):
+            tage = _tage_aus_csv(f)
+        else:
+            tage = [{**_neuer_tag(tag["datum"]), **tag} for tag in json.load(f)["tage"]]
+    for tag in tage:
+        # Datum früh prüfen und einheitlich als JJJJ-MM-TT (landet in Blattnamen und Titeln der Excel-Datei)
+        try:
+            tag["datum"] = date.fromisoformat(str(tag["datum"]).strip()).isoformat()
+        except ValueError:
+            raise ValueError(f"Ungültiges Datum {tag['datum']!r} in {pfad} (erwartet JJJJ-MM-TT)") from None
+        # Vorab Zugewiesene gelten als anwesend, doppelte Einträge entfernen
+        tag["anwesend"] = list(dict.fromkeys([*tag["anwesend"], *tag["manuelle_zuweisungen"]]))
+    return tage
+
+
+def lade_mitarbeiter(pfad):
+    # Lokaler Snapshot der App (.sqlite) oder Export des Google Sheets (.csv)
+    if pfad.lower().endswith(".csv"):
+        import pandas as pd
+
+        df = pd.read_csv(pfad)
+    else:
+        df, _ = SqliteSpeicher(pfad).laden()
+    return parse_mitarbeiter(df)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mehrere Tage planen und als eine Excel-Datei exportieren")
+    parser.add_argument("tage", help="Tagesdaten als .json oder .csv")
+    parser.add_argument("--mitarbeiter", default="mitarbeiter_snapshot.sqlite", help="Mitarbeiterliste (.sqlite-Snapshot oder .csv)")
+    parser.add_argument("--katalog", default="fahrgeschaefte.json")
+    parser.add_argument("--ausgabe", default="Mehrtagesplan.xlsx")
+    parser.add_argument("--optimal", action="store_true", help="Optimale statt Greedy-Planung")
+    parser.add_argument("--seed", type=int, default=0, help="Seed des ersten Tages (Greedy), danach fortlaufend")
+    parser.add_argument("--worker", type=int, help="Anzahl Prozesse (Standard: alle Kerne)")
+    args = parser.parse_args(argv)
+
+    fahrgeschaefte = lade_katalog(args.katalog)["fahrgeschaefte"]
+    mitarbeiter = lade_mitarbeiter(args.mitarbeiter)
+    tage = lade_tage(args.tage)
+
+    ergebnisse = plane_tage(mitarbeiter, fahrgeschaefte, tage, optimal=args.optimal, start_seed=args.seed, worker=args.worker)
+    with open(args.ausgabe, "wb") as f:
+        f.write(exportiere_mehrtagesplan_excel(ergebnisse, mitarbeiter, fahrgeschaefte).getvalue())
+
+    for tag in ergebnisse:
+        unbesetzt = sum(1 for pos in tag["planung"].values() for name in pos.values() if name == NIEMAND_VERFUEGBAR)
+        print(f"{tag['datum']}: {len(tag['verplante'])} verplant, {unbesetzt} unbesetzt, "
+              f"Trainer fehlt: {', '.join(tag['fehlende_trainer']) or '-'}")
+    print(f"→ {args.ausgabe}")
+    return ergebnisse
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Laufzeitmessung der heißen Pfade: Zeitspannen je Stufe und Zähler, prozessweit über alle Sitzungen.
+
+    with messung.messe("planung.greedy"):
+        ...
+    messung.zaehle("sheet.api.laden")
+
+Jede Messung landet in einem gleitenden Fenster je Stufe (für p50/p95) und, falls mit
+aktiviere_log() eingeschaltet, als eine JSON-Zeile im Logger "personalplaner.messung".
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+# Anzahl der letzten Messungen je Stufe, aus denen p50/p95 berechnet werden
+FENSTER = 2000
+
+logger = logging.getLogger("personalplaner.messung")
+
+_lock = threading.Lock()
+_dauern = {}
+_zaehler = Counter()
+
+
+def erfasse(stufe, dauer_s, **felder):
+    """Eine bereits gemessene Dauer (Sekunden) für stufe ablegen."""
+    with _lock:
+        fenster = _dauern.get(stufe)
+        if fenster is None:
+            fenster = _dauern[stufe] = deque(maxlen=FENSTER)
+        fenster.append(dauer_s)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({"zeit": time.time(), "stufe": stufe, "ms": round(dauer_s * 1000, 3), **felder},
+                               ensure_ascii=False, default=str))
+
+
+@contextmanager
+def messe(stufe, **felder):
+    """Zeitspanne um einen Block; wird auch bei Ausnahmen erfasst (mit "fehler": True)."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        erfasse(stufe, time.perf_counter() - start, fehler=True, **felder)
+        raise
+    erfasse(stufe, time.perf_counter() - start, **felder)
+
+
+def gemessen(stufe):
+    """Dekorator: jeder Aufruf der Funktion ist eine Zeitspanne für stufe."""
+    def dekorator(funktion):
+        @functools.wraps(funktion)
+        def gemessene_funktion(*args, **kwargs):
+            with messe(stufe):
+                return funktion(*args, **kwargs)
+        return gemessene_funktion
+    return dekorator
+
+
+def zaehle(name, anzahl=1):
+    with _lock:
+        _zaehler[name] += anzahl
+
+
+def _perzentil(sortiert, p):
+    # Nächster Rang (ohne Interpolation), sortiert ist nicht leer
+    return sortiert[min(len(sortiert) - 1, int(p * len(sortiert)))]
+
+
+def statistik():
+    """{"stufen": {stufe: {anzahl, p50_ms, p95_ms, max_ms}}, "zaehler": {name: anzahl}}"""
+    with _lock:
+        dauern = {stufe: sorted(fenster) for stufe, fenster in _dauern.items()}
+        zaehler = dict(_zaehler)
+    return {
+        "stufen": {
+            stufe: {
+                "anzahl": len(werte),
+                "p50_ms": round(_perzentil(werte, 0.50) * 1000, 2),
+                "p95_ms": round(_perzentil(werte, 0.95) * 1000, 2),
+                "max_ms": round(werte[-1] * 1000, 2),
+            }
+            for stufe, werte in sorted(dauern.items()) if werte
+        },
+        "zaehler": dict(sorted(zaehler.items())),
+    }
+
+
+def zuruecksetzen():
+    with _lock:
+        _dauern.clear()
+        _zaehler.clear()
+
+
+def aktiviere_log(pfad=None):
+    """JSON-Zeilen in pfad anhängen (None = stderr). Mehrfacher Aufruf richtet nur einen Handler ein."""
+    with _lock:
+        if not logger.handlers:
+            handler = logging.FileHandler(pfad, encoding="utf-8") if pfad else logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+    return logger
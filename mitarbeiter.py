@@ -0,0 +1,57 @@
+"""Kompaktes Mitarbeiter-Modell: einmal beim Laden aus der Tabelle erzeugt, danach überall verwendet."""
+import math
+import sys
+
+
+def _als_liste(wert):
+    # Kommagetrennter String (Google Sheet) oder bereits Liste -> Liste ohne Leerzeichen
+    if isinstance(wert, (list, tuple, set, frozenset)):
+        return [str(w).strip() for w in wert if str(w).strip()]
+    if wert is None or (isinstance(wert, float) and math.isnan(wert)):
+        return []
+    return [w.strip() for w in str(wert).split(",") if w.strip()]
+
+
+def _fahrgeschaefte(wert):
+    # Fahrgeschäftsnamen internieren, damit alle Mitarbeiter dieselben String-Objekte teilen
+    return frozenset(sys.intern(fg) for fg in _als_liste(wert))
+
+
+class Mitarbeiter:
+    """Ein Mitarbeiter mit exakten Einweisungs-Mengen (statt Teilstring-Suche im Rohtext)."""
+
+    __slots__ = ("name", "bereich", "einweisungen", "sekundaer_einweisungen", "trainer")
+
+    def __init__(self, name, bereich, einweisungen=frozenset(), sekundaer_einweisungen=frozenset(), trainer=frozenset()):
+        self.name = name
+        self.bereich = bereich
+        self.einweisungen = einweisungen
+        self.sekundaer_einweisungen = sekundaer_einweisungen
+        self.trainer = trainer
+
+    @classmethod
+    def aus_zeile(cls, zeile):
+        bereich = zeile.get("Bereich")
+        return cls(
+            name=str(zeile["Name"]),
+            bereich=sys.intern(str(bereich)) if isinstance(bereich, str) and bereich else "Unbekannt",
+            einweisungen=_fahrgeschaefte(zeile.get("Einweisungen")),
+            sekundaer_einweisungen=_fahrgeschaefte(zeile.get("Sekundaer_Einweisungen")),
+            trainer=_fahrgeschaefte(zeile.get("Trainer")),
+        )
+
+    def __repr__(self):
+        return f"Mitarbeiter({self.name!r}, {self.bereich!r})"
+
+
+def parse_mitarbeiter(df):
+    """DataFrame der Mitarbeiterliste -> Tupel von Mitarbeiter-Objekten (Reihenfolge der Tabelle)."""
+    spalten = [s for s in ("Name", "Bereich", "Einweisungen", "Sekundaer_Einweisungen", "Trainer") if s in df]
+    return tuple(Mitarbeiter.aus_zeile(zeile) for zeile in df[spalten].to_dict(orient="records"))
+
+
+def als_mitarbeiter(mitarbeiter):
+    # Bereits geparste Mitarbeiter unverändert durchreichen, DataFrames einmal parsen
+    if hasattr(mitarbeiter, "to_dict"):
+        return parse_mitarbeiter(mitarbeiter)
+    return mitarbeiter
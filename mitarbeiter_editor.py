@@ -0,0 +1,208 @@
+"""Mitarbeiter-Editor ohne Streamlit: Filterindex, Seiten, Zeilen-Deltas und Prüfung gegen den Katalog.
+
+Die App zeigt immer nur eine gefilterte Seite der Liste. Änderungen im Editor werden als Deltas
+je Zeile (Index-Label der geladenen Tabelle) gesammelt und erst beim Speichern angewendet:
+
+    editor = neuer_editor(df, mitarbeiter, stand, version)
+    seite_df = seite(editor, labels)
+    uebernehme_editor(editor, seite_df, st.session_state[key])   # {"edited_rows", "added_rows", "deleted_rows"}
+    speichern(wende_deltas_an(editor), editor["basis"], editor["stand"])
+
+pandas wird erst beim Anwenden der Deltas gebraucht und dort importiert.
+"""
+import difflib
+
+import numpy as np
+
+from mitarbeiter import _als_liste
+
+# Kommagetrennte Fahrgeschäftsnamen, geprüft gegen den Katalog
+LISTEN_SPALTEN = ("Einweisungen", "Sekundaer_Einweisungen", "Trainer")
+
+
+def baue_filterindex(mitarbeiter):
+    """Zeilenpositionen je Bereich, Einweisung (primär oder sekundär) und Trainer-Fahrgeschäft.
+
+    mitarbeiter ist das aus der Tabelle geparste Tupel (gleiche Reihenfolge wie die Zeilen).
+    """
+    bereich, einweisung, trainer = {}, {}, {}
+    for pos, m in enumerate(mitarbeiter):
+        bereich.setdefault(m.bereich, []).append(pos)
+        for fg in m.einweisungen | m.sekundaer_einweisungen:
+            einweisung.setdefault(fg, []).append(pos)
+        for fg in m.trainer:
+            trainer.setdefault(fg, []).append(pos)
+
+    def als_arrays(gruppen):
+        return {schluessel: np.array(positionen, dtype=np.int32) for schluessel, positionen in gruppen.items()}
+
+    return {
+        "anzahl": len(mitarbeiter),
+        "namen": [m.name for m in mitarbeiter],
+        "namensmenge": frozenset(m.name for m in mitarbeiter),
+        "bereich": als_arrays(bereich),
+        "einweisung": als_arrays(einweisung),
+        "trainer": als_arrays(trainer),
+    }
+
+
+def unbekannte_einweisungen(index, katalog):
+    """Namen im Roster, die kein Fahrgeschäft im Katalog sind, und die betroffenen Zeilen.
+
+    Rückgabe: ({Name: Zeilenpositionen}, sortierte Positionen aller betroffenen Zeilen)
+    """
+    unbekannt = {}
+    for gruppe in ("einweisung", "trainer"):
+        for fg, positionen in index[gruppe].items():
+            if fg not in katalog["nach_name"]:
+                unbekannt.setdefault(fg, []).append(positionen)
+    unbekannt = {fg: np.unique(np.concatenate(teile)) for fg, teile in unbekannt.items()}
+    return unbekannt, np.unique(np.concatenate([np.zeros(0, dtype=np.int32), *unbekannt.values()]))
+
+
+def filtere(index, bereich=None, einweisung=None, suche="", auswahl=None):
+    """Sortierte Zeilenpositionen, die allen gesetzten Filtern genügen.
+
+    auswahl: sortierte Zeilenpositionen, auf die zusätzlich eingeschränkt wird (z.B. Zeilen mit
+    unbekannten Einweisungen) oder None.
+    """
+    treffer = np.arange(index["anzahl"], dtype=np.int32)
+    leer = np.zeros(0, dtype=np.int32)
+    if bereich:
+        treffer = np.intersect1d(treffer, index["bereich"].get(bereich, leer), assume_unique=True)
+    if einweisung:
+        treffer = np.intersect1d(treffer, index["einweisung"].get(einweisung, leer), assume_unique=True)
+    if auswahl is not None:
+        treffer = np.intersect1d(treffer, auswahl, assume_unique=True)
+    if suche:
+        suche = suche.casefold()
+        namen = index["namen"]
+        treffer = treffer[[suche in namen[pos].casefold() for pos in treffer]] if len(treffer) else treffer
+    return treffer
+
+
+# ----- Zeilen-Deltas -----
+# editor = {"basis": df, "mitarbeiter", "stand", "version", "geaendert": {label: {spalte: wert}},
+#           "neu": {label: {spalte: wert}}, "geloescht": {label}, "naechstes": nächstes freies Label}
+
+def neuer_editor(df, mitarbeiter, stand, version):
+    labels = [label for label in df.index if isinstance(label, (int, np.integer))]
+    return {
+        "basis": df,
+        "mitarbeiter": mitarbeiter,
+        "stand": stand,
+        "version": version,
+        "geaendert": {},
+        "neu": {},
+        "geloescht": set(),
+        "naechstes": int(max(labels)) + 1 if labels else 0,
+    }
+
+
+def hat_deltas(editor):
+    return bool(editor["geaendert"] or editor["neu"] or editor["geloescht"])
+
+
+def _anzeige(wert):
+    # Listen (Trainer) im Editor wie im Sheet als kommagetrennter Text
+    return ", ".join(wert) if isinstance(wert, (list, tuple)) else wert
+
+
+def seite(editor, labels):
+    """Zeilen labels der Basis mit eingearbeiteten Deltas, dahinter alle neuen Zeilen; Listen als Text."""
+    basis = editor["basis"]
+    labels = [label for label in labels if label not in editor["geloescht"]]
+    seite_df = basis.loc[labels].copy()
+    for spalte in seite_df.columns:
+        if seite_df[spalte].dtype == object:
+            seite_df[spalte] = seite_df[spalte].map(_anzeige)
+    for label in labels:
+        for spalte, wert in editor["geaendert"].get(label, {}).items():
+            seite_df.at[label, spalte] = wert
+    for label, werte in editor["neu"].items():
+        seite_df.loc[label] = [werte.get(spalte) for spalte in seite_df.columns]
+    return seite_df
+
+
+def uebernehme_editor(editor, seite_df, zustand):
+    """Positionsbezogene Änderungen aus st.data_editor (zustand) als Deltas je Label übernehmen."""
+    for pos, werte in zustand.get("edited_rows", {}).items():
+        label = seite_df.index[int(pos)]
+        ziel = editor["neu"][label] if label in editor["neu"] else editor["geaendert"].setdefault(label, {})
+        ziel.update(werte)
+    for werte in zustand.get("added_rows", []):
+        editor["neu"][editor["naechstes"]] = {spalte: wert for spalte, wert in werte.items() if spalte != "_index"}
+        editor["naechstes"] += 1
+    for pos in zustand.get("deleted_rows", []):
+        label = seite_df.index[int(pos)]
+        if editor["neu"].pop(label, None) is None:
+            editor["geaendert"].pop(label, None)
+            editor["geloescht"].add(label)
+
+    # Rückgängig gemachte Änderungen (Wert wie in der Basis) nicht weiter mitführen
+    basis = editor["basis"]
+    for label, werte in list(editor["geaendert"].items()):
+        for spalte, wert in list(werte.items()):
+            if _anzeige(basis.at[label, spalte]) == wert:
+                del werte[spalte]
+        if not werte:
+            del editor["geaendert"][label]
+
+
+def _wert(spalte, wert):
+    return _als_liste(wert) if spalte == "Trainer" else wert
+
+
+def wende_deltas_an(editor):
+    """Vollständige Tabelle aus Basis und Deltas (Labels bleiben erhalten, neue Zeilen am Ende)."""
+    import pandas as pd
+
+    basis = editor["basis"]
+    spalten = list(basis.columns)
+    zeilen = basis.to_dict(orient="index")
+    for label in editor["geloescht"]:
+        del zeilen[label]
+    for label, werte in editor["geaendert"].items():
+        zeilen[label].update({spalte: _wert(spalte, wert) for spalte, wert in werte.items()})
+    for label, werte in editor["neu"].items():
+        zeilen[label] = {spalte: _wert(spalte, werte.get(spalte)) for spalte in spalten}
+    return pd.DataFrame.from_dict(zeilen, orient="index", columns=spalten)
+
+
+def pruefe_deltas(editor, katalog, index):
+    """Probleme in geänderten und neuen Zeilen: [{"zeile", "name", "spalte", "problem"}].
+
+    Geprüft werden nur die Deltas (unabhängig von der Größe der Liste): Fahrgeschäftsnamen
+    gegen den Katalog, fehlende und doppelte Namen.
+    """
+    basis = editor["basis"]
+    # Namen gelöschter und umbenannter Zeilen sind wieder frei
+    frei = {basis.at[label, "Name"] for label in editor["geloescht"]}
+    frei |= {basis.at[label, "Name"] for label, werte in editor["geaendert"].items() if "Name" in werte}
+    vorhandene = index["namensmenge"] - frei
+    neue_namen = {}
+    probleme = []
+    zeilen = [(label, werte, False) for label, werte in editor["geaendert"].items()]
+    zeilen += [(label, werte, True) for label, werte in editor["neu"].items()]
+    for label, werte, neu in zeilen:
+        name = werte.get("Name") if neu or "Name" in werte else basis.at[label, "Name"]
+        anzeige = name or f"Zeile {label}"
+        if neu or "Name" in werte:
+            if not name or not str(name).strip():
+                probleme.append({"zeile": label, "name": anzeige, "spalte": "Name", "problem": "Name fehlt"})
+            elif name in vorhandene or name in neue_namen:
+                probleme.append({"zeile": label, "name": anzeige, "spalte": "Name", "problem": "Name ist doppelt"})
+            neue_namen[name] = label
+        for spalte in LISTEN_SPALTEN:
+            if spalte not in werte:
+                continue
+            for fg in _als_liste(werte[spalte]):
+                if fg not in katalog["nach_name"]:
+                    vorschlag = difflib.get_close_matches(fg, katalog["namen"], n=1)
+                    probleme.append({
+                        "zeile": label,
+                        "name": anzeige,
+                        "spalte": spalte,
+                        "problem": f"Unbekanntes Fahrgeschäft „{fg}“" + (f" – gemeint: {vorschlag[0]}?" if vorschlag else ""),
+                    })
+    return probleme
@@ -0,0 +1,359 @@
+"""Speicherung der Mitarbeiterliste: austauschbare Backends (Google Sheet, SQLite, Arbeitsspeicher).
+
+pandas wird erst beim Laden einer Liste importiert, damit der Import dieses Moduls billig bleibt.
+"""
+import hashlib
+import math
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import datetime, timezone
+
+from messung import zaehle
+
+
+def _sheet_wert(wert):
+    # Wert so, wie er im Google Sheet steht (Listen kommagetrennt, leere Werte als "")
+    if isinstance(wert, (list, tuple)):
+        return ", ".join(str(w) for w in wert)
+    if wert is None or (isinstance(wert, float) and math.isnan(wert)):
+        return ""
+    if hasattr(wert, "item"):   # NumPy-Skalare
+        return wert.item()
+    return wert
+
+
+def berechne_aenderungen(basis_df, neu_df):
+    """Unterschiede zwischen zuletzt geladenem und bearbeitetem Stand.
+
+    Zeilen werden über den Index zugeordnet (st.data_editor behält die Indizes bestehender
+    Zeilen). Positionen sind 0-basierte Datenzeilen im Sheet (ohne Kopfzeile).
+    Rückgabe: {"zellen": [(zeile, spalte, wert)], "neu": [[werte]], "geloescht": [zeilen]}
+    """
+    spalten = list(basis_df.columns)
+    position = {label: pos for pos, label in enumerate(basis_df.index)}
+    basis_werte = basis_df.to_dict(orient="index")
+    neu_werte = neu_df.reindex(columns=spalten).to_dict(orient="index")
+
+    zellen = []
+    neu = []
+    for label, zeile in neu_werte.items():
+        werte = [_sheet_wert(zeile[s]) for s in spalten]
+        if label not in position:
+            neu.append(werte)
+            continue
+        alt = basis_werte[label]
+        for spalte, (s, wert) in enumerate(zip(spalten, werte)):
+            if _sheet_wert(alt[s]) != wert:
+                zellen.append((position[label], spalte, wert))
+
+    geloescht = sorted(position[label] for label in basis_werte if label not in neu_werte)
+    return {"zellen": zellen, "neu": neu, "geloescht": geloescht}
+
+
+def _sql_wert(wert):
+    # Fehlende Werte (None, NaN, pd.NA) als NULL, NumPy-Skalare als Python-Werte
+    if wert is None or type(wert).__name__ == "NAType" or wert != wert:
+        return None
+    return wert.item() if hasattr(wert, "item") else wert
+
+
+def _bezeichner(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _zelle(wert):
+    if wert == "":
+        return {}
+    if isinstance(wert, bool):
+        return {"userEnteredValue": {"boolValue": wert}}
+    if isinstance(wert, (int, float)):
+        return {"userEnteredValue": {"numberValue": wert}}
+    return {"userEnteredValue": {"stringValue": str(wert)}}
+
+
+def batch_update_anfragen(aenderungen, sheet_id):
+    """Anfragen für genau einen spreadsheets.batchUpdate-Aufruf (atomar, kein leeres Sheet zwischendurch).
+
+    Reihenfolge: Zellen ändern (alte Zeilennummern), Zeilen von unten nach oben löschen,
+    neue Zeilen anhängen.
+    """
+    anfragen = [
+        {
+            "updateCells": {
+                "start": {"sheetId": sheet_id, "rowIndex": zeile + 1, "columnIndex": spalte},
+                "rows": [{"values": [_zelle(wert)]}],
+                "fields": "userEnteredValue",
+            }
+        }
+        for zeile, spalte, wert in aenderungen["zellen"]
+    ]
+    for zeile in reversed(aenderungen["geloescht"]):
+        anfragen.append({
+            "deleteDimension": {
+                "range": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": zeile + 1, "endIndex": zeile + 2}
+            }
+        })
+    if aenderungen["neu"]:
+        anfragen.append({
+            "appendCells": {
+                "sheetId": sheet_id,
+                "rows": [{"values": [_zelle(wert) for wert in zeile]} for zeile in aenderungen["neu"]],
+                "fields": "userEnteredValue",
+            }
+        })
+    return anfragen
+
+
+# ----- Gemeinsame Hilfsfunktionen -----
+MITARBEITER_SHEET_URL = "https://docs.google.com/spreadsheets/d/119O3dcaEVqGx0fuWju-6mH9WPjyqZkPiunwO7GMKBiQ/edit"
+MITARBEITER_WORKSHEET = "mitarbeiter_liste"
+# Spalten der Mitarbeiterliste (Kopfzeile des Sheets)
+MITARBEITER_SPALTEN = ("Name", "Bereich", "Einweisungen", "Sekundaer_Einweisungen", "Trainer")
+
+
+def roster_version(df):
+    # Fingerabdruck des Mitarbeiterstands (Schlüssel für Caches)
+    return hashlib.sha256(df.to_json(orient="records", force_ascii=False).encode()).hexdigest()
+
+
+def _trainer_als_liste(df):
+    df["Trainer"] = (
+        df["Trainer"]
+        .fillna("")                                                # NaN -> ""
+        .apply(lambda x: [t.strip() for t in str(x).split(",") if t.strip()])
+    )
+    return df
+
+
+# ----- Speicher-Backends -----
+# Jedes Backend bietet:
+#   stand()                              -> günstiges Versionskennzeichen (None = unbekannt)
+#   laden(stand=None)                    -> (df, stand); stand: eben abgefragter stand(), spart eine zweite Abfrage
+#   speichern(df, basis_df, basis_stand) -> {"status": "gespeichert"|"konflikt", ...}
+# Gespeichert wird nur, wenn der Stand seit dem Laden (basis_stand) unverändert ist.
+
+class GoogleSheetSpeicher:
+    """Mitarbeiterliste im Google Sheet, Änderungen per Diff in einem batch_update."""
+
+    def __init__(self, client_factory, url=MITARBEITER_SHEET_URL, worksheet=MITARBEITER_WORKSHEET):
+        self._client_factory = client_factory
+        self._url = url
+        self._worksheet = worksheet
+        self._sheet = None
+
+    def _spreadsheet(self):
+        # Spreadsheet-Objekt behalten, damit die Revalidierung nur einen Drive-Aufruf kostet
+        if self._sheet is None:
+            zaehle("sheet.api.oeffnen")
+            self._sheet = self._client_factory().open_by_url(self._url)
+        return self._sheet
+
+    def stand(self):
+        # Drive-Metadaten (lastUpdateTime), None falls nicht verfügbar
+        try:
+            zaehle("sheet.api.stand")
+            return self._spreadsheet().get_lastUpdateTime()
+        except Exception:
+            return None
+
+    def laden(self, stand=None):
+        # Stand nur übernehmen (None = unbekannt), nicht selbst abfragen: das kostet je Laden zwei Drive-Aufrufe
+        import pandas as pd
+
+        zaehle("sheet.api.laden", 2)   # worksheet() + get_all_records()
+        data = self._spreadsheet().worksheet(self._worksheet).get_all_records()
+        return _trainer_als_liste(pd.DataFrame(data)), stand
+
+    def speichern(self, df, basis_df, basis_stand):
+        sheet = self._spreadsheet()
+        zaehle("sheet.api.speichern")
+        worksheet = sheet.worksheet(self._worksheet)
+
+        # Optimistische Nebenläufigkeit, ohne Drive-Metadaten über den Inhalt
+        aktuell = self.stand()
+        if aktuell is not None and basis_stand is not None:
+            unveraendert = aktuell == basis_stand
+        else:
+            unveraendert = roster_version(self.laden()[0]) == roster_version(basis_df)
+        if not unveraendert:
+            return {"status": "konflikt"}
+
+        # Nur geänderte Zellen, neue und gelöschte Zeilen in einem einzigen batch_update
+        aenderungen = berechne_aenderungen(basis_df, df)
+        anfragen = batch_update_anfragen(aenderungen, worksheet.id)
+        if anfragen:
+            zaehle("sheet.api.speichern")
+            sheet.batch_update({"requests": anfragen})
+        return _ergebnis(aenderungen, self.stand())
+
+
+class SqliteSpeicher:
+    """Lokale Mitarbeiterliste in SQLite (offline nutzbar, Laden in Millisekunden).
+
+    Eine neue Datenbank ist leer (laden() liefert eine leere Liste mit den Spalten des Sheets).
+    Befüllen aus einem CSV-Export des Sheets:
+
+        python personalplanung.py snapshot mitarbeiter_liste.csv --ziel mitarbeiter_snapshot.sqlite
+    """
+
+    def __init__(self, pfad):
+        self._pfad = pfad
+        with closing(self._verbindung()) as con, con:
+            con.execute("CREATE TABLE IF NOT EXISTS meta (schluessel TEXT PRIMARY KEY, wert TEXT)")
+
+    def _verbindung(self):
+        # Autocommit, Transaktionen werden mit BEGIN ausdrücklich geöffnet
+        return sqlite3.connect(self._pfad, isolation_level=None)
+
+    def stand(self):
+        with closing(self._verbindung()) as con:
+            zeile = con.execute("SELECT wert FROM meta WHERE schluessel = 'stand'").fetchone()
+        return zeile[0] if zeile else None
+
+    def vorhanden(self):
+        with closing(self._verbindung()) as con:
+            return con.execute("SELECT 1 FROM sqlite_master WHERE name = 'mitarbeiter'").fetchone() is not None
+
+    def laden(self, stand=None):
+        import pandas as pd
+
+        with closing(self._verbindung()) as con:
+            # Zeilen und Stand in einer Lesetransaktion, damit beide zusammenpassen
+            con.execute("BEGIN")
+            if con.execute("SELECT 1 FROM sqlite_master WHERE name = 'mitarbeiter'").fetchone():
+                df = pd.read_sql_query("SELECT * FROM mitarbeiter", con)
+            else:
+                df = pd.DataFrame(columns=list(MITARBEITER_SPALTEN), dtype=object)   # noch nie befüllt
+            zeile = con.execute("SELECT wert FROM meta WHERE schluessel = 'stand'").fetchone()
+            con.execute("COMMIT")
+        return _trainer_als_liste(df), zeile[0] if zeile else None
+
+    def ersetzen(self, df, stand=None):
+        # Kompletten Stand in einer Transaktion schreiben: neue Tabelle füllen, gegen die alte tauschen
+        # und den Stand setzen. Leser sehen entweder den alten oder den neuen Stand, nie eine leere Tabelle.
+        spalten = list(df.columns)
+        zeilen = [
+            tuple(_sql_wert(_sheet_wert(wert) if spalte == "Trainer" else wert) for spalte, wert in zip(spalten, zeile))
+            for zeile in df.itertuples(index=False, name=None)
+        ]
+        liste = ", ".join(_bezeichner(spalte) for spalte in spalten)
+        stand = stand or datetime.now(timezone.utc).isoformat()
+        with closing(self._verbindung()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                con.execute("DROP TABLE IF EXISTS mitarbeiter_neu")
+                con.execute(f"CREATE TABLE mitarbeiter_neu ({liste})")
+                con.executemany(
+                    f"INSERT INTO mitarbeiter_neu ({liste}) VALUES ({', '.join('?' * len(spalten))})", zeilen
+                )
+                con.execute("DROP TABLE IF EXISTS mitarbeiter")
+                con.execute("ALTER TABLE mitarbeiter_neu RENAME TO mitarbeiter")
+                con.execute("INSERT OR REPLACE INTO meta VALUES ('stand', ?)", (stand,))
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+            con.execute("COMMIT")
+        return stand
+
+    def speichern(self, df, basis_df, basis_stand):
+        if self.stand() != basis_stand:
+            return {"status": "konflikt"}
+        aenderungen = berechne_aenderungen(basis_df, df)
+        return _ergebnis(aenderungen, self.ersetzen(df))
+
+
+class SnapshotSpeicher:
+    """Lesender Durchgriff: Kaltstart aus dem lokalen Snapshot (Abgleich im Hintergrund), danach aus der Quelle."""
+
+    def __init__(self, quelle, snapshot):
+        self._quelle = quelle
+        self._snapshot = snapshot
+        self._abgleich = None
+        self._kaltstart = True
+        self._lock = threading.Lock()
+
+    def stand(self):
+        stand = self._quelle.stand()
+        return stand if stand is not None else self._snapshot.stand()
+
+    def laden(self, stand=None):
+        kaltstart, self._kaltstart = self._kaltstart, False
+        if not self._snapshot.vorhanden():
+            return self._aus_quelle(stand)
+        if kaltstart:
+            # Kaltstart: sofort aus dem Snapshot, Abgleich im Hintergrund
+            self.abgleichen()
+            return self._snapshot.laden()
+        # Später lädt die App nur bei geändertem Stand neu: dann synchron aus der Quelle,
+        # der Snapshot nur noch als Rückfall (offline)
+        try:
+            stand = stand if stand is not None else self._quelle.stand()
+            if stand is None or stand != self._snapshot.stand():
+                return self._aus_quelle(stand)
+        except Exception:
+            pass
+        return self._snapshot.laden()
+
+    def _aus_quelle(self, stand=None):
+        if stand is None:
+            stand = self._quelle.stand()
+        df, stand = self._quelle.laden(stand)
+        self._snapshot.ersetzen(df, stand)
+        return df, stand
+
+    def abgleichen(self):
+        # Höchstens ein Abgleich gleichzeitig, Fehler (z.B. offline) lassen den Snapshot unverändert
+        with self._lock:
+            if self._abgleich is not None and self._abgleich.is_alive():
+                return self._abgleich
+
+            def abgleich():
+                try:
+                    stand = self._quelle.stand()
+                    if stand is None or stand != self._snapshot.stand():
+                        self._aus_quelle(stand)
+                except Exception:
+                    pass
+
+            self._abgleich = threading.Thread(target=abgleich, name="mitarbeiter-abgleich", daemon=True)
+            self._abgleich.start()
+            return self._abgleich
+
+    def speichern(self, df, basis_df, basis_stand):
+        ergebnis = self._quelle.speichern(df, basis_df, basis_stand)
+        if ergebnis["status"] == "gespeichert":
+            self._snapshot.ersetzen(df, ergebnis["stand"])
+        return ergebnis
+
+
+class SpeicherImArbeitsspeicher:
+    """Speicher ohne Netzwerk und Dateien, für Tests und Benchmarks."""
+
+    def __init__(self, df):
+        self._df = df.copy()
+        self._zaehler = 0
+
+    def stand(self):
+        return str(self._zaehler)
+
+    def laden(self, stand=None):
+        return self._df.copy(), self.stand()
+
+    def speichern(self, df, basis_df, basis_stand):
+        if basis_stand != self.stand():
+            return {"status": "konflikt"}
+        aenderungen = berechne_aenderungen(basis_df, df)
+        self._df = df.reset_index(drop=True).copy()
+        self._zaehler += 1
+        return _ergebnis(aenderungen, self.stand())
+
+
+def _ergebnis(aenderungen, stand):
+    return {
+        "status": "gespeichert",
+        "stand": stand,
+        "zellen": len(aenderungen["zellen"]),
+        "neu": len(aenderungen["neu"]),
+        "geloescht": len(aenderungen["geloescht"]),
+    }
@@ -0,0 +1,260 @@
+"""Personalplanung ohne Streamlit: Planung, Katalog und Excel-Export als Bibliothek und Kommandozeile.
+
+Der Import ist frei von Seiteneffekten und billig: die Module (und damit numpy, pandas,
+xlsxwriter) werden erst beim ersten Zugriff auf eine Funktion geladen.
+
+    import personalplanung as pp
+    katalog = pp.lade_katalog()
+    planung, verplante, fehlende_trainer = pp.plane_personal(mitarbeiter, katalog["fahrgeschaefte"], anwesend, [], {}, [], seed=1)
+
+    python personalplanung.py tag --anwesend anwesend.txt --ausgabe Bereichsplan.xlsx
+    python personalplanung.py woche woche.json --ausgabe woche.xlsx
+    python personalplanung.py rotation --beginn 09:00 --ende 18:00 --max-belastend 2 --ausgabe Rotation.xlsx
+    python personalplanung.py snapshot mitarbeiter_liste.csv --ziel mitarbeiter_snapshot.sqlite
+"""
+import argparse
+import importlib
+import json
+import sys
+
+# Öffentliche Namen -> Modul, aus dem sie beim ersten Zugriff geladen werden
+_API = {
+    "NIEMAND_VERFUEGBAR": "planer",
+    "baue_qualifikationsindex": "planer",
+    "bewerte_planung": "planer",
+    "plane_personal": "planer",
+    "plane_personal_beste": "planer",
+    "plane_personal_bereiche": "planer",
+    "plane_personal_inkrementell": "planer",
+    "plane_personal_optimal": "planer",
+    "plane_tage": "planer",
+    "analysiere_machbarkeit": "analyse",
+    "simuliere_ausfaelle": "analyse",
+    "plane_rotation": "rotation",
+    "schichten_je_mitarbeiter": "rotation",
+    "zeitfenster": "rotation",
+    "PlanHistorie": "historie",
+    "PlanungsCache": "planungscache",
+    "planungsschluessel": "planungscache",
+    "packe_planung": "kompakt",
+    "entpacke_planung": "kompakt",
+    "packe_rotation": "kompakt",
+    "entpacke_rotation": "kompakt",
+    "kompiliere_katalog": "katalog",
+    "lade_katalog": "katalog",
+    "Mitarbeiter": "mitarbeiter",
+    "parse_mitarbeiter": "mitarbeiter",
+    "exportiere_bereichsplan_excel": "export",
+    "exportiere_mehrtagesplan_excel": "export",
+    "exportiere_rotationsplan_excel": "export",
+    "lade_mitarbeiter": "mehrtagesplanung",
+    "lade_tage": "mehrtagesplanung",
+}
+
+__all__ = sorted(_API)
+
+
+def __getattr__(name):
+    modul = _API.get(name)
+    if modul is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    wert = getattr(importlib.import_module(modul), name)
+    globals()[name] = wert   # nächster Zugriff ohne __getattr__
+    return wert
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_API))
+
+
+def _namen(pfad):
+    # Eine Angabe je Zeile, leere Zeilen und Kommentare (#) ignorieren
+    with open(pfad, "r", encoding="utf-8") as f:
+        return [z.strip() for z in f if z.strip() and not z.lstrip().startswith("#")]
+
+
+def _eingaben(args):
+    # Gemeinsame Eingaben von "tag" und "machbarkeit" in der Reihenfolge von plane_personal
+    from katalog import lade_katalog
+    from mehrtagesplanung import lade_mitarbeiter
+
+    fahrgeschaefte = lade_katalog(args.katalog)["fahrgeschaefte"]
+    mitarbeiter = lade_mitarbeiter(args.mitarbeiter)
+    anwesend = _namen(args.anwesend) if args.anwesend else [m.name for m in mitarbeiter]
+    return mitarbeiter, fahrgeschaefte, anwesend, args.geschlossen, {}, args.trainerpflicht
+
+
+def _machbarkeit(args):
+    from analyse import analysiere_machbarkeit
+
+    ergebnis = analysiere_machbarkeit(*_eingaben(args))
+    json.dump(ergebnis, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    return ergebnis
+
+
+def _robustheit(args):
+    from analyse import simuliere_ausfaelle
+
+    ergebnis = simuliere_ausfaelle(*_eingaben(args), paare=args.paare)
+    json.dump(ergebnis, sys.stdout, indent=2, ensure_ascii=False)
+    print()
+    return ergebnis
+
+
+def _verfuegbarkeit(pfad):
+    # Eine Zeile je Person: Name;von;bis
+    verfuegbarkeit = {}
+    for zeile in _namen(pfad):
+        name, von, bis = (teil.strip() for teil in zeile.split(";"))
+        verfuegbarkeit[name] = (von, bis)
+    return verfuegbarkeit
+
+
+def _rotation(args):
+    from planer import NIEMAND_VERFUEGBAR
+    from rotation import plane_rotation, zeitfenster
+
+    eingaben = _eingaben(args)
+    verfuegbarkeit = _verfuegbarkeit(args.verfuegbarkeit) if args.verfuegbarkeit else {}
+    ergebnis = plane_rotation(
+        *eingaben, zeitfenster(args.beginn, args.ende, args.takt), verfuegbarkeit,
+        max_folge=args.max_folge, max_folge_belastend=args.max_belastend
+    )
+
+    if args.ausgabe:
+        from export import exportiere_rotationsplan_excel
+
+        mitarbeiter, fahrgeschaefte, anwesend = eingaben[:3]
+        with open(args.ausgabe, "wb") as f:
+            f.write(exportiere_rotationsplan_excel(ergebnis, mitarbeiter, anwesend, fahrgeschaefte).getvalue())
+
+    if args.json:
+        json.dump(ergebnis, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        for fenster in ergebnis:
+            unbesetzt = sum(1 for pos in fenster["planung"].values() for name in pos.values() if name == NIEMAND_VERFUEGBAR)
+            print(f"{fenster['von']}-{fenster['bis']}: {len(fenster['verplante'])} verplant, {unbesetzt} unbesetzt, "
+                  f"{len(fenster['pause'])} Pause, Trainer fehlt: {', '.join(fenster['fehlende_trainer']) or '-'}")
+    return ergebnis
+
+
+def _tag(args):
+    from planer import NIEMAND_VERFUEGBAR, plane_personal, plane_personal_bereiche, plane_personal_beste, plane_personal_optimal
+
+    eingaben = _eingaben(args)
+    mitarbeiter, fahrgeschaefte, anwesend = eingaben[:3]
+
+    historie = None
+    if args.fair or args.abschliessen:
+        from datetime import date, timedelta
+        from historie import PlanHistorie
+
+        plan_historie = PlanHistorie(args.historie)
+        heute = date.fromisoformat(args.abschliessen) if args.abschliessen else date.today()
+        if args.fair:
+            # Einsätze der letzten args.fair Tage vor dem geplanten Tag
+            historie = plan_historie.einsaetze(
+                seit=(heute - timedelta(days=args.fair)).isoformat(), bis=(heute - timedelta(days=1)).isoformat()
+            )
+
+    info = {}
+    if args.modus == "optimal":
+        planung, verplante, fehlende_trainer = plane_personal_optimal(*eingaben, historie=historie)
+    elif args.modus == "beste":
+        planung, verplante, fehlende_trainer, info = plane_personal_beste(
+            *eingaben, versuche=args.versuche, budget_s=args.budget, start_seed=args.seed or 0, historie=historie
+        )
+    elif args.modus == "bereiche":
+        planung, verplante, fehlende_trainer, info = plane_personal_bereiche(*eingaben, seed=args.seed, historie=historie)
+    else:
+        planung, verplante, fehlende_trainer = plane_personal(*eingaben, seed=args.seed, historie=historie)
+
+    if args.abschliessen:
+        plan_historie.speichern(args.abschliessen, planung, modus=args.modus)
+
+    if args.ausgabe:
+        from export import exportiere_bereichsplan_excel
+
+        with open(args.ausgabe, "wb") as f:
+            f.write(exportiere_bereichsplan_excel(planung, mitarbeiter, anwesend, fahrgeschaefte).getvalue())
+
+    ergebnis = {"planung": planung, "verplante": verplante, "fehlende_trainer": fehlende_trainer, **info}
+    if args.json:
+        json.dump(ergebnis, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        unbesetzt = sum(1 for pos in planung.values() for name in pos.values() if name == NIEMAND_VERFUEGBAR)
+        print(f"{len(verplante)} verplant, {unbesetzt} unbesetzt, Trainer fehlt: {', '.join(fehlende_trainer) or '-'}"
+              + (f", Seed {info['seed']}" if "seed" in info else "")
+              + (f", {info['geliehen']} aus anderen Bereichen ergänzt" if "geliehen" in info else ""))
+    return ergebnis
+
+
+def _snapshot(args):
+    # Lokalen SQLite-Snapshot (App mit speicher.art = "lokal", Kommandozeile) aus einem CSV-Export des Sheets befüllen
+    import pandas as pd
+    from mitarbeiter_speicher import MITARBEITER_SPALTEN, SqliteSpeicher
+
+    df = pd.read_csv(args.csv, dtype=str, keep_default_na=False)
+    fehlend = [spalte for spalte in MITARBEITER_SPALTEN[:2] if spalte not in df]
+    if fehlend:
+        raise SystemExit(f"Spalten fehlen in {args.csv}: {', '.join(fehlend)}")
+    stand = SqliteSpeicher(args.ziel).ersetzen(df)
+    print(f"{len(df)} Mitarbeiter -> {args.ziel} (Stand {stand})")
+    return stand
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["woche"]:
+        # Alle weiteren Argumente (auch --help) gehören der Mehrtagesplanung
+        from mehrtagesplanung import main as mehrtage_main
+        return mehrtage_main(argv[1:])
+
+    parser = argparse.ArgumentParser(description="Personalplanung ohne Streamlit")
+    befehle = parser.add_subparsers(dest="befehl", required=True)
+
+    tagesdaten = argparse.ArgumentParser(add_help=False)
+    tagesdaten.add_argument("--mitarbeiter", default="mitarbeiter_snapshot.sqlite", help="Mitarbeiterliste (.sqlite-Snapshot oder .csv)")
+    tagesdaten.add_argument("--katalog", default="fahrgeschaefte.json")
+    tagesdaten.add_argument("--anwesend", help="Datei mit einem Namen je Zeile (Standard: alle Mitarbeiter)")
+    tagesdaten.add_argument("--geschlossen", nargs="*", default=[], help="Geschlossene Fahrgeschäfte")
+    tagesdaten.add_argument("--trainerpflicht", nargs="*", default=[], help="Fahrgeschäfte mit Trainerpflicht")
+
+    tag = befehle.add_parser("tag", parents=[tagesdaten], help="Einen Tag planen")
+    tag.add_argument("--modus", choices=["greedy", "beste", "bereiche", "optimal"], default="greedy")
+    tag.add_argument("--seed", type=int, help="Seed der Greedy-Planung (bei 'beste' der erste Seed)")
+    tag.add_argument("--versuche", type=int, default=64, help="Anzahl Seeds bei --modus beste")
+    tag.add_argument("--budget", type=float, default=2.0, help="Zeitbudget in Sekunden bei --modus beste")
+    tag.add_argument("--ausgabe", help="Bereichsplan als Excel-Datei speichern")
+    tag.add_argument("--json", action="store_true", help="Planung als JSON ausgeben")
+    tag.add_argument("--historie", default="plan_historie.sqlite", help="Planhistorie für --fair und --abschliessen")
+    tag.add_argument("--fair", type=int, metavar="TAGE", help="Bei Gleichstand zuerst, wer das Fahrgeschäft in den letzten TAGE Tagen seltener hatte")
+    tag.add_argument("--abschliessen", metavar="DATUM", help="Planung unter DATUM (JJJJ-MM-TT) in der Historie speichern")
+
+    befehle.add_parser("machbarkeit", parents=[tagesdaten], help="Untergrenze der Lücken, Engpässe und Nachhol-Vorschläge als JSON")
+    robustheit = befehle.add_parser("robustheit", parents=[tagesdaten], help="Ausfälle einzeln (und paarweise) simulieren, als JSON")
+    robustheit.add_argument("--paare", action="store_true", help="Auch Ausfälle von zwei Personen gleichzeitig")
+    rotation = befehle.add_parser("rotation", parents=[tagesdaten], help="Einen Tag in Zeitfenstern mit Rotation planen")
+    rotation.add_argument("--beginn", default="09:00")
+    rotation.add_argument("--ende", default="18:00")
+    rotation.add_argument("--takt", type=int, default=60, help="Länge eines Zeitfensters in Minuten")
+    rotation.add_argument("--verfuegbarkeit", help="Datei mit Name;von;bis je Zeile (Standard: alle den ganzen Tag)")
+    rotation.add_argument("--max-folge", type=int, help="Höchstens so viele Zeitfenster am Stück, danach Pause")
+    rotation.add_argument("--max-belastend", type=int, help="Höchstens so viele Zeitfenster am Stück auf Pult/CCTV")
+    rotation.add_argument("--ausgabe", help="Bereichsplan mit Zeiten als Excel-Datei speichern")
+    rotation.add_argument("--json", action="store_true", help="Zeitfenster als JSON ausgeben")
+    befehle.add_parser("woche", help="Mehrere Tage planen (Argumente siehe 'woche --help')")
+    snapshot = befehle.add_parser("snapshot", help="Lokalen SQLite-Snapshot aus einem CSV-Export des Sheets befüllen")
+    snapshot.add_argument("csv", help="CSV-Export der Mitarbeiterliste (Kopfzeile wie im Sheet)")
+    snapshot.add_argument("--ziel", default="mitarbeiter_snapshot.sqlite")
+
+    args = parser.parse_args(argv)
+    befehl = {"machbarkeit": _machbarkeit, "robustheit": _robustheit, "rotation": _rotation, "snapshot": _snapshot}.get(args.befehl, _tag)
+    return befehl(args)
+
+
+if __name__ == "__main__":
+    main()
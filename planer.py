@@ -0,0 +1,719 @@
+"""Planungskern des Personalplaners (ohne Streamlit nutzbar)."""
+import atexit
+import multiprocessing
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from messung import erfasse, gemessen, messe
+from mitarbeiter import als_mitarbeiter
+
+# Qualifikationsindex
+@gemessen("planung.index")
+def baue_qualifikationsindex(mitarbeiter, fahrgeschaefte, historie=None):
+    """Mitarbeiter × Fahrgeschäft-Matrizen (primär, sekundär, Trainer) einmal pro Planungslauf aufbauen.
+
+    mitarbeiter: Folge von Mitarbeiter-Objekten (siehe mitarbeiter.py)
+    historie: {Name: {Fahrgeschäft: Anzahl bisheriger Einsätze}} (z.B. PlanHistorie.einsaetze),
+    ergibt die Rangfolge "rang" für die Auswahl unter gleich geeigneten Kandidaten
+    """
+    fg_index = {fg["Name"]: j for j, fg in enumerate(fahrgeschaefte)}
+    anzahl = len(mitarbeiter)
+
+    prim = np.zeros((anzahl, len(fg_index)), dtype=bool)
+    sek = np.zeros((anzahl, len(fg_index)), dtype=bool)
+    trainer = np.zeros((anzahl, len(fg_index)), dtype=bool)
+
+    for i, m in enumerate(mitarbeiter):
+        for matrix, fgs in ((prim, m.einweisungen), (sek, m.sekundaer_einweisungen), (trainer, m.trainer)):
+            for fg_name in fgs:
+                j = fg_index.get(fg_name)
+                if j is not None:
+                    matrix[i, j] = True
+
+    anzahl_einweisungen = prim.sum(axis=1)
+    rang = None
+    if historie:
+        # Fairness: wer das Fahrgeschäft zuletzt am seltensten hatte zuerst, danach wenige Einweisungen
+        einsaetze = np.zeros((anzahl, len(fg_index)), dtype=np.int32)
+        for i, m in enumerate(mitarbeiter):
+            for fg_name, n in historie.get(m.name, {}).items():
+                j = fg_index.get(fg_name)
+                if j is not None:
+                    einsaetze[i, j] = n
+        rang = einsaetze * (int(anzahl_einweisungen.max(initial=0)) + 1) + anzahl_einweisungen[:, None].astype(np.int32)
+
+    return {
+        "mitarbeiter": mitarbeiter,
+        "namen": [m.name for m in mitarbeiter],
+        "name_index": {m.name: i for i, m in enumerate(mitarbeiter)},
+        "fg_index": fg_index,
+        "prim": prim,
+        "sek": sek,
+        "eingewiesen": prim | sek,
+        # Trainer zählen nur, wenn sie auch eingewiesen sind
+        "trainer": trainer & (prim | sek),
+        "anzahl_einweisungen": anzahl_einweisungen,
+        "rang": rang,   # None = nur nach Anzahl Einweisungen
+    }
+
+NIEMAND_VERFUEGBAR = "⚠️❌ NIEMAND VERFÜGBAR ❌⚠️"
+
+def _vorab_einplanen(index, anwesend, manuelle_zuweisungen):
+    # Manuelle Zuweisungen eintragen, Rückgabe: planung, verplante, Maske der noch freien Anwesenden
+    anwesend = set(anwesend)
+    frei = np.array([n in anwesend for n in index["namen"]], dtype=bool)
+
+    planung = {}
+    verplante = []
+    for name, zuweisung in manuelle_zuweisungen.items():
+        planung.setdefault(zuweisung["Fahrgeschäft"], {})[zuweisung["Position"]] = name
+        verplante.append(name)
+        if name in index["name_index"]:
+            frei[index["name_index"][name]] = False
+    return planung, verplante, frei
+
+def _rangfolge(index, kandidaten, fg_name):
+    # Auswahlschlüssel unter Kandidaten: mit Historie "rang", sonst Anzahl Einweisungen
+    if index["rang"] is None:
+        return index["anzahl_einweisungen"][kandidaten]
+    return index["rang"][kandidaten, index["fg_index"][fg_name]]
+
+@gemessen("planung.trainer")
+def _pruefe_trainer(planung, index, trainerpflicht_fgs):
+    # Trainerpflicht-Fahrgeschäfte, an denen kein Trainer eingeplant ist (sortiert, unabhängig von der Set-Reihenfolge)
+    fehlende_trainer = []
+    for fg in sorted(trainerpflicht_fgs):
+        j = index["fg_index"].get(fg)
+        hat_trainer = False
+        for name in planung.get(fg, {}).values():
+            i = index["name_index"].get(name.split(" (")[0])
+            if i is not None and j is not None and index["trainer"][i, j]:
+                hat_trainer = True
+                break
+        if not hat_trainer:
+            fehlende_trainer.append(fg)
+    return fehlende_trainer
+
+@gemessen("planung.tausch")
+def _repariere_luecken(planung, verplante, frei, index, offene_fgs, manuelle_zuweisungen):
+    """Unbesetzte Positionen über augmentierende Pfade (Tauschketten) füllen.
+
+    Ausgehend von jeder leeren Position wird per Breitensuche entlang der Qualifikationen
+    eine Kette Position <- Mitarbeiter <- Position ... gesucht, die bei einem freien
+    Mitarbeiter endet. Jede leere Position wird höchstens einmal durchsucht. Positionen, die
+    eine erfolglose Suche erreicht hat, führen bis zum nächsten Tausch ebenfalls zu keinem
+    freien Mitarbeiter und werden übersprungen.
+    """
+    positionen = [(fg["Name"], p["Name"], p["Einweisung_erforderlich"]) for fg in offene_fgs for p in fg["Positionen"]]
+    alle = np.ones(len(index["namen"]), dtype=bool)
+    geeignet = [
+        index["eingewiesen"][:, index["fg_index"][fg_name]] if erforderlich else alle
+        for fg_name, _, erforderlich in positionen
+    ]
+
+    # Wer sitzt wo? (manuell Zugewiesene bleiben fest)
+    platz_von = {}
+    beweglich = np.zeros(len(index["namen"]), dtype=bool)
+    for k, (fg_name, pos_name, _) in enumerate(positionen):
+        name = planung.get(fg_name, {}).get(pos_name, NIEMAND_VERFUEGBAR).split(" (")[0]
+        i = index["name_index"].get(name)
+        if i is not None and name not in manuelle_zuweisungen:
+            platz_von[i] = k
+            beweglich[i] = True
+
+    def eintragen(i, k):
+        fg_name, pos_name, _ = positionen[k]
+        j = index["fg_index"][fg_name]
+        name = index["namen"][i]
+        if index["sek"][i, j] and not index["prim"][i, j]:
+            name += " (anderer Bereich)"
+        planung.setdefault(fg_name, {})[pos_name] = name
+        platz_von[i] = k
+
+    sackgasse = set()
+    for start, (fg_name, pos_name, _) in enumerate(positionen):
+        if planung.get(fg_name, {}).get(pos_name) != NIEMAND_VERFUEGBAR:
+            continue
+
+        vorgaenger = {start: None}   # Position -> (Zielposition, Mitarbeiter, der dorthin wechselt)
+        warteschlange = deque([start])
+        ende = None
+        while warteschlange and ende is None:
+            k = warteschlange.popleft()
+            freie_kandidaten = np.flatnonzero(frei & geeignet[k])
+            if freie_kandidaten.size:
+                ende = (k, freie_kandidaten[np.argmin(_rangfolge(index, freie_kandidaten, positionen[k][0]))])
+                break
+            for i in np.flatnonzero(beweglich & geeignet[k]):
+                q = platz_von[i]
+                if q not in vorgaenger and q not in sackgasse:
+                    vorgaenger[q] = (k, i)
+                    warteschlange.append(q)
+
+        if ende is None:
+            sackgasse.update(vorgaenger)
+            continue
+        sackgasse.clear()
+
+        # Kette rückwärts anwenden: freier Mitarbeiter rückt nach, alle anderen wechseln eine Position weiter
+        k, i = ende
+        eintragen(i, k)
+        frei[i] = False
+        beweglich[i] = True
+        verplante.append(index["namen"][i])
+        while vorgaenger[k] is not None:
+            ziel, i = vorgaenger[k]
+            eintragen(i, ziel)
+            k = ziel
+
+def _besetze_positionen(planung, verplante, frei, index, offene_fgs, trainerpflicht_fgs):
+    # Greedy-Besetzung aller noch nicht belegten Positionen der offenen Fahrgeschäfte
+    fg_index = index["fg_index"]
+    prim = index["prim"]
+    sek = index["sek"]
+    eingewiesen = index["eingewiesen"]
+    trainer = index["trainer"]
+    anzahl_einweisungen = index["anzahl_einweisungen"]
+    rang = index["rang"]
+
+    # 🔍 Alle Positionen sammeln und nach Anzahl verfügbarer Kandidaten sortieren
+    with messe("planung.kandidaten"):
+        # Kandidaten je Fahrgeschäft in einem Schritt zählen (Spaltensumme der Maske)
+        kandidaten_je_fg = (eingewiesen & frei[:, None]).sum(axis=0)
+        anzahl_frei = int(frei.sum())
+
+        alle_positionen = []
+        for fg in offene_fgs:
+            fg_name = fg["Name"]
+            for p in fg["Positionen"]:
+                pos_name = p["Name"]
+                einweisung_erforderlich = p["Einweisung_erforderlich"]
+
+                # ⛔ Position bereits belegt (manuell oder aus vorheriger Planung)
+                if fg_name in planung and pos_name in planung[fg_name]:
+                    continue
+
+                if einweisung_erforderlich:
+                    anzahl_kandidaten = int(kandidaten_je_fg[fg_index[fg_name]])
+                else:
+                    anzahl_kandidaten = anzahl_frei
+
+                alle_positionen.append({
+                    "fg_name": fg_name,
+                    "pos_name": pos_name,
+                    "einweisung_erforderlich": einweisung_erforderlich,
+                    "anzahl_kandidaten": anzahl_kandidaten
+                })
+
+        # 🥇 Kritischste Positionen zuerst (wenigste Kandidaten zuerst)
+        alle_positionen.sort(key=lambda x: x["anzahl_kandidaten"])
+
+    # 🔁 Haupt-Planung
+    with messe("planung.greedy"):
+        for pos in alle_positionen:
+            fg_name = pos["fg_name"]
+            pos_name = pos["pos_name"]
+            einweisung_erforderlich = pos["einweisung_erforderlich"]
+            j = fg_index[fg_name]
+
+            if fg_name not in planung:
+                planung[fg_name] = {}
+
+            kandidaten_prim = frei & prim[:, j]
+            kandidaten_sek = frei & sek[:, j]
+
+            if kandidaten_prim.any():
+                kandidaten = kandidaten_prim
+                einweisungs_typ = "primär"
+            elif kandidaten_sek.any():
+                kandidaten = kandidaten_sek
+                einweisungs_typ = "sekundär"
+            elif not einweisung_erforderlich and frei.any():
+                kandidaten = frei
+                einweisungs_typ = "optional"
+            else:
+                kandidaten = None
+                einweisungs_typ = "keine"
+
+            if kandidaten is not None:
+                if fg_name in trainerpflicht_fgs:
+                    trainer_kandidaten = kandidaten & trainer[:, j]
+                    if trainer_kandidaten.any():
+                        kandidaten = trainer_kandidaten
+
+                # Mitarbeiter mit den wenigsten Einweisungen zuerst (bei Gleichstand Reihenfolge der Liste),
+                # mit Historie zuerst wer dieses Fahrgeschäft seltener hatte
+                kandidaten_idx = np.flatnonzero(kandidaten)
+                if rang is None:
+                    i = kandidaten_idx[np.argmin(anzahl_einweisungen[kandidaten_idx])]
+                else:
+                    i = kandidaten_idx[np.argmin(rang[kandidaten_idx, j])]
+                name = index["namen"][i]
+
+                if einweisungs_typ == "sekundär" and not prim[i, j]:
+                    planung[fg_name][pos_name] = name + " (anderer Bereich)"
+                else:
+                    planung[fg_name][pos_name] = name
+
+                verplante.append(name)
+                frei[i] = False
+            else:
+                planung[fg_name][pos_name] = NIEMAND_VERFUEGBAR
+
+# Planung
+def plane_personal(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs, seed=None,
+                   historie=None):
+    """Greedy-Planung. mitarbeiter: DataFrame der Mitarbeiterliste oder bereits geparste Mitarbeiter-Objekte.
+
+    seed: Startwert für die Reihenfolge der Fahrgeschäfte (gleicher Seed -> gleiche Planung),
+    None = globaler Zufall wie bisher.
+    historie: bisherige Einsätze {Name: {Fahrgeschäft: Anzahl}}; unter gleich geeigneten Kandidaten
+    kommt zuerst, wer das Fahrgeschäft seltener hatte (siehe baue_qualifikationsindex).
+    """
+    # Qualifikationen einmalig als Matrix aufbauen
+    index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte, historie)
+
+    geschlossene = set(geschlossene)
+    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    return _greedy_lauf(index, offene_fgs, anwesend, manuelle_zuweisungen, trainerpflicht_fgs, seed)
+
+def _greedy_lauf(index, offene_fgs, anwesend, manuelle_zuweisungen, trainerpflicht_fgs, seed=None):
+    #Trainerliste in Set wandeln
+    trainerpflicht_fgs = set(trainerpflicht_fgs)
+
+    # Zufällige Reihenfolge der Fahrgeschäfte (Fairness zwischen Bereichen)
+    offene_fgs = list(offene_fgs)
+    if seed is None:
+        random.shuffle(offene_fgs)
+    else:
+        random.Random(seed).shuffle(offene_fgs)
+
+    # ✅ Vorab-Zuweisungen einplanen
+    planung, verplante, frei = _vorab_einplanen(index, anwesend, manuelle_zuweisungen)
+
+    # 🔁 Haupt-Planung
+    _besetze_positionen(planung, verplante, frei, index, offene_fgs, trainerpflicht_fgs)
+
+    # 🔁 Tauschlogik: Unbesetzte Positionen über Tauschketten füllen
+    _repariere_luecken(planung, verplante, frei, index, offene_fgs, manuelle_zuweisungen)
+
+    # ------------------  NACHKONTROLLE  ------------------
+    fehlende_trainer = _pruefe_trainer(planung, index, trainerpflicht_fgs)
+    return planung, list(verplante), fehlende_trainer
+
+# Beste von N (mehrere Seeds parallel)
+# Bewertung: zuerst unbesetzte Positionen, danach gewichtete Abstriche wie in plane_personal_optimal
+def bewerte_planung(planung, fehlende_trainer):
+    """Kleiner ist besser: (unbesetzte Positionen, Kosten für anderer Bereich und fehlende Trainer)."""
+    unbesetzt = 0
+    anderer_bereich = 0
+    for pos_dict in planung.values():
+        for name in pos_dict.values():
+            if name == NIEMAND_VERFUEGBAR:
+                unbesetzt += 1
+            elif name.endswith(" (anderer Bereich)"):
+                anderer_bereich += 1
+    return (unbesetzt, KOSTEN_SEKUNDAER * anderer_bereich + KOSTEN_OHNE_TRAINER * len(fehlende_trainer))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _prozess_pool():
+    # Ein Pool je Prozess mit einem Worker je Kern, wiederverwendet über alle Planungsläufe (Start der Worker
+    # nur einmal). Die Parallelität bestimmen die Aufrufer über die Anzahl der Teilaufträge (worker).
+    # "spawn" statt fork: der Streamlit-Server ist mehrfädig
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_beende_pool)
+        return _pool
+
+def _beende_pool():
+    # Beim Beenden des Prozesses: Worker sauber herunterfahren, nicht gestartete Aufträge verwerfen
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _suche_seeds(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs, seeds, budget_s,
+                 historie=None):
+    # Läuft im Worker: Index einmal aufbauen, Seeds nacheinander bis zur Frist (mindestens einer).
+    # Die Frist zählt ab Start im Worker, damit das Starten der Prozesse nicht vom Budget abgeht
+    frist = time.perf_counter() + budget_s
+    index = baue_qualifikationsindex(mitarbeiter, fahrgeschaefte, historie)
+    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    bestes = None
+    versucht = 0
+    for seed in seeds:
+        if versucht and time.perf_counter() >= frist:
+            break
+        ergebnis = _greedy_lauf(index, offene_fgs, anwesend, manuelle_zuweisungen, trainerpflicht_fgs, seed)
+        wertung = bewerte_planung(ergebnis[0], ergebnis[2])
+        versucht += 1
+        if bestes is None or (wertung, seed) < (bestes[0], bestes[1]):
+            bestes = (wertung, seed, ergebnis)
+    return bestes, versucht
+
+@gemessen("planung.beste")
+def plane_personal_beste(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                         versuche=64, budget_s=2.0, start_seed=0, worker=None, historie=None):
+    """Greedy-Planung mit versuche verschiedenen Seeds parallel, die beste Planung nach bewerte_planung gewinnt.
+
+    Jeder Worker sucht höchstens budget_s Sekunden ab seinem Start (nicht gestartete Seeds
+    entfallen); der Start der Prozesse beim ersten Aufruf zählt nicht dazu.
+    worker: Anzahl Prozesse (Standard und Obergrenze: alle Kerne), 1 = im aufrufenden Prozess.
+    Rückgabe: (planung, verplante, fehlende_trainer, info) mit info = {"seed", "wertung", "versuche"};
+    plane_personal(..., seed=info["seed"]) liefert dieselbe Planung erneut.
+    """
+    mitarbeiter = tuple(als_mitarbeiter(mitarbeiter))
+    geschlossene = set(geschlossene)
+    # Nicht mehr Teilaufträge als Kerne: wartende Aufträge würden ihr Zeitbudget erst später beginnen
+    worker = max(1, min(worker or os.cpu_count() or 1, os.cpu_count() or 1, versuche))
+    seeds = list(range(start_seed, start_seed + versuche))
+    parameter = (mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs)
+
+    if worker == 1:
+        ergebnisse = [_suche_seeds(*parameter, seeds, budget_s, historie)]
+    else:
+        pool = _prozess_pool()
+        auftraege = [pool.submit(_suche_seeds, *parameter, seeds[k::worker], budget_s, historie) for k in range(worker)]
+        ergebnisse = [auftrag.result() for auftrag in auftraege]
+
+    wertung, seed, (planung, verplante, fehlende_trainer) = min(bestes for bestes, _ in ergebnisse)
+    info = {"seed": seed, "wertung": wertung, "versuche": sum(versucht for _, versucht in ergebnisse)}
+    return planung, verplante, fehlende_trainer, info
+
+# Planung nach Bereichen (zweiphasig)
+def _plane_bereiche_teil(teilprobleme, anwesend, trainerpflicht_fgs, historie=None):
+    # Läuft im Worker: jeder Bereich nur mit eigenem Personal und eigenen Fahrgeschäften
+    ergebnisse = []
+    for bereich, mitarbeiter, fahrgeschaefte, manuelle_zuweisungen, seed in teilprobleme:
+        index = baue_qualifikationsindex(mitarbeiter, fahrgeschaefte, historie)
+        planung, verplante, _ = _greedy_lauf(index, fahrgeschaefte, anwesend, manuelle_zuweisungen, trainerpflicht_fgs, seed)
+        ergebnisse.append((bereich, planung, verplante))
+    return ergebnisse
+
+def plane_personal_bereiche(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                            seed=None, worker=None, historie=None):
+    """Zweiphasige Planung: erst jeder Bereich für sich (parallel), dann bereichsübergreifender Ausgleich.
+
+    Phase 1 besetzt die Fahrgeschäfte jedes Bereichs nur mit Mitarbeitern dieses Bereichs.
+    Phase 2 füllt die verbliebenen Lücken mit übrigem Personal aller Bereiche (Greedy und
+    Tauschketten über den ganzen Park). worker: Anzahl Prozesse für Phase 1 (Standard: alle
+    Kerne, 1 = im aufrufenden Prozess).
+    Rückgabe: (planung, verplante, fehlende_trainer, info) mit info = {"unbesetzt_je_bereich"
+    (nach Phase 1), "geliehen" (in Phase 2 gefüllte Positionen), "bereichsfremd" (Positionen
+    mit Personal aus anderem Heimatbereich), "zeit_bereiche_s", "zeit_ausgleich_s"}.
+    """
+    mitarbeiter = tuple(als_mitarbeiter(mitarbeiter))
+    geschlossene = set(geschlossene)
+    trainerpflicht_fgs = set(trainerpflicht_fgs)
+    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    bereich_von = {fg["Name"]: fg.get("Bereich", "Unbekannt") for fg in offene_fgs}
+
+    # Teilprobleme: Fahrgeschäfte, Heimpersonal und Vorab-Zuweisungen je Bereich
+    fgs_je_bereich = {}
+    for fg in offene_fgs:
+        fgs_je_bereich.setdefault(bereich_von[fg["Name"]], []).append(fg)
+    personal_je_bereich = {}
+    for m in mitarbeiter:
+        zuweisung = manuelle_zuweisungen.get(m.name)
+        if zuweisung is None:
+            personal_je_bereich.setdefault(m.bereich, []).append(m)
+        elif zuweisung["Fahrgeschäft"] in bereich_von:
+            # Vorab Zugewiesene gehören zum Bereich ihres Fahrgeschäfts
+            personal_je_bereich.setdefault(bereich_von[zuweisung["Fahrgeschäft"]], []).append(m)
+    teilprobleme = [
+        (
+            bereich,
+            tuple(personal_je_bereich.get(bereich, ())),
+            fgs,
+            {name: z for name, z in manuelle_zuweisungen.items() if bereich_von.get(z["Fahrgeschäft"]) == bereich},
+            None if seed is None else seed + k,
+        )
+        for k, (bereich, fgs) in enumerate(sorted(fgs_je_bereich.items()))
+    ]
+
+    # 🧩 Phase 1: Bereiche unabhängig voneinander
+    start = time.perf_counter()
+    worker = max(1, min(worker or os.cpu_count() or 1, len(teilprobleme)))
+    if worker == 1:
+        ergebnisse = _plane_bereiche_teil(teilprobleme, anwesend, trainerpflicht_fgs, historie)
+    else:
+        pool = _prozess_pool()
+        auftraege = [
+            pool.submit(_plane_bereiche_teil, teilprobleme[k::worker], anwesend, trainerpflicht_fgs, historie) for k in range(worker)
+        ]
+        ergebnisse = sorted((ergebnis for auftrag in auftraege for ergebnis in auftrag.result()), key=lambda e: e[0])
+    zeit_bereiche = time.perf_counter() - start
+    erfasse("planung.bereiche_phase1", zeit_bereiche)
+
+    # Vorab-Zuweisungen außerhalb der offenen Fahrgeschäfte bleiben wie in plane_personal erhalten
+    planung = {}
+    verplante = []
+    for name, zuweisung in manuelle_zuweisungen.items():
+        if zuweisung["Fahrgeschäft"] not in bereich_von:
+            planung.setdefault(zuweisung["Fahrgeschäft"], {})[zuweisung["Position"]] = name
+            verplante.append(name)
+
+    unbesetzt_je_bereich = {}
+    for bereich, teilplanung, teilverplante in ergebnisse:
+        unbesetzt_je_bereich[bereich] = 0
+        for fg_name, pos_dict in teilplanung.items():
+            for pos_name, name in pos_dict.items():
+                if name == NIEMAND_VERFUEGBAR:
+                    unbesetzt_je_bereich[bereich] += 1
+                else:
+                    planung.setdefault(fg_name, {})[pos_name] = name
+        verplante.extend(teilverplante)
+
+    # 🤝 Phase 2: Lücken mit Personal anderer Bereiche füllen
+    start = time.perf_counter()
+    index = baue_qualifikationsindex(mitarbeiter, fahrgeschaefte, historie)
+    verplant_set = set(verplante)
+    anwesend_set = set(anwesend)
+    frei = np.array([n in anwesend_set and n not in verplant_set for n in index["namen"]], dtype=bool)
+    _besetze_positionen(planung, verplante, frei, index, offene_fgs, trainerpflicht_fgs)
+    _repariere_luecken(planung, verplante, frei, index, offene_fgs, manuelle_zuweisungen)
+    zeit_ausgleich = time.perf_counter() - start
+    erfasse("planung.bereiche_phase2", zeit_ausgleich)
+
+    unbesetzt = sum(1 for pos_dict in planung.values() for name in pos_dict.values() if name == NIEMAND_VERFUEGBAR)
+    heimat = {m.name: m.bereich for m in mitarbeiter}
+    bereichsfremd = sum(
+        1
+        for fg_name, pos_dict in planung.items()
+        for name in pos_dict.values()
+        if name != NIEMAND_VERFUEGBAR and heimat.get(name.split(" (")[0], bereich_von.get(fg_name)) != bereich_von.get(fg_name)
+    )
+    info = {
+        "unbesetzt_je_bereich": unbesetzt_je_bereich,
+        "geliehen": sum(unbesetzt_je_bereich.values()) - unbesetzt,
+        "bereichsfremd": bereichsfremd,
+        "zeit_bereiche_s": zeit_bereiche,
+        "zeit_ausgleich_s": zeit_ausgleich,
+    }
+    return planung, verplante, _pruefe_trainer(planung, index, trainerpflicht_fgs), info
+
+# Inkrementelle Planung
+def plane_personal_inkrementell(vorherige_planung, mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                                historie=None):
+    """Bestehende Planung an geänderte Anwesenheit, Schließungen oder Vorab-Zuweisungen anpassen.
+
+    Die Änderungen werden gegen vorherige_planung ermittelt: Zuweisungen, deren Mitarbeiter
+    noch anwesend, frei und eingewiesen ist, bleiben unverändert. Nur betroffene Positionen
+    (abgemeldete Mitarbeiter, neu geöffnete Fahrgeschäfte, neue Vorab-Zuweisungen) werden
+    neu besetzt. Rückgabe wie plane_personal.
+    """
+    index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte, historie)
+
+    geschlossene = set(geschlossene)
+    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    trainerpflicht_fgs = set(trainerpflicht_fgs)
+
+    # ✅ Vorab-Zuweisungen haben immer Vorrang
+    planung, verplante, frei = _vorab_einplanen(index, anwesend, manuelle_zuweisungen)
+
+    # ♻️ Gültige Zuweisungen der vorherigen Planung übernehmen
+    for fg in offene_fgs:
+        fg_name = fg["Name"]
+        j = index["fg_index"][fg_name]
+        for p in fg["Positionen"]:
+            pos_name = p["Name"]
+            if pos_name in planung.get(fg_name, {}):
+                continue
+            bisher = vorherige_planung.get(fg_name, {}).get(pos_name)
+            i = index["name_index"].get(bisher.split(" (")[0]) if bisher else None
+            if i is None or not frei[i]:
+                continue
+            if p["Einweisung_erforderlich"] and not index["eingewiesen"][i, j]:
+                continue
+            planung.setdefault(fg_name, {})[pos_name] = bisher
+            verplante.append(index["namen"][i])
+            frei[i] = False
+
+    # 🔁 Nur die Lücken neu besetzen und reparieren
+    _besetze_positionen(planung, verplante, frei, index, offene_fgs, trainerpflicht_fgs)
+    _repariere_luecken(planung, verplante, frei, index, offene_fgs, manuelle_zuweisungen)
+
+    fehlende_trainer = _pruefe_trainer(planung, index, trainerpflicht_fgs)
+    return planung, verplante, fehlende_trainer
+
+# Optimale Planung (kostenminimale Zuordnung)
+# Kosten je Zuordnung: primär < Trainer fehlt < sekundär < optional
+KOSTEN_PRIMAER = 0
+KOSTEN_OHNE_TRAINER = 50
+KOSTEN_SEKUNDAER = 100
+KOSTEN_OPTIONAL = 200
+KOSTEN_VERBOTEN = 1e12
+
+def _minimale_zuordnung(kosten):
+    """Ungarische Methode für Zeilen <= Spalten, liefert je Zeile die gewählte Spalte. O(n² · m)."""
+    n, m = kosten.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    belegt_von = np.zeros(m + 1, dtype=int)   # Spalte j -> Zeile (1-basiert), 0 = frei
+    vorgaenger = np.zeros(m + 1, dtype=int)
+
+    for zeile in range(1, n + 1):
+        belegt_von[0] = zeile
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        benutzt = np.zeros(m + 1, dtype=bool)
+        while True:
+            benutzt[j0] = True
+            i0 = belegt_von[j0]
+            offen = np.flatnonzero(~benutzt)
+            reduziert = kosten[i0 - 1, offen - 1] - u[i0] - v[offen]
+            besser = reduziert < minv[offen]
+            minv[offen[besser]] = reduziert[besser]
+            vorgaenger[offen[besser]] = j0
+            j1 = offen[np.argmin(minv[offen])]
+            delta = minv[j1]
+            u[belegt_von[benutzt]] += delta
+            v[benutzt] -= delta
+            minv[offen] -= delta
+            j0 = j1
+            if belegt_von[j0] == 0:
+                break
+        # Augmentierenden Pfad zurückverfolgen
+        while j0:
+            j1 = vorgaenger[j0]
+            belegt_von[j0] = belegt_von[j1]
+            j0 = j1
+
+    zuordnung = np.full(n, -1, dtype=int)
+    for j in np.flatnonzero(belegt_von[1:]) + 1:
+        zuordnung[belegt_von[j] - 1] = j - 1
+    return zuordnung
+
+def plane_personal_optimal(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                           historie=None):
+    """Wie plane_personal, aber als kostenminimale Zuordnung: maximal viele Positionen besetzt, in Polynomialzeit."""
+    index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte, historie)
+    return _optimal_lauf(index, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs)
+
+@gemessen("planung.optimal")
+def _optimal_lauf(index, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs):
+    planung, verplante, frei = _vorab_einplanen(index, anwesend, manuelle_zuweisungen)
+    trainerpflicht_fgs = set(trainerpflicht_fgs)
+    geschlossene = set(geschlossene)
+
+    # Offene Positionen (ohne manuell belegte) als Zeilen
+    positionen = [
+        (fg["Name"], p["Name"], p["Einweisung_erforderlich"])
+        for fg in fahrgeschaefte if fg["Name"] not in geschlossene
+        for p in fg["Positionen"]
+        if p["Name"] not in planung.get(fg["Name"], {})
+    ]
+    kandidaten = np.flatnonzero(frei)
+
+    # Pro Trainerpflicht-Fahrgeschäft eine Position als Trainerplatz markieren (falls noch kein Trainer vorab eingeplant)
+    trainerplatz = set()
+    for fg_name in _pruefe_trainer(planung, index, trainerpflicht_fgs):
+        plaetze = [k for k, pos in enumerate(positionen) if pos[0] == fg_name]
+        if plaetze:
+            # Bevorzugt eine Position mit Einweisungspflicht
+            trainerplatz.add(min(plaetze, key=lambda k: not positionen[k][2]))
+
+    j_spalten = np.array([index["fg_index"][fg_name] for fg_name, _, _ in positionen], dtype=int)
+    prim = index["prim"][kandidaten][:, j_spalten].T
+    sek = index["sek"][kandidaten][:, j_spalten].T
+    erforderlich = np.array([pos[2] for pos in positionen], dtype=bool)
+
+    kosten = np.full((len(positionen), len(kandidaten)), KOSTEN_VERBOTEN)
+    kosten[~erforderlich, :] = KOSTEN_OPTIONAL
+    kosten[sek] = KOSTEN_SEKUNDAER
+    kosten[prim] = KOSTEN_PRIMAER
+    for k in trainerplatz:
+        ohne_trainer = ~index["trainer"][kandidaten, j_spalten[k]] & (kosten[k] < KOSTEN_VERBOTEN)
+        kosten[k, ohne_trainer] += KOSTEN_OHNE_TRAINER
+    # Gleichstand: Mitarbeiter mit wenigen Einweisungen (bzw. nach Historie-Rang) bevorzugen (< 1 Kostenpunkt)
+    if index["rang"] is None:
+        anzahl = index["anzahl_einweisungen"][kandidaten]
+        kosten += anzahl / (anzahl.max(initial=0) + 1)
+    else:
+        rang = index["rang"][kandidaten][:, j_spalten].T
+        kosten += rang / (rang.max(initial=0) + 1)
+
+    # Eine Ersatzspalte je Position für "unbesetzt" – teurer als jede mögliche Umverteilung
+    kosten_unbesetzt = (len(positionen) + 1) * (KOSTEN_OPTIONAL + KOSTEN_OHNE_TRAINER + 1)
+    kosten = np.hstack([kosten, np.full((len(positionen), len(positionen)), kosten_unbesetzt)])
+
+    zuordnung = _minimale_zuordnung(kosten) if positionen else []
+
+    for k, (fg_name, pos_name, _) in enumerate(positionen):
+        planung.setdefault(fg_name, {})
+        spalte = zuordnung[k]
+        if spalte >= len(kandidaten) or kosten[k, spalte] >= KOSTEN_VERBOTEN:
+            planung[fg_name][pos_name] = NIEMAND_VERFUEGBAR
+            continue
+        i = kandidaten[spalte]
+        name = index["namen"][i]
+        j = index["fg_index"][fg_name]
+        if index["sek"][i, j] and not index["prim"][i, j]:
+            planung[fg_name][pos_name] = name + " (anderer Bereich)"
+        else:
+            planung[fg_name][pos_name] = name
+        verplante.append(name)
+
+    return planung, verplante, _pruefe_trainer(planung, index, trainerpflicht_fgs)
+
+# Mehrere Tage (Woche, Saison) in einem Lauf
+def _plane_tage_teil(mitarbeiter, fahrgeschaefte, tage, optimal):
+    # Läuft im Worker: Index einmal je Worker, danach nur noch die Tagesdaten
+    index = baue_qualifikationsindex(mitarbeiter, fahrgeschaefte)
+    ergebnisse = []
+    for tag in tage:
+        geschlossene = set(tag.get("geschlossene", ()))
+        manuelle_zuweisungen = tag.get("manuelle_zuweisungen", {})
+        trainerpflicht_fgs = tag.get("trainerpflicht", ())
+        if optimal:
+            planung, verplante, fehlende_trainer = _optimal_lauf(
+                index, fahrgeschaefte, tag["anwesend"], geschlossene, manuelle_zuweisungen, trainerpflicht_fgs
+            )
+        else:
+            offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+            planung, verplante, fehlende_trainer = _greedy_lauf(
+                index, offene_fgs, tag["anwesend"], manuelle_zuweisungen, trainerpflicht_fgs, tag["seed"]
+            )
+        ergebnisse.append({
+            "datum": tag["datum"],
+            "anwesend": list(tag["anwesend"]),
+            "planung": planung,
+            "verplante": verplante,
+            "fehlende_trainer": fehlende_trainer,
+            "seed": None if optimal else tag["seed"],
+        })
+    return ergebnisse
+
+def plane_tage(mitarbeiter, fahrgeschaefte, tage, optimal=False, start_seed=0, worker=None):
+    """Mehrere Tage parallel planen (ein Prozess je Kern, Qualifikationsindex einmal je Prozess).
+
+    tage: Liste von {"datum", "anwesend", "geschlossene", "trainerpflicht", "manuelle_zuweisungen"}
+    (nur "datum" und "anwesend" sind Pflicht). Greedy-Tage erhalten den Seed start_seed + Tagesnummer.
+    Rückgabe: je Tag {"datum", "anwesend", "planung", "verplante", "fehlende_trainer", "seed"},
+    in der Reihenfolge von tage.
+    """
+    mitarbeiter = tuple(als_mitarbeiter(mitarbeiter))
+    tage = [{**tag, "seed": start_seed + k} for k, tag in enumerate(tage)]
+    worker = max(1, min(worker or os.cpu_count() or 1, len(tage)))
+
+    if worker == 1:
+        return _plane_tage_teil(mitarbeiter, fahrgeschaefte, tage, optimal)
+
+    # Tage reihum auf die Worker verteilen und danach wieder in Eingabereihenfolge bringen
+    pool = _prozess_pool()
+    auftraege = [pool.submit(_plane_tage_teil, mitarbeiter, fahrgeschaefte, tage[k::worker], optimal) for k in range(worker)]
+    ergebnisse = [None] * len(tage)
+    for k, auftrag in enumerate(auftraege):
+        ergebnisse[k::worker] = auftrag.result()
+    return ergebnisse
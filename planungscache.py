@@ -0,0 +1,105 @@
+"""Prozessweiter LRU-Cache für Planungsergebnisse, Schlüssel aus den kanonisierten Eingaben.
+
+Mit festem Seed sind alle Planer deterministisch; gleiche Eingaben (auch von verschiedenen
+Sitzungen) liefern damit dieselbe Planung, und die kann wiederverwendet werden.
+
+    cache = PlanungsCache(max_bytes=64 * 2**20)
+    schluessel = planungsschluessel(roster_version, katalog["version"], anwesend, geschlossene,
+                                    manuelle_zuweisungen, trainerpflicht_fgs, seed, modus="greedy")
+    wert = cache.hole(schluessel)
+    if wert is None:
+        wert = ...
+        cache.lege_ab(schluessel, wert, groesse)
+    cache.statistik()   # {"treffer", "fehlgriffe", "trefferquote", "eintraege", "bytes", "max_bytes", "verdraengt"}
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from messung import zaehle
+
+# Standardgröße des Caches (Summe der angegebenen Eintragsgrößen)
+MAX_BYTES = 64 * 2**20
+
+
+def planungsschluessel(roster_version, katalog_version, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                       seed, **optionen):
+    """SHA-256 über die kanonische Form der Eingaben.
+
+    Anwesende, geschlossene und Trainerpflicht-Fahrgeschäfte zählen als Mengen (Reihenfolge und
+    Doppelte egal). optionen: alles Weitere, was das Ergebnis bestimmt (Modus, Versuche, historie …),
+    JSON-serialisierbar.
+    """
+    kanonisch = json.dumps(
+        [
+            roster_version,
+            katalog_version,
+            sorted(set(anwesend)),
+            sorted(set(geschlossene)),
+            manuelle_zuweisungen,
+            sorted(set(trainerpflicht_fgs)),
+            seed,
+            optionen,
+        ],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(kanonisch.encode()).hexdigest()
+
+
+class PlanungsCache:
+    """LRU-Cache mit Obergrenze in Bytes; Werte werden geteilt und dürfen nicht verändert werden."""
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._eintraege = OrderedDict()   # schluessel -> (wert, groesse), ältester zuerst
+        self._bytes = 0
+        self._treffer = 0
+        self._fehlgriffe = 0
+        self._verdraengt = 0
+        self._lock = threading.Lock()
+
+    def hole(self, schluessel):
+        """Wert zu schluessel (und als zuletzt benutzt markieren) oder None."""
+        with self._lock:
+            eintrag = self._eintraege.get(schluessel)
+            if eintrag is None:
+                self._fehlgriffe += 1
+            else:
+                self._treffer += 1
+                self._eintraege.move_to_end(schluessel)
+        zaehle("planung.cache_fehlgriff" if eintrag is None else "planung.cache_treffer")
+        return None if eintrag is None else eintrag[0]
+
+    def lege_ab(self, schluessel, wert, groesse):
+        """Wert mit geschätzter Größe in Bytes ablegen, älteste Einträge verdrängen bis alles passt."""
+        if groesse > self.max_bytes:
+            return
+        with self._lock:
+            alt = self._eintraege.pop(schluessel, None)
+            if alt is not None:
+                self._bytes -= alt[1]
+            self._eintraege[schluessel] = (wert, groesse)
+            self._bytes += groesse
+            while self._bytes > self.max_bytes:
+                _, (_, verdraengt) = self._eintraege.popitem(last=False)
+                self._bytes -= verdraengt
+                self._verdraengt += 1
+
+    def leeren(self):
+        with self._lock:
+            self._eintraege.clear()
+            self._bytes = 0
+
+    def statistik(self):
+        with self._lock:
+            anfragen = self._treffer + self._fehlgriffe
+            return {
+                "treffer": self._treffer,
+                "fehlgriffe": self._fehlgriffe,
+                "trefferquote": round(self._treffer / anfragen, 4) if anfragen else None,
+                "eintraege": len(self._eintraege),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "verdraengt": self._verdraengt,
+            }
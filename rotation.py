@@ -0,0 +1,211 @@
+"""Rotationsplanung in Zeitfenstern (ohne Streamlit nutzbar).
+
+Der Tag wird in Zeitfenster (z.B. stündlich) geteilt. Jedes Zeitfenster wird inkrementell aus
+dem vorherigen geplant: wer weiter arbeiten darf, bleibt auf seiner Position, nur Lücken werden
+neu besetzt. Der Aufwand wächst damit linear mit der Anzahl der Zeitfenster.
+
+Regeln:
+  verfuegbarkeit       {Name: (von, bis)}, ohne Eintrag ist ein Anwesender den ganzen Tag da
+  max_folge            höchstens so viele Zeitfenster am Stück, danach ein Zeitfenster Pause;
+                       die Pausen sind reihum versetzt, im ersten Zeitfenster muss niemand pausieren
+  max_folge_belastend  höchstens so viele Zeitfenster am Stück auf belastenden Positionen
+                       (Pult, CCTV oder "Belastend": true im Katalog), danach Wechsel auf eine
+                       andere Position oder Pause
+"""
+import numpy as np
+
+from messung import gemessen
+from mitarbeiter import als_mitarbeiter
+from planer import (
+    NIEMAND_VERFUEGBAR,
+    _besetze_positionen,
+    _pruefe_trainer,
+    _repariere_luecken,
+    _vorab_einplanen,
+    baue_qualifikationsindex,
+)
+
+# Positionen, deren Name so beginnt, gelten als belastend (sofern der Katalog nichts anderes sagt)
+BELASTENDE_POSITIONEN = ("Pult", "CCTV")
+
+
+def _minuten(uhrzeit):
+    stunden, minuten = uhrzeit.split(":")
+    return int(stunden) * 60 + int(minuten)
+
+
+def _uhrzeit(minuten):
+    return f"{minuten // 60:02d}:{minuten % 60:02d}"
+
+
+def zeitfenster(beginn="09:00", ende="18:00", takt_min=60):
+    """Zeitfenster [(von, bis)] im Takt von takt_min Minuten, das letzte endet spätestens um ende."""
+    start, schluss = _minuten(beginn), _minuten(ende)
+    return [(_uhrzeit(t), _uhrzeit(min(t + takt_min, schluss))) for t in range(start, schluss, takt_min)]
+
+
+def ist_belastend(position):
+    return position.get("Belastend", position["Name"].startswith(BELASTENDE_POSITIONEN))
+
+
+def _teilkatalog(fahrgeschaefte, belastend):
+    # Fahrgeschäfte nur mit den belastenden (bzw. übrigen) Positionen
+    teil = []
+    for fg in fahrgeschaefte:
+        positionen = [p for p in fg["Positionen"] if ist_belastend(p) == belastend]
+        if positionen:
+            teil.append({**fg, "Positionen": positionen})
+    return teil
+
+
+def _behalte(vorherige, planung, verplante, frei, index, fahrgeschaefte, sperre):
+    # ♻️ Wer weiterarbeiten darf (frei und nicht gesperrt), bleibt auf seiner Position
+    for fg in fahrgeschaefte:
+        j = index["fg_index"][fg["Name"]]
+        for p in fg["Positionen"]:
+            if p["Name"] in planung.get(fg["Name"], {}):
+                continue
+            bisher = vorherige.get(fg["Name"], {}).get(p["Name"])
+            i = index["name_index"].get(bisher.split(" (")[0]) if bisher else None
+            if i is None or not frei[i] or sperre[i]:
+                continue
+            if p["Einweisung_erforderlich"] and not index["eingewiesen"][i, j]:
+                continue
+            planung.setdefault(fg["Name"], {})[p["Name"]] = bisher
+            verplante.append(index["namen"][i])
+            frei[i] = False
+
+
+def _besetze_teil(planung, verplante, frei, sperre, index, fahrgeschaefte, manuelle_zuweisungen, trainerpflicht_fgs):
+    # Lücken eines Teilkatalogs nur mit nicht gesperrten Freien besetzen, frei danach nachführen
+    verfuegbar = frei & ~sperre
+    _besetze_positionen(planung, verplante, verfuegbar, index, fahrgeschaefte, trainerpflicht_fgs)
+    _repariere_luecken(planung, verplante, verfuegbar, index, fahrgeschaefte, manuelle_zuweisungen)
+    frei &= verfuegbar | sperre
+
+
+@gemessen("planung.rotation")
+def plane_rotation(mitarbeiter, fahrgeschaefte, anwesend, geschlossene, manuelle_zuweisungen, trainerpflicht_fgs,
+                   zeitfenster, verfuegbarkeit=None, max_folge=None, max_folge_belastend=None):
+    """Plan je Zeitfenster, jedes inkrementell aus dem vorherigen (Eingaben wie plane_personal).
+
+    Vorab-Zuweisungen gelten in jedem Zeitfenster, in dem die Person verfügbar ist, und sind von
+    den Regeln ausgenommen.
+    Rückgabe: je Zeitfenster {"von", "bis", "planung", "verplante", "fehlende_trainer", "pause"}
+    """
+    index = baue_qualifikationsindex(als_mitarbeiter(mitarbeiter), fahrgeschaefte)
+    namen = index["namen"]
+    name_index = index["name_index"]
+    anzahl = len(namen)
+    verfuegbarkeit = verfuegbarkeit or {}
+    trainerpflicht_fgs = set(trainerpflicht_fgs)
+
+    geschlossene = set(geschlossene)
+    offene_fgs = [fg for fg in fahrgeschaefte if fg["Name"] not in geschlossene]
+    fgs_belastend = _teilkatalog(offene_fgs, True)
+    fgs_leicht = _teilkatalog(offene_fgs, False)
+    belastend = {(fg["Name"], p["Name"]) for fg in fgs_belastend for p in fg["Positionen"]}
+    anzahl_positionen = sum(len(fg["Positionen"]) for fg in offene_fgs)
+
+    # Verfügbarkeitsfenster in Minuten, einmal für alle Zeitfenster
+    anwesend_maske = np.zeros(anzahl, dtype=bool)
+    von = np.zeros(anzahl, dtype=int)
+    bis = np.full(anzahl, 24 * 60)
+    for name in anwesend:
+        i = name_index.get(name)
+        if i is not None:
+            anwesend_maske[i] = True
+            if name in verfuegbarkeit:
+                von[i], bis[i] = (_minuten(t) for t in verfuegbarkeit[name])
+
+    folge = np.zeros(anzahl, dtype=int)             # Zeitfenster am Stück im Einsatz
+    folge_belastend = np.zeros(anzahl, dtype=int)   # davon zuletzt am Stück auf belastenden Positionen
+    fest = np.array([name in manuelle_zuweisungen for name in namen], dtype=bool)
+    bisher_verfuegbar = np.zeros(anzahl, dtype=bool)
+    vorherige = {}
+    ergebnisse = []
+    for beginn, ende in zeitfenster:
+        verfuegbar = anwesend_maske & (von <= _minuten(beginn)) & (bis >= _minuten(ende))
+        if max_folge:
+            # ☕ Wer neu dazukommt, startet versetzt (reihum 0 … max_folge-1 Zeitfenster "schon im Einsatz"),
+            # damit die Pausen über die Zeitfenster verteilt sind statt alle zugleich; Pflicht zur Pause
+            # hat so niemand gleich im ersten Zeitfenster
+            neu = np.flatnonzero(verfuegbar & ~bisher_verfuegbar & ~fest)
+            folge[neu] = np.arange(len(neu)) % max_folge
+        bisher_verfuegbar = verfuegbar
+        pause = verfuegbar & ~fest & (folge >= max_folge) if max_folge else np.zeros(anzahl, dtype=bool)
+        aktiv = verfuegbar & ~pause
+        gesperrt = ~fest & (folge_belastend >= max_folge_belastend) if max_folge_belastend else np.zeros(anzahl, dtype=bool)
+
+        manuelle = {
+            name: zuweisung for name, zuweisung in manuelle_zuweisungen.items()
+            if name not in name_index or aktiv[name_index[name]]
+        }
+        planung, verplante, frei = _vorab_einplanen(index, [namen[i] for i in np.flatnonzero(aktiv)], manuelle)
+
+        # ☕ Pausen staffeln: so viele wie Personal übrig ist, die am längsten Eingesetzten zuerst.
+        # Sie springen nur ein, wenn sonst eine Position leer bliebe.
+        weich = np.zeros(anzahl, dtype=bool)
+        reserve = int(frei.sum()) - (anzahl_positionen - sum(len(pos) for pos in planung.values()))
+        if max_folge and reserve > 0:
+            kandidaten = np.flatnonzero(frei & ~fest & (folge > 0))
+            weich[kandidaten[np.argsort(-folge[kandidaten], kind="stable")][:reserve]] = True
+
+        # Wechsel von belastenden Positionen ebenso staffeln: je Zeitfenster etwa ein max_folge_belastend-tel
+        weich_belastend = np.zeros(anzahl, dtype=bool)
+        if max_folge_belastend:
+            kandidaten = np.flatnonzero(frei & ~fest & ~gesperrt & (folge_belastend > 0))
+            weich_belastend[kandidaten[np.argsort(-folge_belastend[kandidaten], kind="stable")][:len(belastend) // max_folge_belastend]] = True
+
+        # 🔁 Zuerst die belastenden Positionen (ohne Gesperrte), dann die übrigen
+        _behalte(vorherige, planung, verplante, frei, index, fgs_belastend, gesperrt | weich | weich_belastend)
+        _besetze_teil(planung, verplante, frei, gesperrt | weich | weich_belastend, index, fgs_belastend, manuelle, trainerpflicht_fgs)
+        _behalte(vorherige, planung, verplante, frei, index, fgs_leicht, weich)
+        _besetze_teil(planung, verplante, frei, weich, index, fgs_leicht, manuelle, trainerpflicht_fgs)
+        if (weich | weich_belastend).any():
+            # Verbliebene Lücken mit Personal aus der gestaffelten Pause schließen
+            _besetze_teil(planung, verplante, frei, gesperrt, index, fgs_belastend, manuelle, trainerpflicht_fgs)
+            _besetze_teil(planung, verplante, frei, np.zeros(anzahl, dtype=bool), index, fgs_leicht, manuelle, trainerpflicht_fgs)
+
+        # Zähler fortschreiben: wer nicht eingesetzt ist, erholt sich
+        im_einsatz = np.zeros(anzahl, dtype=bool)
+        auf_belastend = np.zeros(anzahl, dtype=bool)
+        for fg_name, pos_dict in planung.items():
+            for pos_name, name in pos_dict.items():
+                i = name_index.get(name.split(" (")[0])
+                if i is not None:
+                    im_einsatz[i] = True
+                    auf_belastend[i] |= (fg_name, pos_name) in belastend
+        folge = np.where(im_einsatz, folge + 1, 0)
+        folge_belastend = np.where(auf_belastend, folge_belastend + 1, 0)
+
+        ergebnisse.append({
+            "von": beginn,
+            "bis": ende,
+            "planung": planung,
+            "verplante": verplante,
+            "fehlende_trainer": _pruefe_trainer(planung, index, trainerpflicht_fgs),
+            "pause": [namen[i] for i in np.flatnonzero(pause | (weich & ~im_einsatz))],
+        })
+        vorherige = planung
+    return ergebnisse
+
+
+def schichten_je_mitarbeiter(rotation):
+    """Einsätze je Mitarbeiter, aufeinanderfolgende Zeitfenster am selben Fahrgeschäft zusammengefasst.
+
+    Rückgabe: {Name: [{"Fahrgeschäft", "von", "bis"}]} in zeitlicher Reihenfolge
+    """
+    schichten = {}
+    for fenster in rotation:
+        for fg_name, pos_dict in fenster["planung"].items():
+            for name in pos_dict.values():
+                if name == NIEMAND_VERFUEGBAR:
+                    continue
+                einsaetze = schichten.setdefault(name.split(" (")[0], [])
+                letzter = einsaetze[-1] if einsaetze else None
+                if letzter and letzter["Fahrgeschäft"] == fg_name and letzter["bis"] == fenster["von"]:
+                    letzter["bis"] = fenster["bis"]
+                else:
+                    einsaetze.append({"Fahrgeschäft": fg_name, "von": fenster["von"], "bis": fenster["bis"]})
+    return schichten
@@ -0,0 +1,75 @@
+"""Gemeinsame Hilfen: zufällige kleine Parks und eine einfache maximale Zuordnung als Referenz."""
+import os
+import random
+import sys
+
+import pytest
+
+# Die Module liegen flach im Wurzelverzeichnis (kein Paket)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mitarbeiter import Mitarbeiter  # noqa: E402
+
+
+def zufallspark(seed, max_fgs=6, max_mitarbeiter=12, trainer=False):
+    """(mitarbeiter, fahrgeschaefte, anwesend) für einen kleinen zufälligen Park."""
+    r = random.Random(seed)
+    anzahl_fgs = r.randint(1, max_fgs)
+    fahrgeschaefte = [
+        {
+            "Name": f"F{j}",
+            "Bereich": f"B{j % 2}",
+            "Positionen": [{"Name": f"P{k}", "Einweisung_erforderlich": r.random() < 0.75} for k in range(r.randint(1, 3))],
+        }
+        for j in range(anzahl_fgs)
+    ]
+    mitarbeiter = []
+    for i in range(r.randint(1, max_mitarbeiter)):
+        einweisungen = frozenset(f"F{j}" for j in range(anzahl_fgs) if r.random() < 0.3)
+        mitarbeiter.append(Mitarbeiter(
+            f"M{i}",
+            f"B{r.randint(0, 1)}",
+            einweisungen,
+            frozenset(f"F{j}" for j in range(anzahl_fgs) if r.random() < 0.1),
+            frozenset(fg for fg in einweisungen if trainer and r.random() < 0.4),
+        ))
+    anwesend = [m.name for m in mitarbeiter if r.random() < 0.8]
+    return mitarbeiter, fahrgeschaefte, anwesend
+
+
+def max_besetzung(mitarbeiter, fahrgeschaefte, personen, positionen=None):
+    """Maximal besetzbare Positionen (Kuhn), unabhängig vom Planer gerechnet.
+
+    positionen: [(Fahrgeschäft, Position)], Standard: alle Positionen aller Fahrgeschäfte.
+    """
+    nach_name = {m.name: m for m in mitarbeiter}
+    pflicht = {(fg["Name"], p["Name"]): p["Einweisung_erforderlich"] for fg in fahrgeschaefte for p in fg["Positionen"]}
+    if positionen is None:
+        positionen = list(pflicht)
+
+    def geeignet(name, position):
+        m = nach_name[name]
+        return not pflicht[position] or position[0] in m.einweisungen | m.sekundaer_einweisungen
+
+    besetzt_von = {}
+
+    def versuche(name, gesehen):
+        for k, position in enumerate(positionen):
+            if k not in gesehen and geeignet(name, position):
+                gesehen.add(k)
+                if k not in besetzt_von or versuche(besetzt_von[k], gesehen):
+                    besetzt_von[k] = name
+                    return True
+        return False
+
+    return sum(versuche(name, set()) for name in personen)
+
+
+@pytest.fixture
+def park():
+    return zufallspark
+
+
+@pytest.fixture
+def maximum():
+    return max_besetzung
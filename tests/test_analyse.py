@@ -0,0 +1,90 @@
+"""Robustheit: simuliere_ausfaelle gegen Durchprobieren aller Ausfälle."""
+import itertools
+import random
+
+import pytest
+
+from analyse import simuliere_ausfaelle
+
+
+def vorab(seed, fahrgeschaefte, anwesend):
+    # Bis zu zwei Anwesende fest auf verschiedene Positionen
+    r = random.Random(seed)
+    manuelle = {}
+    for name in anwesend[:r.randint(0, 2)]:
+        fg = r.choice(fahrgeschaefte)
+        zuweisung = {"Fahrgeschäft": fg["Name"], "Position": r.choice(fg["Positionen"])["Name"]}
+        if zuweisung not in manuelle.values():
+            manuelle[name] = zuweisung
+    return manuelle
+
+
+def besetzbar(mitarbeiter, fahrgeschaefte, anwesend, manuelle, ausfall, maximum):
+    # Vorab Eingeteilte halten ihre Position, die übrigen Positionen so gut wie möglich
+    fest = {(z["Fahrgeschäft"], z["Position"]) for name, z in manuelle.items() if name not in ausfall}
+    offen = [(fg["Name"], p["Name"]) for fg in fahrgeschaefte for p in fg["Positionen"] if (fg["Name"], p["Name"]) not in fest]
+    frei = [n for n in anwesend if n not in ausfall and n not in manuelle]
+    return len(fest) + maximum(mitarbeiter, fahrgeschaefte, frei, offen)
+
+
+@pytest.mark.parametrize("seed", range(80))
+def test_ausfaelle_wie_durchprobiert(seed, park, maximum):
+    mitarbeiter, fahrgeschaefte, anwesend = park(seed, max_mitarbeiter=9)
+    manuelle = vorab(seed, fahrgeschaefte, anwesend)
+    ergebnis = simuliere_ausfaelle(mitarbeiter, fahrgeschaefte, anwesend, [], manuelle, [], paare=True, max_paare=10**6)
+
+    basis = besetzbar(mitarbeiter, fahrgeschaefte, anwesend, manuelle, (), maximum)
+    einzeln = {e["name"]: e["verlust"] for e in ergebnis["einzeln"]}
+    assert set(einzeln) == set(anwesend)
+    for name in anwesend:
+        assert einzeln[name] == basis - besetzbar(mitarbeiter, fahrgeschaefte, anwesend, manuelle, (name,), maximum), name
+
+    paare = {frozenset(p["namen"]): p["verlust"] for p in ergebnis["paare"]}
+    for a, b in itertools.combinations(anwesend, 2):
+        erwartet = basis - besetzbar(mitarbeiter, fahrgeschaefte, anwesend, manuelle, (a, b), maximum)
+        assert paare.get(frozenset((a, b)), einzeln[a] + einzeln[b]) == erwartet, (a, b)
+    n = len(anwesend)
+    assert ergebnis["szenarien"] == n + n * (n - 1) // 2
+
+
+def trainer_abdeckbar(mitarbeiter, anwesend, manuelle, trainerpflicht, ausfall):
+    # Ein eigener Trainer je Fahrgeschäft; vorab Eingeteilte nur auf ihrem eigenen Fahrgeschäft
+    kandidaten = {
+        fg: [
+            m.name for m in mitarbeiter
+            if m.name in anwesend and m.name not in ausfall and fg in m.trainer
+            and (m.name not in manuelle or manuelle[m.name]["Fahrgeschäft"] == fg)
+        ]
+        for fg in trainerpflicht
+    }
+    bestes = 0
+    for wahl in itertools.product(*[namen + [None] for namen in kandidaten.values()]):
+        gewaehlt = [n for n in wahl if n is not None]
+        if len(gewaehlt) == len(set(gewaehlt)):
+            bestes = max(bestes, len(gewaehlt))
+    return bestes
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_trainerausfaelle_wie_durchprobiert(seed, park):
+    mitarbeiter, fahrgeschaefte, anwesend = park(seed, max_fgs=4, max_mitarbeiter=7, trainer=True)
+    manuelle = vorab(seed, fahrgeschaefte, anwesend)
+    trainerpflicht = [fg["Name"] for fg in fahrgeschaefte][::2]
+    ergebnis = simuliere_ausfaelle(mitarbeiter, fahrgeschaefte, anwesend, [], manuelle, trainerpflicht)
+
+    basis = trainer_abdeckbar(mitarbeiter, anwesend, manuelle, trainerpflicht, ())
+    for e in ergebnis["einzeln"]:
+        verlust = basis - trainer_abdeckbar(mitarbeiter, anwesend, manuelle, trainerpflicht, (e["name"],))
+        assert len(e["trainer"]) == verlust, e["name"]
+
+
+def test_vorab_eingeteilte_werden_simuliert():
+    from mitarbeiter import Mitarbeiter
+
+    fahrgeschaefte = [{"Name": "F0", "Bereich": "B", "Positionen": [{"Name": "P0", "Einweisung_erforderlich": True}]}]
+    mitarbeiter = [Mitarbeiter("Fest", "B", frozenset({"F0"})), Mitarbeiter("Ohne", "B")]
+    manuelle = {"Fest": {"Fahrgeschäft": "F0", "Position": "P0"}}
+    ergebnis = simuliere_ausfaelle(mitarbeiter, fahrgeschaefte, ["Fest", "Ohne"], [], manuelle, [])
+
+    fest, = [e for e in ergebnis["einzeln"] if e["name"] == "Fest"]
+    assert fest["vorab"] and fest["fahrgeschaeft"] == "F0" and fest["verlust"] == 1
@@ -0,0 +1,86 @@
+"""Editor-Deltas bis zum Speichern: uebernehme_editor -> wende_deltas_an -> speichern."""
+import pandas as pd
+
+from katalog import kompiliere_katalog
+from mitarbeiter import parse_mitarbeiter
+from mitarbeiter_editor import baue_filterindex, neuer_editor, pruefe_deltas, seite, uebernehme_editor, wende_deltas_an
+from mitarbeiter_speicher import SpeicherImArbeitsspeicher, roster_version
+
+KATALOG = kompiliere_katalog([
+    {"Name": name, "Bereich": "B", "Positionen": [{"Name": "Fahrer", "Einweisung_erforderlich": True}]}
+    for name in ("Loopster", "Kanu", "Pyramide")
+])
+
+
+def liste():
+    return pd.DataFrame({
+        "Name": ["Anna", "Ben", "Cem"],
+        "Bereich": ["B", "B", "C"],
+        "Einweisungen": ["Loopster", "Kanu", ""],
+        "Sekundaer_Einweisungen": ["", "", "Pyramide"],
+        "Trainer": [["Loopster"], [], []],
+    })
+
+
+def editor_fuer(speicher):
+    df, stand = speicher.laden()
+    return neuer_editor(df, parse_mitarbeiter(df), stand, roster_version(df))
+
+
+def test_deltas_speichern_und_neu_laden():
+    speicher = SpeicherImArbeitsspeicher(liste())
+    editor = editor_fuer(speicher)
+    seite_df = seite(editor, list(editor["basis"].index))
+    uebernehme_editor(editor, seite_df, {
+        "edited_rows": {0: {"Einweisungen": "Loopster, Kanu"}, 1: {"Trainer": "Kanu"}},
+        "added_rows": [{"_index": None, "Name": "Dora", "Bereich": "C", "Einweisungen": "Pyramide"}],
+        "deleted_rows": [2],
+    })
+    assert pruefe_deltas(editor, KATALOG, baue_filterindex(editor["mitarbeiter"])) == []
+
+    ergebnis = speicher.speichern(wende_deltas_an(editor), editor["basis"], editor["stand"])
+    assert ergebnis["status"] == "gespeichert"
+    assert (ergebnis["zellen"], ergebnis["neu"], ergebnis["geloescht"]) == (2, 1, 1)
+
+    df, stand = speicher.laden()
+    assert stand == ergebnis["stand"]
+    assert list(df["Name"]) == ["Anna", "Ben", "Dora"]
+    assert df.at[0, "Einweisungen"] == "Loopster, Kanu"
+    assert df.at[1, "Trainer"] == ["Kanu"]
+    assert df.at[2, "Trainer"] == []
+
+
+def test_rueckgaengig_ohne_delta():
+    editor = editor_fuer(SpeicherImArbeitsspeicher(liste()))
+    seite_df = seite(editor, [0])
+    uebernehme_editor(editor, seite_df, {"edited_rows": {0: {"Trainer": "Kanu"}}})
+    uebernehme_editor(editor, seite_df, {"edited_rows": {0: {"Trainer": "Loopster"}}})
+    assert editor["geaendert"] == {}
+
+
+def test_konflikt_bei_zwischenzeitlicher_aenderung():
+    speicher = SpeicherImArbeitsspeicher(liste())
+    erster, zweiter = editor_fuer(speicher), editor_fuer(speicher)
+
+    uebernehme_editor(erster, seite(erster, [0]), {"edited_rows": {0: {"Bereich": "C"}}})
+    assert speicher.speichern(wende_deltas_an(erster), erster["basis"], erster["stand"])["status"] == "gespeichert"
+
+    uebernehme_editor(zweiter, seite(zweiter, [1]), {"edited_rows": {0: {"Bereich": "D"}}})
+    assert speicher.speichern(wende_deltas_an(zweiter), zweiter["basis"], zweiter["stand"])["status"] == "konflikt"
+    df, _ = speicher.laden()
+    assert list(df["Bereich"]) == ["C", "B", "C"]
+
+
+def test_pruefung_findet_tippfehler_und_doppelte_namen():
+    editor = editor_fuer(SpeicherImArbeitsspeicher(liste()))
+    seite_df = seite(editor, list(editor["basis"].index))
+    uebernehme_editor(editor, seite_df, {
+        "edited_rows": {1: {"Einweisungen": "Kannu"}},
+        "added_rows": [{"Name": "Anna", "Bereich": "B"}, {"Bereich": "B"}],
+    })
+    probleme = {(p["spalte"], p["problem"]) for p in pruefe_deltas(editor, KATALOG, baue_filterindex(editor["mitarbeiter"]))}
+    assert probleme == {
+        ("Einweisungen", "Unbekanntes Fahrgeschäft „Kannu“ – gemeint: Kanu?"),
+        ("Name", "Name ist doppelt"),
+        ("Name", "Name fehlt"),
+    }
@@ -0,0 +1,56 @@
+"""Speicher-Backends: leere SQLite-Datenbank, Speichern mit Konfliktprüfung, Snapshot-Kaltstart."""
+import pandas as pd
+
+from mitarbeiter_speicher import MITARBEITER_SPALTEN, SnapshotSpeicher, SpeicherImArbeitsspeicher, SqliteSpeicher
+
+
+def liste():
+    return pd.DataFrame({
+        "Name": ["Anna", "Ben"],
+        "Bereich": ["B", "C"],
+        "Einweisungen": ["Loopster", ""],
+        "Sekundaer_Einweisungen": ["", "Kanu"],
+        "Trainer": [["Loopster"], []],
+    })
+
+
+def test_leere_sqlite_datenbank(tmp_path):
+    df, stand = SqliteSpeicher(str(tmp_path / "leer.sqlite")).laden()
+    assert stand is None
+    assert df.empty and tuple(df.columns) == MITARBEITER_SPALTEN
+
+
+def test_sqlite_speichern_und_konflikt(tmp_path):
+    speicher = SqliteSpeicher(str(tmp_path / "m.sqlite"))
+    speicher.ersetzen(liste(), "1")
+    basis, stand = speicher.laden()
+    assert basis.at[0, "Trainer"] == ["Loopster"] and stand == "1"
+
+    neu = basis.copy()
+    neu.at[1, "Bereich"] = "B"
+    ergebnis = speicher.speichern(neu, basis, stand)
+    assert ergebnis["status"] == "gespeichert" and ergebnis["zellen"] == 1
+    assert speicher.laden()[0].at[1, "Bereich"] == "B"
+    assert speicher.speichern(neu, basis, stand)["status"] == "konflikt"
+
+
+def test_snapshot_kaltstart_ohne_abfrage_der_quelle(tmp_path):
+    class Quelle(SpeicherImArbeitsspeicher):
+        abfragen = 0
+
+        def stand(self):
+            Quelle.abfragen += 1
+            return super().stand()
+
+    snapshot = SqliteSpeicher(str(tmp_path / "snap.sqlite"))
+    snapshot.ersetzen(liste(), "alt")
+    speicher = SnapshotSpeicher(Quelle(liste()), snapshot)
+    speicher.abgleichen = lambda: None   # Abgleich im Hintergrund hier nicht starten
+
+    df, stand = speicher.laden()
+    assert stand == "alt" and list(df["Name"]) == ["Anna", "Ben"]
+    assert Quelle.abfragen == 0
+
+    # Danach lädt ein geänderter Stand synchron aus der Quelle und erneuert den Snapshot
+    df, stand = speicher.laden()
+    assert stand == "0" and snapshot.stand() == "0"
@@ -0,0 +1,54 @@
+"""Greedy, Beste von N und optimale Planung gegen die maximale Zuordnung."""
+import pytest
+
+from analyse import analysiere_machbarkeit
+from planer import (
+    NIEMAND_VERFUEGBAR,
+    plane_personal,
+    plane_personal_beste,
+    plane_personal_optimal,
+)
+
+
+def besetzt(planung):
+    return sum(name != NIEMAND_VERFUEGBAR for pos_dict in planung.values() for name in pos_dict.values())
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_planer_besetzen_maximal(seed, park, maximum):
+    mitarbeiter, fahrgeschaefte, anwesend = park(seed)
+    erwartet = maximum(mitarbeiter, fahrgeschaefte, anwesend)
+
+    assert besetzt(plane_personal(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [], seed=seed)[0]) == erwartet
+    assert besetzt(plane_personal_beste(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [], versuche=4, worker=1)[0]) == erwartet
+    assert besetzt(plane_personal_optimal(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [])[0]) == erwartet
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_machbarkeit_untergrenze(seed, park, maximum):
+    mitarbeiter, fahrgeschaefte, anwesend = park(seed)
+    ergebnis = analysiere_machbarkeit(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [])
+
+    assert ergebnis["max_besetzbar"] == maximum(mitarbeiter, fahrgeschaefte, anwesend)
+    assert ergebnis["min_unbesetzt"] == ergebnis["positionen"] - ergebnis["max_besetzbar"]
+
+
+def test_vorab_zuweisung_bleibt(park):
+    mitarbeiter, fahrgeschaefte, anwesend = park(3)
+    name = anwesend[0]
+    fg = fahrgeschaefte[-1]
+    manuelle = {name: {"Fahrgeschäft": fg["Name"], "Position": fg["Positionen"][0]["Name"]}}
+    for planung in (
+        plane_personal(mitarbeiter, fahrgeschaefte, anwesend, [], manuelle, [], seed=0)[0],
+        plane_personal_optimal(mitarbeiter, fahrgeschaefte, anwesend, [], manuelle, [])[0],
+    ):
+        assert planung[fg["Name"]][fg["Positionen"][0]["Name"]] == name
+        assert sum(n.split(" (")[0] == name for pos_dict in planung.values() for n in pos_dict.values()) == 1
+
+
+def test_beste_seed_reproduzierbar(park):
+    mitarbeiter, fahrgeschaefte, anwesend = park(11, max_fgs=8, max_mitarbeiter=20)
+    planung, _, _, info = plane_personal_beste(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [], versuche=8, worker=1)
+
+    assert info["versuche"] == 8
+    assert plane_personal(mitarbeiter, fahrgeschaefte, anwesend, [], {}, [], seed=info["seed"])[0] == planung
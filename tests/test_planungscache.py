@@ -0,0 +1,40 @@
+"""Planungscache: LRU-Verdrängung nach Bytes und kanonische Schlüssel."""
+from planungscache import PlanungsCache, planungsschluessel
+
+
+def test_verdraengt_den_am_laengsten_unbenutzten():
+    cache = PlanungsCache(max_bytes=100)
+    cache.lege_ab("a", "A", 40)
+    cache.lege_ab("b", "B", 40)
+    assert cache.hole("a") == "A"   # a ist jetzt zuletzt benutzt
+    cache.lege_ab("c", "C", 40)
+
+    assert cache.hole("b") is None
+    assert cache.hole("a") == "A" and cache.hole("c") == "C"
+    statistik = cache.statistik()
+    assert (statistik["eintraege"], statistik["bytes"], statistik["verdraengt"]) == (2, 80, 1)
+    assert (statistik["treffer"], statistik["fehlgriffe"]) == (3, 1)
+
+
+def test_zu_grosse_eintraege_und_ersetzen():
+    cache = PlanungsCache(max_bytes=100)
+    cache.lege_ab("a", "A", 60)
+    cache.lege_ab("riesig", "R", 101)
+    assert cache.hole("riesig") is None and cache.hole("a") == "A"
+
+    cache.lege_ab("a", "A2", 30)   # gleicher Schlüssel: Größe wird ersetzt, nicht addiert
+    cache.lege_ab("b", "B", 70)
+    assert cache.hole("a") == "A2" and cache.statistik()["bytes"] == 100
+
+    cache.leeren()
+    assert cache.hole("b") is None and cache.statistik()["bytes"] == 0
+
+
+def test_schluessel_kanonisch():
+    zuweisung = {"Anna": {"Fahrgeschäft": "Loopster", "Position": "Fahrer"}}
+    schluessel = planungsschluessel("r1", "k1", ["Ben", "Anna", "Anna"], ["F"], zuweisung, ["X", "Y"], 3, modus="greedy")
+
+    assert schluessel == planungsschluessel("r1", "k1", ["Anna", "Ben"], ["F"], zuweisung, ["Y", "X"], 3, modus="greedy")
+    assert schluessel != planungsschluessel("r1", "k1", ["Anna", "Ben"], ["F"], zuweisung, ["X", "Y"], 4, modus="greedy")
+    assert schluessel != planungsschluessel("r1", "k2", ["Anna", "Ben"], ["F"], zuweisung, ["X", "Y"], 3, modus="greedy")
+    assert schluessel != planungsschluessel("r1", "k1", ["Anna", "Ben"], ["F"], zuweisung, ["X", "Y"], 3, modus="optimal")